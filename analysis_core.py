@@ -5,16 +5,41 @@ Refactored for GUI integration - returns data and Plotly figures
 """
 
 import pandas as pd
-import yfinance as yf
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import os
-from typing import Tuple, Dict, List
+from typing import TYPE_CHECKING, Tuple, Dict, List, Callable, Iterator
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime
+import threading
 import warnings
+from price_providers import PriceProvider, YFinanceProvider, CachedPriceProvider
+from transaction_store import TransactionStore, REQUIRED_COLUMNS
+from result_cache import ResultCache
+from risk_metrics import compute_risk_metrics
+from rolling import compute_rolling_analytics
+from periods import Period, PeriodReturns, period_bounds, period_label
+from profiling import Profiler, span, write_trace
+from downsample import FigureResampler, DEFAULT_MAX_POINTS
 warnings.filterwarnings('ignore')
 
+# Plotly is imported inside the figure builders so that callers who only need
+# the numbers (CLI, scheduled runs) never pay for loading it
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Figures are serialized with orjson when it is installed (several times faster
+# than the standard library encoder)
+try:
+    import orjson
+    JSON_ENGINE = 'orjson'
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    JSON_ENGINE = 'json'
+    json_loads = json.loads
+
 # Note: data directory should already exist with transactions.csv
 # We don't create it here to avoid permission issues when running as executable
 # Output directory for figs can be created on-demand if needed
@@ -43,6 +68,12 @@ sector_map = {
     'Utilities': 'Utilities'
 }
 
+# Sectors that have a Vanguard ETF, in display order
+SECTOR_NAMES = [name for name, v_key in sector_map.items() if v_key in V]
+
+# Annual risk-free rate used for Sharpe, Sortino and alpha
+RISK_FREE_RATE = 0.0
+
 # Sector colors for consistent styling
 SECTOR_COLORS = {
     'Technology': '#1f77b4',
@@ -61,7 +92,55 @@ SECTOR_COLORS = {
 }
 
 
-def generate_comparison_plot(returns_data: Dict, sector: str = None, comparison_type: str = 'ETF_vs_Stocks', period: str = 'General', transaction_dates: Dict = None) -> go.Figure:
+class AnalysisCancelled(Exception):
+    """Raised from a progress callback to abort a running analysis"""
+
+
+def build_entry_marker_trace(returns: pd.Series, entries: List[Tuple[pd.Timestamp, List[str]]]) -> 'go.Scatter':
+    """
+    Build a single marker trace for all entry points on a returns line.
+    
+    All entry dates are snapped to the nearest date of the returns index in one
+    lookup, and each marker carries its own label and hover text, so the trace
+    count stays constant however many transactions there are.
+    
+    Args:
+        returns: Cumulative return series the markers sit on
+        entries: List of (entry date, [tickers]) tuples
+    
+    Returns:
+        Plotly Scatter trace, or None if there is nothing to mark
+    """
+    import plotly.graph_objects as go
+    if not entries or len(returns) == 0:
+        return None
+    
+    entries = sorted(entries, key=lambda entry: entry[0])
+    entry_dates = pd.DatetimeIndex([pd.Timestamp(date) for date, _ in entries])
+    positions = returns.index.get_indexer(entry_dates, method='nearest')
+    valid = positions >= 0
+    if not valid.any():
+        return None
+    
+    ticker_labels = np.array([', '.join(tickers) if tickers else 'Entry' for _, tickers in entries], dtype=object)[valid]
+    date_labels = entry_dates[valid].strftime('%Y-%m-%d')
+    
+    return go.Scatter(
+        x=returns.index[positions[valid]],
+        y=returns.to_numpy()[positions[valid]],
+        mode='markers+text',
+        text=ticker_labels,
+        textposition='top center',
+        textfont=dict(size=9, color='#FF0000'),
+        marker=dict(symbol='triangle-up', size=12, color='#FF0000', line=dict(width=2, color='white')),
+        customdata=np.column_stack([date_labels, ticker_labels]),
+        name='Entries',
+        showlegend=False,
+        hovertemplate='Date: %{customdata[0]}<br>Ticker: %{customdata[1]}<br>Return: %{y:.2f}%<extra></extra>'
+    )
+
+
+def generate_comparison_plot(returns_data: Dict, sector: str = None, comparison_type: str = 'ETF_vs_Stocks', period: Period = 'General', transaction_dates: Dict = None) -> 'go.Figure':
     """
     Generate comparison plot with ETF as benchmark, showing excess returns and entry points.
     
@@ -69,42 +148,39 @@ def generate_comparison_plot(returns_data: Dict, sector: str = None, comparison_
         returns_data: Dictionary containing all returns data
         sector: Sector name (for ETF vs Stocks comparison) or None (for Equity vs S&P 500)
         comparison_type: 'ETF_vs_Stocks' or 'Equity_vs_SP500'
-        period: 'General' (since beginning) or 'YTD' (year to date)
+        period: 'General' (since beginning), 'YTD', 'QTD', 'MTD', a trailing
+            period ('1Y', '6M', '3M', '1M'), a semester ('Fall 2024') or a
+            (start, end) tuple of dates; see periods.PeriodReturns
         transaction_dates: Dictionary mapping sectors to lists of transaction dates
     
     Returns:
         Plotly figure object
     """
+    import plotly.graph_objects as go
     fig = go.Figure()
     title = "Returns Comparison"
     transaction_dates = transaction_dates or {}
+    period_returns = returns_data['period_returns']
+    label = period_label(period)
+    
+    def entries_in_period(entries: List[Tuple[pd.Timestamp, List[str]]], returns: pd.Series) -> List:
+        # Entries outside a window would otherwise pile up on its first or last date
+        if period == 'General' or len(returns) == 0:
+            return entries
+        start, end = period_bounds(period, returns.index[0], returns.index[-1])
+        return [(date, tickers) for date, tickers in entries if start <= pd.Timestamp(date) <= end]
     
     if comparison_type == 'ETF_vs_Stocks':
         # ETF is the benchmark (standalone), Sector aggregate (ETF + stocks) is the portfolio
-        if sector and sector in returns_data['sector_returns']:
-            if period == 'General':
-                benchmark_returns = returns_data['sector_returns'][sector]['ETF_Benchmark']
-                portfolio_returns = returns_data['sector_returns'][sector]['Sector_Aggregate']
-                title = f'{sector}: Sector Aggregate vs ETF Benchmark (Since Beginning)'
-            else:  # YTD
-                benchmark_returns = returns_data['sector_ytd_returns'][sector]['ETF_Benchmark']
-                portfolio_returns = returns_data['sector_ytd_returns'][sector]['Sector_Aggregate']
-                title = f'{sector}: Sector Aggregate vs ETF Benchmark (YTD)'
-        else:
+        available_sectors = list(returns_data['sector_returns'].keys())
+        if not (sector and sector in available_sectors):
             # Default to first available sector
-            available_sectors = list(returns_data['sector_returns'].keys())
-            if available_sectors:
-                sector = available_sectors[0]
-                if period == 'General':
-                    benchmark_returns = returns_data['sector_returns'][sector]['ETF_Benchmark']
-                    portfolio_returns = returns_data['sector_returns'][sector]['Sector_Aggregate']
-                    title = f'{sector}: Sector Aggregate vs ETF Benchmark (Since Beginning)'
-                else:
-                    benchmark_returns = returns_data['sector_ytd_returns'][sector]['ETF_Benchmark']
-                    portfolio_returns = returns_data['sector_ytd_returns'][sector]['Sector_Aggregate']
-                    title = f'{sector}: Sector Aggregate vs ETF Benchmark (YTD)'
-            else:
+            if not available_sectors:
                 return fig
+            sector = available_sectors[0]
+        benchmark_returns = period_returns.series(f'{sector}_ETF_Benchmark', period)
+        portfolio_returns = period_returns.series(f'{sector}_Sector_Aggregate', period)
+        title = f'{sector}: Sector Aggregate vs ETF Benchmark ({label})'
         
         # Calculate excess returns (active returns)
         excess_returns = portfolio_returns - benchmark_returns
@@ -136,52 +212,17 @@ def generate_comparison_plot(returns_data: Dict, sector: str = None, comparison_
         
         # Mark entry points for this sector with ticker labels
         if sector in transaction_dates:
-            entry_date_tickers = transaction_dates[sector]
-            # entry_date_tickers is a dict: {date: [ticker1, ticker2, ...]}
-            for entry_date, tickers in entry_date_tickers.items():
-                # Find nearest date in returns index
-                if period == 'General':
-                    date_series = portfolio_returns.index
-                else:
-                    date_series = portfolio_returns.index
-                
-                # Find closest date
-                try:
-                    date_idx = date_series.get_indexer([pd.Timestamp(entry_date)], method='nearest')[0]
-                    if date_idx >= 0 and date_idx < len(date_series):
-                        entry_idx = date_series[date_idx]
-                        if entry_idx in portfolio_returns.index:
-                            entry_return = portfolio_returns.loc[entry_idx]
-                            # Create ticker label string
-                            ticker_label = ', '.join(tickers) if tickers else 'Entry'
-                            date_str = pd.Timestamp(entry_date).strftime("%Y-%m-%d")
-                            hover_text = f'Date: {date_str}<br>Ticker: {ticker_label}<br>Return: %{{y:.2f}}%'
-                            
-                            fig.add_trace(go.Scatter(
-                                x=[entry_idx],
-                                y=[entry_return],
-                                mode='markers+text',
-                                text=ticker_label,
-                                textposition='top center',
-                                textfont=dict(size=9, color='#FF0000'),
-                                marker=dict(symbol='triangle-up', size=12, color='#FF0000', line=dict(width=2, color='white')),
-                                name=f'Entry: {date_str}',
-                                showlegend=False,
-                                hovertemplate=hover_text + '<extra></extra>'
-                            ))
-                except:
-                    pass
+            # transaction_dates[sector] is a dict: {date: [ticker1, ticker2, ...]}
+            entries = entries_in_period(list(transaction_dates[sector].items()), portfolio_returns)
+            marker_trace = build_entry_marker_trace(portfolio_returns, entries)
+            if marker_trace is not None:
+                fig.add_trace(marker_trace)
     
     elif comparison_type == 'Equity_vs_SP500':
         # S&P 500 is the benchmark, Equity portfolio is the portfolio
-        if period == 'General':
-            portfolio_returns = returns_data['equity_returns']
-            benchmark_returns = returns_data['benchmark_returns']
-            title = 'Equity Portfolio vs S&P 500 Benchmark (Since Beginning)'
-        else:  # YTD
-            portfolio_returns = returns_data['equity_ytd_returns']
-            benchmark_returns = returns_data['benchmark_ytd_returns']
-            title = 'Equity Portfolio vs S&P 500 Benchmark (YTD)'
+        portfolio_returns = period_returns.series('Equity', period)
+        benchmark_returns = period_returns.series('S&P 500', period)
+        title = f'Equity Portfolio vs S&P 500 Benchmark ({label})'
         
         # Calculate excess returns (active returns)
         excess_returns = portfolio_returns - benchmark_returns
@@ -212,41 +253,12 @@ def generate_comparison_plot(returns_data: Dict, sector: str = None, comparison_
         ))
         
         # Mark all entry points across all sectors with ticker labels
-        # Collect all transactions from all sectors
         all_transactions = []  # List of (date, tickers) tuples
         for sec, date_ticker_dict in transaction_dates.items():
-            for entry_date, tickers in date_ticker_dict.items():
-                all_transactions.append((entry_date, tickers))
-        
-        # Sort by date
-        all_transactions.sort(key=lambda x: x[0])
-        
-        for entry_date, tickers in all_transactions:
-            try:
-                date_idx = portfolio_returns.index.get_indexer([pd.Timestamp(entry_date)], method='nearest')[0]
-                if date_idx >= 0 and date_idx < len(portfolio_returns.index):
-                    entry_idx = portfolio_returns.index[date_idx]
-                    if entry_idx in portfolio_returns.index:
-                        entry_return = portfolio_returns.loc[entry_idx]
-                        # Create ticker label string
-                        ticker_label = ', '.join(tickers) if tickers else 'Entry'
-                        date_str = pd.Timestamp(entry_date).strftime("%Y-%m-%d")
-                        hover_text = f'Date: {date_str}<br>Ticker: {ticker_label}<br>Return: %{{y:.2f}}%'
-                        
-                        fig.add_trace(go.Scatter(
-                            x=[entry_idx],
-                            y=[entry_return],
-                            mode='markers+text',
-                            text=ticker_label,
-                            textposition='top center',
-                            textfont=dict(size=9, color='#FF0000'),
-                            marker=dict(symbol='triangle-up', size=12, color='#FF0000', line=dict(width=2, color='white')),
-                            name=f'Entry: {date_str}',
-                            showlegend=False,
-                            hovertemplate=hover_text + '<extra></extra>'
-                        ))
-            except:
-                pass
+            all_transactions.extend(date_ticker_dict.items())
+        marker_trace = build_entry_marker_trace(portfolio_returns, entries_in_period(all_transactions, portfolio_returns))
+        if marker_trace is not None:
+            fig.add_trace(marker_trace)
     
     fig.update_layout(
         title=title,
@@ -261,18 +273,792 @@ def generate_comparison_plot(returns_data: Dict, sector: str = None, comparison_
     return fig
 
 
-def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv') -> Tuple[str, Dict, pd.DataFrame, pd.DataFrame, Dict]:
+# Comparison plot options offered by the GUI; COMPARISON_PERIODS are built ahead
+# by ComparisonPlotCache.warm(), any other period on first request
+COMPARISON_TYPES = ['ETF_vs_Stocks', 'Equity_vs_SP500']
+COMPARISON_PERIODS = ['General', 'YTD']
+
+
+class ComparisonPlotCache:
     """
-    Main analysis function - generates portfolio analysis and returns results
+    Per-run memo of comparison plots, stored as figure JSON and keyed by
+    (comparison_type, sector, period).
+    
+    returns_data does not change between analysis runs, so each combination
+    only ever needs to be built once. warm() builds every combination up front
+    and is safe to run on a background thread.
+    """
+    
+    def __init__(self, returns_data: Dict, render_mode: str = 'auto'):
+        self.returns_data = returns_data
+        self.render_mode = render_mode
+        self._json = {}
+        self._lock = threading.Lock()
+    
+    def key(self, comparison_type: str, sector: str, period: Period) -> Tuple[str, str, Period]:
+        """Normalize a selection to the cache key of the plot it produces"""
+        if isinstance(period, tuple):
+            period = tuple(pd.Timestamp(date) if date is not None else None for date in period)
+        if comparison_type != 'ETF_vs_Stocks':
+            return comparison_type, None, period
+        available_sectors = list(self.returns_data['sector_returns'].keys())
+        if sector not in available_sectors:
+            # generate_comparison_plot falls back to the first available sector
+            sector = available_sectors[0] if available_sectors else None
+        return comparison_type, sector, period
+    
+    def keys(self) -> List[Tuple[str, str, str]]:
+        """Every (comparison_type, sector, period) combination warmed ahead of time"""
+        combos = []
+        for period in COMPARISON_PERIODS:
+            for sector in self.returns_data['sector_returns'].keys():
+                combos.append(('ETF_vs_Stocks', sector, period))
+            combos.append(('Equity_vs_SP500', None, period))
+        return combos
+    
+    def get_json(self, comparison_type: str = 'ETF_vs_Stocks', sector: str = None,
+                 period: Period = 'General') -> str:
+        """Return the plot for a selection as figure JSON, building it on first request"""
+        key = self.key(comparison_type, sector, period)
+        with self._lock:
+            cached = self._json.get(key)
+        if cached is not None:
+            return cached
+        fig = generate_comparison_plot(
+            self.returns_data,
+            sector=key[1],
+            comparison_type=key[0],
+            period=key[2],
+            transaction_dates=self.returns_data.get('transaction_dates', {})
+        )
+        fig_json = figure_to_json(apply_render_mode(fig, self.render_mode))
+        with self._lock:
+            self._json.setdefault(key, fig_json)
+            return self._json[key]
+    
+    def warm(self, should_stop: Callable[[], bool] = None):
+        """Build every combination, stopping early if should_stop() returns True"""
+        for key in self.keys():
+            if should_stop is not None and should_stop():
+                return
+            self.get_json(*key)
+
+
+# Rendering of line charts: 'svg' keeps go.Scatter, 'webgl' switches eligible traces
+# to go.Scattergl, 'auto' does so once they draw WEBGL_AUTO_POINTS points or more
+RENDER_MODES = ['auto', 'svg', 'webgl']
+WEBGL_AUTO_POINTS = 20000
+
+
+def webgl_eligible(trace) -> bool:
+    """Whether WebGL draws the trace the same; stacked and filled areas need SVG"""
+    return trace.type == 'scatter' and trace.stackgroup is None and trace.fill in (None, 'none')
+
+
+def apply_render_mode(figure: 'go.Figure', render_mode: str = 'auto') -> 'go.Figure':
+    """
+    Switch the eligible traces of a figure to Scattergl according to `render_mode`.
+    
+    Scattergl needs a WebGL context in the viewer. The GUI starts
+    QtWebEngine with --disable-gpu, where WebGL depends on a software GL
+    fallback that may draw nothing, so the GUI resolves 'auto' to 'svg'
+    (main_app.chart_render_mode) and only uses WebGL when picked explicitly.
+    Static HTML from smic.py is opened in ordinary browsers and keeps 'auto'.
+    
+    Args:
+        figure: Figure to draw (left unchanged)
+        render_mode: One of RENDER_MODES
     
     Returns:
-        report_text (str): Formatted text report
-        figures (dict): Dictionary of Plotly figure objects
-        summary_df (pd.DataFrame): Statistics summary
-        ytd_df (pd.DataFrame): YTD sector breakdown
+        Copy with the eligible traces as Scattergl, or `figure` itself if no
+        trace is switched
+    """
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {render_mode}")
+    if render_mode == 'svg':
+        return figure
+    eligible = [i for i, trace in enumerate(figure.data) if webgl_eligible(trace)]
+    if not eligible:
+        return figure
+    if render_mode == 'auto':
+        points = sum(len(figure.data[i].x) for i in eligible if figure.data[i].x is not None)
+        if points < WEBGL_AUTO_POINTS:
+            return figure
+    
+    import plotly.graph_objects as go
+    spec = figure.to_dict()
+    for i in eligible:
+        spec['data'][i]['type'] = 'scattergl'
+    # Scatter-only properties (e.g. cliponaxis) are dropped
+    return go.Figure(spec, skip_invalid=True)
+
+
+def figure_to_json(figure: 'go.Figure') -> str:
+    """
+    Serialize a figure to compact Plotly JSON.
+    
+    Validation is skipped: the figures here are assembled from trace objects
+    that were validated when they were created.
+    """
+    import plotly.io as pio
+    return pio.to_json(figure, validate=False, engine=JSON_ENGINE)
+
+
+# Page of a figure exported from its JSON; {plotlyjs} loads plotly.js
+# plotly.js on the Plotly CDN, by plotly.js version
+PLOTLYJS_CDN_URL = 'https://cdn.plot.ly/plotly-{version}.min.js'
+
+FIGURE_PAGE_HTML = """<html>
+<head><meta charset="utf-8" /></head>
+<body>
+{plotlyjs}
+<div id="chart" class="plotly-graph-div" style="width:100%;"></div>
+<script>
+var fig = {fig_json};
+Plotly.newPlot("chart", fig.data, fig.layout, {{"responsive": true}});
+</script>
+</body>
+</html>
+"""
+
+
+def figure_html(fig_json: str, plotlyjs: str = 'directory') -> str:
+    """
+    Standalone HTML page drawing a serialized figure.
+    
+    Building the page from the JSON reuses the serialization the GUI and the
+    result cache already did, instead of encoding the figure again.
+    
+    Args:
+        fig_json: Plotly JSON of the figure
+        plotlyjs: 'directory' (plotly.min.js next to the page), 'cdn' or 'inline'
+    """
+    if plotlyjs == 'directory':
+        script = '<script charset="utf-8" src="plotly.min.js"></script>'
+    elif plotlyjs == 'cdn':
+        # Public API only: the plotly.js version bundled with this plotly, not plotly.__version__
+        from plotly.offline import get_plotlyjs_version
+        url = PLOTLYJS_CDN_URL.format(version=get_plotlyjs_version())
+        script = f'<script charset="utf-8" src="{url}"></script>'
+    elif plotlyjs == 'inline':
+        from plotly.offline import get_plotlyjs
+        script = f'<script charset="utf-8">{get_plotlyjs()}</script>'
+    else:
+        raise ValueError(f"Unknown plotly.js mode: {plotlyjs}")
+    # Keep a literal "</script>" in the data from closing the script element
+    return FIGURE_PAGE_HTML.format(plotlyjs=script, fig_json=fig_json.replace('</', '<\\/'))
+
+
+def figure_from_json(fig_json: str) -> 'go.Figure':
+    """Parse Plotly JSON back into a Figure (unvalidated; the JSON was written by Plotly)"""
+    import plotly.graph_objects as go
+    return go.Figure(json_loads(fig_json), _validate=False)
+
+
+class LazyFigures(Mapping):
+    """
+    Read-only mapping of figure name -> Plotly figure.
+    
+    Each figure is built by its builder on first access and memoized, so
+    callers that only need the numbers never pay for figure construction and
+    the GUI only builds the charts the user actually opens. to_json() memoizes
+    the serialized figure the same way, and resampled()/display_json() the
+    downsampled, possibly WebGL, view drawn on screen.
+    
+    Every figure has its own lock, so different figures can be built and
+    serialized on different threads at once (see serialize()).
     """
     
-    # Handle data path for both development and PyInstaller executable
+    def __init__(self, builders: Dict[str, Callable[[], 'go.Figure']]):
+        self._builders = dict(builders)
+        self._figures = {}
+        self._json = {}
+        self._resamplers = {}
+        self._display_json = {}
+        self._locks = {name: threading.RLock() for name in self._builders}
+    
+    @classmethod
+    def from_json(cls, figure_json: Dict[str, str]) -> 'LazyFigures':
+        """Wrap already serialized figures; Figure objects are only parsed if requested"""
+        figures = cls({name: partial(figure_from_json, fig_json) for name, fig_json in figure_json.items()})
+        figures._json.update(figure_json)
+        return figures
+    
+    def __getstate__(self) -> Dict:
+        # Locks cannot be pickled; results are sent back from batch worker processes
+        state = self.__dict__.copy()
+        del state['_locks']
+        # Resamplers and display JSON hold a second copy of the data; rebuilt on demand
+        state['_resamplers'] = {}
+        state['_display_json'] = {}
+        return state
+    
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._resamplers = state.get('_resamplers', {})
+        self._display_json = state.get('_display_json', {})
+        self._locks = {name: threading.RLock() for name in self._builders}
+
+    def __getitem__(self, name: str) -> 'go.Figure':
+        with self._locks[name]:
+            if name not in self._figures:
+                with span(f'figure:{name}'):
+                    self._figures[name] = self._builders[name]()
+            return self._figures[name]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._builders)
+    
+    def __len__(self) -> int:
+        return len(self._builders)
+    
+    def is_built(self, name: str) -> bool:
+        """Whether the named figure has already been materialized"""
+        return name in self._figures
+    
+    def to_json(self, name: str) -> str:
+        """Return the named figure as Plotly JSON, building it if needed"""
+        with self._locks[name]:
+            if name not in self._json:
+                figure = self[name]
+                with span(f'serialize:{name}'):
+                    self._json[name] = figure_to_json(figure)
+            return self._json[name]
+    
+    def resampled(self, name: str, max_points: int = DEFAULT_MAX_POINTS) -> FigureResampler:
+        """Return the named figure downsampled to `max_points` per trace (LTTB), re-resampled on zoom"""
+        with self._locks[name]:
+            key = (name, max_points)
+            if key not in self._resamplers:
+                figure = self[name]
+                with span(f'downsample:{name}'):
+                    self._resamplers[key] = FigureResampler(figure, max_points)
+            return self._resamplers[key]
+    
+    def display_figure(self, name: str, max_points: int = DEFAULT_MAX_POINTS,
+                       render_mode: str = 'auto') -> 'go.Figure':
+        """
+        Return the named figure as drawn.
+        
+        Args:
+            name: Figure name
+            max_points: Downsample line traces to this many points (0 keeps every point)
+            render_mode: One of RENDER_MODES, see apply_render_mode
+        """
+        figure = self.resampled(name, max_points).figure() if max_points else self[name]
+        return apply_render_mode(figure, render_mode)
+    
+    def display_json(self, name: str, max_points: int = DEFAULT_MAX_POINTS,
+                     render_mode: str = 'auto') -> str:
+        """display_figure() as Plotly JSON (memoized; to_json() when the figure is drawn unchanged)"""
+        with self._locks[name]:
+            key = (name, max_points, render_mode)
+            if key not in self._display_json:
+                figure = self.display_figure(name, max_points, render_mode)
+                if figure is self[name]:
+                    self._display_json[key] = self.to_json(name)
+                else:
+                    with span(f'serialize:{name}'):
+                        self._display_json[key] = figure_to_json(figure)
+            return self._display_json[key]
+    
+    def serialize(self, names: List[str] = None, max_points: int = None, render_mode: str = 'auto',
+                  max_workers: int = None) -> Dict[str, str]:
+        """
+        Build and serialize several figures concurrently on a thread pool.
+        
+        Results are memoized as if to_json()/display_json() had been called,
+        so later requests (GUI tabs, exports, the result cache) get the
+        string without waiting.
+        
+        Args:
+            names: Figures to serialize (default: all)
+            max_points: Serialize display_json(name, max_points, render_mode)
+                instead of the full resolution to_json(name)
+            render_mode: Rendering for display_json
+            max_workers: Threads (default: one per figure, up to the CPU count)
+        
+        Returns:
+            Dictionary of figure name -> JSON
+        """
+        names = list(self) if names is None else list(names)
+        if max_points is None:
+            serialize = self.to_json
+        else:
+            serialize = partial(self.display_json, max_points=max_points, render_mode=render_mode)
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(names), os.cpu_count() or 1)) as executor:
+            return dict(zip(names, executor.map(serialize, names)))
+
+
+def build_sector_allocation_figure(weights: pd.DataFrame) -> 'go.Figure':
+    """Sector Allocation (Stacked Area Chart)"""
+    import plotly.graph_objects as go
+    fig_sector = go.Figure()
+    for col in weights.columns:
+        # Round weights to 2 decimal places
+        rounded_weights = weights[col].round(2)
+        fig_sector.add_trace(go.Scatter(
+            x=weights.index,
+            y=rounded_weights,
+            name=col,
+            stackgroup='one',
+            fillcolor=SECTOR_COLORS.get(col, '#808080'),
+            mode='lines',
+            line=dict(width=0.5, color=SECTOR_COLORS.get(col, '#808080')),
+            hovertemplate='%{y:.2f}%<extra></extra>'
+        ))
+    fig_sector.update_layout(
+        title='Sector Allocation',
+        xaxis_title='Date',
+        yaxis_title='Weight (%)',
+        hovermode='x unified',
+        height=600,
+        showlegend=True,
+        yaxis=dict(tickformat='.2f')
+    )
+    return fig_sector
+
+
+def build_performance_figure(portfolio_value: pd.Series, benchmark_value: pd.Series,
+                             portfolio_cumulative_return: pd.Series,
+                             benchmark_cumulative_return: pd.Series) -> 'go.Figure':
+    """Portfolio Value and Cumulative Returns"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig_performance = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=('Portfolio Value', 'Cumulative Returns'),
+        vertical_spacing=0.1,
+        shared_xaxes=True
+    )
+    
+    # Portfolio Value - round to 2 decimal places
+    portfolio_value_rounded = portfolio_value.round(2)
+    benchmark_value_rounded = benchmark_value.round(2)
+    portfolio_cumulative_return_rounded = portfolio_cumulative_return.round(2)
+    benchmark_cumulative_return_rounded = benchmark_cumulative_return.round(2)
+    
+    fig_performance.add_trace(
+        go.Scatter(x=portfolio_value.index, y=portfolio_value_rounded.values, name='SMIC Portfolio',
+                  line=dict(color='#1f77b4', width=3),
+                  hovertemplate='$%{y:,.2f}<extra></extra>'),
+        row=1, col=1
+    )
+    fig_performance.add_trace(
+        go.Scatter(x=benchmark_value.index, y=benchmark_value_rounded.values, name='S&P 500',
+                  line=dict(color='#d62728', width=3, dash='dash'),
+                  hovertemplate='$%{y:,.2f}<extra></extra>'),
+        row=1, col=1
+    )
+    
+    # Cumulative Returns
+    fig_performance.add_trace(
+        go.Scatter(x=portfolio_cumulative_return.index, y=portfolio_cumulative_return_rounded.values,
+                  name='SMIC Portfolio', line=dict(color='#1f77b4', width=3),
+                  hovertemplate='%{y:.2f}%<extra></extra>'),
+        row=2, col=1
+    )
+    fig_performance.add_trace(
+        go.Scatter(x=benchmark_cumulative_return.index, y=benchmark_cumulative_return_rounded.values,
+                  name='S&P 500', line=dict(color='#d62728', width=3, dash='dash'),
+                  hovertemplate='%{y:.2f}%<extra></extra>'),
+        row=2, col=1
+    )
+    
+    fig_performance.update_xaxes(title_text="Date", row=2, col=1)
+    fig_performance.update_yaxes(title_text="USD", row=1, col=1, tickformat='$,.2f')
+    fig_performance.update_yaxes(title_text="Return (%)", row=2, col=1, tickformat='.2f')
+    fig_performance.update_layout(height=800, showlegend=True, hovermode='x unified')
+    return fig_performance
+
+
+def build_etf_vs_stocks_figure(sector_etf_stocks: pd.DataFrame) -> 'go.Figure':
+    """ETF vs Stocks (Stacked Area Subplots)"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig_etf_vs_stocks = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=('ETF Weights by Sector', 'Individual Stocks Weights by Sector'),
+        vertical_spacing=0.1,
+        shared_xaxes=True
+    )
+    
+    # Top panel: ETF weights
+    etf_cols = [col for col in sector_etf_stocks.columns if col.endswith('_ETF')]
+    etf_df = sector_etf_stocks[etf_cols].copy()
+    etf_df.columns = [col.replace('_ETF', '') for col in etf_df.columns]
+    for col in etf_df.columns:
+        rounded_etf = etf_df[col].round(2)
+        fig_etf_vs_stocks.add_trace(go.Scatter(
+            x=etf_df.index, y=rounded_etf, name=col,
+            stackgroup='one', fillcolor=SECTOR_COLORS.get(col, '#808080'),
+            mode='lines', line=dict(width=0.5, color=SECTOR_COLORS.get(col, '#808080')),
+            hovertemplate='%{y:.2f}%<extra></extra>'
+        ), row=1, col=1)
+    
+    # Bottom panel: Individual Stocks weights
+    stocks_cols = [col for col in sector_etf_stocks.columns if col.endswith('_Stocks')]
+    stocks_df = sector_etf_stocks[stocks_cols].copy()
+    stocks_df.columns = [col.replace('_Stocks', '') for col in stocks_df.columns]
+    for col in stocks_df.columns:
+        rounded_stocks = stocks_df[col].round(2)
+        fig_etf_vs_stocks.add_trace(go.Scatter(
+            x=stocks_df.index, y=rounded_stocks, name=col,
+            stackgroup='two', fillcolor=SECTOR_COLORS.get(col, '#808080'),
+            mode='lines', line=dict(width=0.5, color=SECTOR_COLORS.get(col, '#808080')),
+            hovertemplate='%{y:.2f}%<extra></extra>'
+        ), row=2, col=1)
+    
+    fig_etf_vs_stocks.update_xaxes(title_text="Date", row=2, col=1)
+    fig_etf_vs_stocks.update_yaxes(title_text="Weight (%)", row=1, col=1, tickformat='.2f')
+    fig_etf_vs_stocks.update_yaxes(title_text="Weight (%)", row=2, col=1, tickformat='.2f')
+    fig_etf_vs_stocks.update_layout(height=800, showlegend=True, hovermode='x unified')
+    return fig_etf_vs_stocks
+
+
+def build_bar_comparison_figure(ytd_df: pd.DataFrame) -> 'go.Figure':
+    """ETF vs Stocks (Grouped Bar Chart)"""
+    import plotly.graph_objects as go
+    sectors = ytd_df['Sector'].tolist()
+    etf_ends = [round(x, 2) for x in ytd_df['ETF_Weight_End (%)'].tolist()]
+    stocks_ends = [round(x, 2) for x in ytd_df['Stocks_Weight_End (%)'].tolist()]
+    
+    fig_bar_comparison = go.Figure(data=[
+        go.Bar(name='ETF', x=sectors, y=etf_ends, marker_color='#2E86AB',
+               hovertemplate='%{y:.2f}%<extra></extra>'),
+        go.Bar(name='Individual Stocks', x=sectors, y=stocks_ends, marker_color='#F18F01',
+               hovertemplate='%{y:.2f}%<extra></extra>')
+    ])
+    fig_bar_comparison.update_layout(
+        title='Sector Allocation: ETF vs Individual Stocks (End of Period)',
+        xaxis_title='Sector',
+        yaxis_title='Weight (%)',
+        barmode='group',
+        height=600,
+        yaxis=dict(tickformat='.2f')
+    )
+    return fig_bar_comparison
+
+
+def build_weight_drift_figure(weights: pd.DataFrame) -> 'go.Figure':
+    """Weight Drift Over Time (Line Chart)"""
+    import plotly.graph_objects as go
+    weight_drift = weights - weights.iloc[0]
+    
+    fig_weight_drift = go.Figure()
+    for col in weight_drift.columns:
+        max_drift = abs(weight_drift[col]).max()
+        if max_drift > 0.5: # Only plot meaningful drift
+            rounded_drift = weight_drift[col].round(2)
+            fig_weight_drift.add_trace(go.Scatter(
+                x=weight_drift.index,
+                y=rounded_drift,
+                name=col,
+                mode='lines',
+                line=dict(width=2.5, color=SECTOR_COLORS.get(col, '#808080')),
+                hovertemplate='%{y:.2f}%<extra></extra>'
+            ))
+            
+    fig_weight_drift.update_layout(
+        title='Sector Weight Drift (Change from Initial Allocation)',
+        xaxis_title='Date',
+        yaxis_title='Weight Change (%)',
+        hovermode='x unified',
+        height=600,
+        yaxis=dict(tickformat='.2f')
+    )
+    return fig_weight_drift
+
+
+# Subplot rows of the rolling analytics figures: (metric key, panel title, y-axis title)
+ROLLING_PANELS = [
+    ('volatility', 'Volatility (annualized)', 'Volatility (%)'),
+    ('beta', 'Beta', 'Beta'),
+    ('correlation', 'Correlation', 'Correlation'),
+    ('excess_return', 'Excess Return over the Window', 'Excess Return (%)')
+]
+
+
+def build_rolling_portfolio_figure(rolling: Dict[int, Dict[str, pd.DataFrame]]) -> 'go.Figure':
+    """Rolling Portfolio vs S&P 500 (one line per window)"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig_rolling = make_subplots(
+        rows=len(ROLLING_PANELS), cols=1,
+        subplot_titles=[title for _, title, _ in ROLLING_PANELS],
+        vertical_spacing=0.06,
+        shared_xaxes=True
+    )
+    window_colors = ['#9ecae1', '#3182bd', '#08306b']
+    for i, window in enumerate(sorted(rolling)):
+        for row, (metric, _, _) in enumerate(ROLLING_PANELS, start=1):
+            series = rolling[window][metric]['Portfolio']
+            fig_rolling.add_trace(go.Scatter(
+                x=series.index, y=series.round(2).values, name=f'{window}-day',
+                legendgroup=str(window), showlegend=(row == 1),
+                mode='lines', line=dict(width=2, color=window_colors[i % len(window_colors)]),
+                hovertemplate='%{y:.2f}<extra></extra>'
+            ), row=row, col=1)
+    
+    for row, (_, _, axis_title) in enumerate(ROLLING_PANELS, start=1):
+        fig_rolling.update_yaxes(title_text=axis_title, row=row, col=1, tickformat='.2f')
+    fig_rolling.update_xaxes(title_text="Date", row=len(ROLLING_PANELS), col=1)
+    fig_rolling.update_layout(title='Rolling Portfolio Analytics vs S&P 500',
+                              height=1000, showlegend=True, hovermode='x unified')
+    return fig_rolling
+
+
+def build_rolling_sector_figure(rolling: Dict[int, Dict[str, pd.DataFrame]], window: int = 63) -> 'go.Figure':
+    """Rolling Sector Aggregates vs their ETF benchmarks (one line per sector)"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig_rolling = make_subplots(
+        rows=len(ROLLING_PANELS), cols=1,
+        subplot_titles=[title for _, title, _ in ROLLING_PANELS],
+        vertical_spacing=0.06,
+        shared_xaxes=True
+    )
+    sectors = [col for col in rolling[window]['volatility'].columns if col in SECTOR_NAMES]
+    for row, (metric, _, _) in enumerate(ROLLING_PANELS, start=1):
+        frame = rolling[window][metric]
+        for sector in sectors:
+            series = frame[sector]
+            if series.isna().all():
+                continue
+            fig_rolling.add_trace(go.Scatter(
+                x=series.index, y=series.round(2).values, name=sector,
+                legendgroup=sector, showlegend=(row == 1),
+                mode='lines', line=dict(width=1.5, color=SECTOR_COLORS.get(sector, '#808080')),
+                hovertemplate='%{y:.2f}<extra></extra>'
+            ), row=row, col=1)
+    
+    for row, (_, _, axis_title) in enumerate(ROLLING_PANELS, start=1):
+        fig_rolling.update_yaxes(title_text=axis_title, row=row, col=1, tickformat='.2f')
+    fig_rolling.update_xaxes(title_text="Date", row=len(ROLLING_PANELS), col=1)
+    fig_rolling.update_layout(title=f'Rolling {window}-Day Sector Analytics vs Sector ETF',
+                              height=1000, showlegend=True, hovermode='x unified')
+    return fig_rolling
+
+
+def build_monte_carlo_figure(projection: Dict) -> 'go.Figure':
+    """Monte Carlo fan chart: percentile bands of projected portfolio value after its history"""
+    import plotly.graph_objects as go
+    percentiles = projection['percentiles']
+    benchmark = projection['benchmark_percentiles']
+    history = projection.get('history')
+    dates = percentiles.index
+    fig_mc = go.Figure()
+    
+    if history is not None:
+        fig_mc.add_trace(go.Scatter(
+            x=history.index, y=history.round(2).values, name='Portfolio (History)',
+            mode='lines', line=dict(width=2, color='#1f77b4'),
+            hovertemplate='$%{y:,.2f}<extra></extra>'
+        ))
+    
+    # Bands from the outer percentiles inwards, each filled to its lower edge
+    bands = [('P5', 'P95', '5th-95th Percentile', 'rgba(31, 119, 180, 0.15)'),
+             ('P25', 'P75', '25th-75th Percentile', 'rgba(31, 119, 180, 0.35)')]
+    for lower, upper, label, color in bands:
+        fig_mc.add_trace(go.Scatter(
+            x=dates, y=percentiles[lower].round(2).values, mode='lines',
+            line=dict(width=0), legendgroup=label, showlegend=False, hoverinfo='skip'
+        ))
+        fig_mc.add_trace(go.Scatter(
+            x=dates, y=percentiles[upper].round(2).values, name=label, mode='lines',
+            line=dict(width=0), fill='tonexty', fillcolor=color, legendgroup=label,
+            hoverinfo='skip'
+        ))
+    
+    fig_mc.add_trace(go.Scatter(
+        x=dates, y=percentiles['P50'].round(2).values, name='Portfolio (Median)',
+        mode='lines', line=dict(width=3, color='#1f77b4'),
+        hovertemplate='$%{y:,.2f}<extra></extra>'
+    ))
+    fig_mc.add_trace(go.Scatter(
+        x=dates, y=benchmark['P50'].round(2).values, name='S&P 500 (Median)',
+        mode='lines', line=dict(width=2, color='#d62728', dash='dash'),
+        hovertemplate='$%{y:,.2f}<extra></extra>'
+    ))
+    
+    fig_mc.update_layout(
+        title=(f"Monte Carlo Projection ({projection['n_paths']:,} paths, {projection['horizon']} days) - "
+               f"P(beat S&P 500) = {projection['prob_beat_benchmark'] * 100:.1f}%"),
+        xaxis_title="Date",
+        yaxis_title="Portfolio Value ($)",
+        height=600,
+        showlegend=True,
+        hovermode='x unified',
+        yaxis=dict(tickformat='$,.0f')
+    )
+    return fig_mc
+
+
+def resolve_sector_key(sector: str) -> str:
+    """
+    Map a transaction sector label to its key in V.
+    
+    Returns:
+        Sector key, or None if the label does not match any Vanguard sector
+    """
+    sector_key = sector_map.get(sector)
+    if not sector_key:
+        sec_clean = sector.replace('_', ' ')
+        if sec_clean in V:
+            sector_key = sec_clean
+        else:
+            first = sector.split('_')[0]
+            for v_key in V.keys():
+                if v_key.startswith(first):
+                    sector_key = v_key
+                    break
+    return sector_key
+
+
+def build_units(df: pd.DataFrame, px: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Turn the transaction ledger into daily unit holdings.
+    
+    Every transaction becomes signed unit deltas on its trade date: the purchase
+    itself, plus the implied ETF sell leg when a stock is swapped in from its
+    sector ETF. The deltas are scattered into a dates x tickers matrix and the
+    holdings come out of a single cumulative sum.
+    
+    Args:
+        df: Transactions (sector, ticker, invest_date, amount_invested, optional shares)
+        px: Daily price frame the holdings are aligned to
+    
+    Returns:
+        units (pd.DataFrame): Units held per ticker (dates x tickers)
+        transaction_dates (dict): Stock entries as {sector: {date: [ticker1, ticker2, ...]}}
+    """
+    trades = df.sort_values('invest_date', kind='stable')
+    
+    # Skip cash (handled separately), empty amounts and unpriced tickers
+    is_cash = (trades['sector'] == 'Cash') | (trades['ticker'] == 'CASH')
+    trades = trades[~is_cash & (trades['amount_invested'] > 0) & trades['ticker'].isin(px.columns)]
+    
+    columns = pd.Index(px.columns)
+    prices = px.to_numpy(dtype=float)
+    date_pos = px.index.get_indexer(pd.DatetimeIndex(trades['invest_date']), method='nearest')
+    ticker_pos = columns.get_indexer(trades['ticker'])
+    usd = trades['amount_invested'].to_numpy(dtype=float)
+    if 'shares' in trades.columns:
+        shares = pd.to_numeric(trades['shares'], errors='coerce').to_numpy(dtype=float)
+    else:
+        shares = np.zeros(len(trades))
+    has_shares = shares > 0
+    
+    # Initial ETFs or Fixed Income are bought directly; anything else is a swap out of the sector ETF
+    is_direct = (trades['ticker'].isin(V.values()) | (trades['sector'] == 'Fixed_Income')).to_numpy()
+    sector_keys = trades['sector'].map({s: resolve_sector_key(s) for s in trades['sector'].unique()})
+    etf_pos = columns.get_indexer(sector_keys.map(V))
+    is_swap = ~is_direct & (etf_pos >= 0)
+    
+    own_price = prices[date_pos, ticker_pos]
+    etf_price = np.where(etf_pos >= 0, prices[date_pos, np.maximum(etf_pos, 0)], np.nan)
+    own_price_ok = np.isfinite(own_price) & (own_price > 0)
+    etf_price_ok = np.isfinite(etf_price) & (etf_price > 0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        buy_units = np.where(has_shares, shares, usd / own_price)
+        sell_units = usd / etf_price
+    buy = (is_direct | is_swap) & (has_shares | own_price_ok)
+    sell = buy & is_swap & etf_price_ok
+    
+    deltas = np.zeros(prices.shape)
+    np.add.at(deltas,
+              (np.concatenate([date_pos[buy], date_pos[sell]]),
+               np.concatenate([ticker_pos[buy], etf_pos[sell]])),
+              np.concatenate([buy_units[buy], -sell_units[sell]]))
+    units = pd.DataFrame(np.cumsum(deltas, axis=0), index=px.index, columns=px.columns)
+    
+    # Track transaction dates with ticker info by sector (for stock entries only, not ETFs)
+    transaction_dates = {}
+    swaps = trades[is_swap]
+    swap_dates = pd.DatetimeIndex(swaps['invest_date']).normalize()
+    for (sector_key, invest_date), tickers in swaps['ticker'].groupby(
+            [sector_keys[is_swap].to_numpy(), swap_dates], sort=False):
+        transaction_dates.setdefault(sector_key, {})[invest_date] = tickers.tolist()
+    
+    return units, transaction_dates
+
+
+def build_sector_membership(df: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+    """
+    Build the ticker -> sleeve membership matrix used to aggregate position values.
+    
+    Sleeves are '<Sector>_ETF' and '<Sector>_Stocks' for every sector in
+    SECTOR_NAMES, followed by 'Fixed Income'. Each sector ETF belongs to its ETF
+    sleeve; every other ticker listed under a sector belongs to that sector's
+    stock sleeve. A ticker is counted once per sleeve however many times it
+    was bought.
+    
+    Args:
+        df: Transactions (sector, ticker, ...)
+        tickers: Tickers in position-value column order
+    
+    Returns:
+        DataFrame of 0/1 weights (tickers x sleeves)
+    """
+    tickers = pd.Index(tickers)
+    sleeves = [f'{name}_{leg}' for name in SECTOR_NAMES for leg in ('ETF', 'Stocks')] + ['Fixed Income']
+    sleeve_index = pd.Index(sleeves)
+    
+    pairs = df[['sector', 'ticker']].drop_duplicates()
+    pairs = pairs[pairs['ticker'].isin(tickers)]
+    sector_etf = pairs['sector'].map(lambda s: V.get(sector_map.get(s)))
+    sleeve = np.where(pairs['sector'] == 'Fixed_Income', 'Fixed Income',
+                      pairs['sector'] + np.where(pairs['ticker'] == sector_etf, '_ETF', '_Stocks'))
+    
+    # Each sector ETF always sits in its ETF sleeve, whether or not it appears in the ledger
+    etf_rows = [(V[sector_map[name]], f'{name}_ETF') for name in SECTOR_NAMES]
+    row_tickers = np.concatenate([pairs['ticker'].to_numpy(dtype=object), [t for t, _ in etf_rows]])
+    row_sleeves = np.concatenate([sleeve.astype(object), [c for _, c in etf_rows]])
+    
+    rows = tickers.get_indexer(row_tickers)
+    cols = sleeve_index.get_indexer(row_sleeves)
+    valid = (rows >= 0) & (cols >= 0)
+    matrix = np.zeros((len(tickers), len(sleeves)))
+    matrix[rows[valid], cols[valid]] = 1.0
+    return pd.DataFrame(matrix, index=tickers, columns=sleeve_index)
+
+
+def aggregate_sleeves(position_value: pd.DataFrame, membership: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate per-ticker position values into sleeve values.
+    
+    Args:
+        position_value: Dollar value per ticker (dates x tickers), NaN-free
+        membership: Matrix from build_sector_membership
+    
+    Returns:
+        Dollar value per sleeve (dates x sleeves)
+    """
+    membership = membership.reindex(index=position_value.columns, fill_value=0.0)
+    return pd.DataFrame(position_value.to_numpy() @ membership.to_numpy(),
+                        index=position_value.index, columns=membership.columns)
+
+
+def default_price_provider(transactions_file: str, offline: bool = False, cache_path: str = None) -> PriceProvider:
+    """
+    Build the standard price source: Yahoo Finance behind the local price cache.
+    
+    Args:
+        transactions_file: Path to the transactions CSV (the cache lives next to it)
+        offline: Serve prices from the cache only, without downloading
+        cache_path: Path to the SQLite price cache (defaults to price_cache.db
+            next to the transactions file)
+    """
+    if cache_path is None:
+        cache_path = os.path.join(os.path.dirname(os.path.abspath(transactions_file)), 'price_cache.db')
+    return CachedPriceProvider(YFinanceProvider(), cache_path, offline=offline)
+
+
+def resolve_transactions_path(transactions_file: str) -> str:
+    """Locate the transactions file for both development and PyInstaller executable runs"""
     import sys
     if getattr(sys, 'frozen', False):
         # Running as compiled executable
@@ -287,127 +1073,214 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
             # Try absolute path
             base_path = os.path.dirname(os.path.abspath(__file__))
             transactions_file = os.path.join(base_path, transactions_file)
-    
-    # Load data
+    return transactions_file
+
+
+def load_transactions(transactions_file: str) -> pd.DataFrame:
+    """Load and validate the transactions journal"""
     try:
-        df = pd.read_csv(transactions_file, parse_dates=['invest_date'])
+        df = TransactionStore(transactions_file).read()
         if df.empty:
             raise ValueError("Transaction data file is empty")
-        required_columns = ['sector', 'ticker', 'invest_date', 'amount_invested']
-        missing_cols = [col for col in required_columns if col not in df.columns]
+        missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
         if missing_cols:
             raise ValueError(f"Missing required columns: {missing_cols}")
     except FileNotFoundError:
         raise FileNotFoundError(f"Transaction data file not found: {transactions_file}")
     except Exception as e:
         raise RuntimeError(f"Error loading transaction data: {str(e)}")
-    
-    # Determine start date
-    start_date = df['invest_date'].min()
-    
-    # Use present day as end date
-    end_date = pd.Timestamp.now().normalize()
-    
-    # Download prices
-    all_tickers = list(set(df['ticker'].tolist()) | set(V.values()) | {'^GSPC'})
+    return df
+
+
+def align_prices(raw: pd.DataFrame, index: pd.DatetimeIndex) -> pd.DataFrame:
+    """Forward-fill raw trading-day prices onto an existing business-day index"""
+    return raw.reindex(raw.index.union(index)).sort_index().ffill().reindex(index)
+
+
+def panel_tickers(df: pd.DataFrame) -> List[str]:
+    """Every traded ticker plus the sector ETFs and ^GSPC, sorted"""
+    return sorted(set(df['ticker'].tolist()) | set(V.values()) | {'^GSPC'})
+
+
+def trim_price_panel(px: pd.DataFrame, start_date: pd.Timestamp) -> pd.DataFrame:
+    """Drop the rows before the trading day nearest `start_date`"""
+    start_idx = px.index.get_indexer([pd.Timestamp(start_date)], method='nearest')[0]
+    actual_start = px.index[start_idx]
+    return px.loc[actual_start:]
+
+
+def download_price_panel(tickers: List[str], start_date: pd.Timestamp, price_provider: PriceProvider,
+                         end_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    Load forward-filled business-day prices for `tickers`, starting a few days
+    before `start_date` so the first trading day has a price.
+    """
     try:
-        px = yf.download(all_tickers, start=start_date - pd.Timedelta(days=10), end=end_date,
-                         progress=False, auto_adjust=False)['Adj Close'].asfreq('B').ffill()
+        with span('price_fetch'):
+            raw = price_provider.get_prices(tickers, start_date - pd.Timedelta(days=10), end_date)
+        with span('reindex_ffill'):
+            px = raw.asfreq('B').ffill()
         if px.empty:
             raise ValueError("No price data downloaded")
     except Exception as e:
         raise RuntimeError(f"Error downloading price data: {str(e)}")
+    return px
+
+
+def load_price_panel(df: pd.DataFrame, price_provider: PriceProvider, end_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    Load the business-day price panel for every traded ticker, the sector ETFs and ^GSPC.
+    
+    Returns:
+        Forward-filled Adj Close prices starting at the trading day nearest the first transaction
+    """
+    # Determine start date
+    start_date = df['invest_date'].min()
+    
+    px = download_price_panel(panel_tickers(df), start_date, price_provider, end_date)
     
     # Find the nearest trading day
-    start_idx = px.index.get_indexer([pd.Timestamp(start_date)], method='nearest')[0]
-    actual_start = px.index[start_idx]
-    px = px.loc[actual_start:]
+    return trim_price_panel(px, start_date)
+
+
+class PortfolioState:
+    """
+    Positions and valuations of one analysis run.
     
-    # Initialize units
-    units = pd.DataFrame(0.0, index=px.index, columns=px.columns)
+    This is everything the report, statistics and figures are derived from,
+    and what update_portfolio_state() patches when transactions are appended.
+    """
     
-    # Track transaction dates with ticker info by sector (for stock entries only, not ETFs)
-    # Structure: {sector: {date: [ticker1, ticker2, ...]}}
-    transaction_dates_by_sector = {}
-    
-    # Process each position
-    df_sorted = df.sort_values('invest_date')
-    for _, row in df_sorted.iterrows():
-        try:
-            dt_idx = px.index.get_indexer([pd.Timestamp(row['invest_date'])], method='nearest')[0]
-            dt = px.index[dt_idx]
-        except:
-            dt = px.index[px.index.get_loc(pd.Timestamp(row['invest_date']), method='nearest')]
-        
-        ticker = row['ticker']
-        sector = row['sector']
-        usd = row['amount_invested']
-        shares = row.get('shares', 0)
+    def __init__(self, df: pd.DataFrame, px: pd.DataFrame, end_date: pd.Timestamp,
+                 units: pd.DataFrame, transaction_dates: Dict, membership: pd.DataFrame,
+                 position_value: pd.DataFrame, sleeve_values: pd.DataFrame, invested_value: pd.Series):
+        self.df = df
+        self.px = px
+        self.end_date = end_date
+        self.units = units
+        self.transaction_dates = transaction_dates
+        self.membership = membership
+        self.position_value = position_value
+        self.sleeve_values = sleeve_values
+        self.invested_value = invested_value
+
+
+def compute_portfolio_state(df: pd.DataFrame, px: pd.DataFrame, end_date: pd.Timestamp,
+                            progress: Callable[[str], None] = None) -> PortfolioState:
+    """Build positions and sleeve valuations from transactions and the price panel"""
+    if progress is None:
+        progress = lambda stage: None
+    
+    # Build daily unit holdings from the transaction ledger
+    progress("Building positions")
+    with span('build_units'):
+        units, transaction_dates = build_units(df, px)
+    
+    # Value every sector sleeve (ETF leg, stock leg, fixed income) in one matrix multiply
+    progress("Aggregating sectors")
+    with span('aggregate_sectors'):
+        membership = build_sector_membership(df, px.columns)
+        position_value = (units * px).fillna(0)
+        sleeve_values = aggregate_sleeves(position_value, membership)
+        invested_value = position_value.sum(axis=1)
+    
+    return PortfolioState(df, px, end_date, units, transaction_dates, membership,
+                          position_value, sleeve_values, invested_value)
+
+
+def update_portfolio_state(state: PortfolioState, df: pd.DataFrame,
+                           price_provider: PriceProvider) -> PortfolioState:
+    """
+    Apply transactions appended since `state` was computed, in place.
+    
+    Only the tickers touched by the new trades (plus tickers whose sector
+    membership changed) are revalued, and only from the earliest affected
+    date forward. Sleeve values and invested value are patched by the
+    difference, so a trade at the end of a long history costs a few rows.
+    
+    Args:
+        state: State of the previous run (modified in place)
+        df: Full transactions journal, whose first rows must match state.df
+        price_provider: Used to load prices for tickers traded for the first time
+    
+    Returns:
+        The updated state, or None if the change cannot be applied
+        incrementally (history edited or removed, or a trade before the
+        first priced date) and a full run is needed
+    """
+    old_df = state.df
+    if len(df) < len(old_df) or not df.iloc[:len(old_df)].reset_index(drop=True).equals(old_df.reset_index(drop=True)):
+        return None
+    new_rows = df.iloc[len(old_df):]
+    state.df = df
+    if new_rows.empty:
+        return state
+    if new_rows['invest_date'].min() < old_df['invest_date'].min():
+        return None
+    
+    # Price tickers traded for the first time and widen the holdings frames
+    px = state.px
+    new_tickers = sorted(set(new_rows['ticker']) - set(px.columns))
+    if new_tickers:
+        raw = price_provider.get_prices(new_tickers, old_df['invest_date'].min() - pd.Timedelta(days=10),
+                                        state.end_date)
+        px = pd.concat([px, align_prices(raw, px.index)], axis=1)
+        state.px = px
+        state.units = state.units.reindex(columns=px.columns, fill_value=0.0)
+        state.position_value = state.position_value.reindex(columns=px.columns, fill_value=0.0)
+    
+    delta_units, new_dates = build_units(new_rows, px)
+    membership = build_sector_membership(df, px.columns)
+    old_membership = state.membership.reindex(index=px.columns, columns=membership.columns, fill_value=0.0)
+    
+    traded = (delta_units != 0).any(axis=0)
+    regrouped = (membership != old_membership).any(axis=1)
+    cols = px.columns[(traded | regrouped).to_numpy()]
+    
+    if len(cols) > 0:
+        # A ticker that moved sleeves is revalued over its whole history
+        traded_rows = np.flatnonzero((delta_units[cols] != 0).any(axis=1).to_numpy())
+        start = 0 if regrouped.any() or len(traded_rows) == 0 else traded_rows[0]
         
-        # Skip cash - handled separately
-        if sector == 'Cash' or ticker == 'CASH':
-            continue
-            
-        if pd.isna(usd) or usd <= 0:
-            continue
+        col_pos = px.columns.get_indexer(cols)
+        units = state.units.iloc[start:, col_pos] + delta_units.iloc[start:, col_pos]
+        old_value = state.position_value.iloc[start:, col_pos]
+        new_value = (units * px.iloc[start:, col_pos]).fillna(0)
         
-        if ticker not in px.columns:
-            continue
+        sleeve_delta = (new_value.to_numpy() @ membership.loc[cols].to_numpy()
+                        - old_value.to_numpy() @ old_membership.loc[cols].to_numpy())
+        state.units.iloc[start:, col_pos] = units.to_numpy()
+        state.position_value.iloc[start:, col_pos] = new_value.to_numpy()
+        state.sleeve_values.iloc[start:] += sleeve_delta
+        state.invested_value.iloc[start:] += (new_value - old_value).sum(axis=1).to_numpy()
+    state.membership = membership
+    
+    for sector_key, date_tickers in new_dates.items():
+        for invest_date, tickers in date_tickers.items():
+            state.transaction_dates.setdefault(sector_key, {}).setdefault(invest_date, []).extend(tickers)
+    
+    return state
 
-        # Initial ETFs or Fixed Income
-        if ticker in V.values() or sector == 'Fixed_Income':
-            if shares > 0:
-                units.loc[dt:, ticker] += shares
-            else:
-                units.loc[dt:, ticker] += usd / px.loc[dt, ticker]
 
-        # Stock purchase = swap from ETF
-        else:
-            sector_key = sector_map.get(sector)
-            if not sector_key:
-                sec_clean = sector.replace('_', ' ')
-                if sec_clean in V:
-                    sector_key = sec_clean
-                else:
-                    first = sector.split('_')[0]
-                    for v_key in V.keys():
-                        if v_key.startswith(first):
-                            sector_key = v_key
-                            break
-            
-            if sector_key and sector_key in V:
-                etf = V[sector_key]
-                if etf in px.columns:
-                    etf_price = px.loc[dt, etf]
-                    
-                    # Track transaction date and ticker for this stock entry
-                    invest_date = pd.Timestamp(row['invest_date']).normalize()
-                    if sector_key not in transaction_dates_by_sector:
-                        transaction_dates_by_sector[sector_key] = {}
-                    if invest_date not in transaction_dates_by_sector[sector_key]:
-                        transaction_dates_by_sector[sector_key][invest_date] = []
-                    transaction_dates_by_sector[sector_key][invest_date].append(ticker)
-                    
-                    # Buy stock
-                    if shares > 0:
-                        units.loc[dt:, ticker] += shares
-                    else:
-                        stock_price = px.loc[dt, ticker]
-                        if not (pd.isna(stock_price) or stock_price <= 0):
-                            units.loc[dt:, ticker] += usd / stock_price
-                        else:
-                            continue
-                    
-                    # Sell ETF
-                    if not (pd.isna(etf_price) or etf_price <= 0):
-                        units.loc[dt:, etf] -= usd / etf_price
-
-    units = units.ffill().fillna(0)
+def build_analysis_results(state: PortfolioState,
+                           progress: Callable[[str], None] = None) -> Tuple[str, Dict, pd.DataFrame, pd.DataFrame, Dict]:
+    """
+    Derive weights, statistics, report, returns data and figures from a portfolio state.
+    
+    Returns:
+        The same tuple as generate_portfolio_analysis
+    """
+    if progress is None:
+        progress = lambda stage: None
+    
+    df = state.df
+    px = state.px
+    sleeve_values = state.sleeve_values
+    transaction_dates_by_sector = state.transaction_dates
     
     # Add cash to portfolio value
     cash_val = df[df['sector'] == 'Cash']['amount_invested'].sum()
-    invested_value = (units * px).sum(axis=1)
-    portfolio_value = invested_value + cash_val
+    portfolio_value = state.invested_value + cash_val
     
     if (portfolio_value <= 0).any():
         raise ValueError("Portfolio value is zero or negative, cannot calculate weights")
@@ -422,24 +1295,13 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
     benchmark_cumulative_return = (benchmark_value / initial_value - 1) * 100
     
     # Calculate sector weights
-    weights = pd.DataFrame(index=px.index)
-    
-    for sector_name, v_key in sector_map.items():
-        if v_key in V:
-            etf = V[v_key]
-            tickers = df[df['sector'] == sector_name]['ticker'].tolist()
-            sector_value = units[etf] * px[etf]
-            for t in tickers:
-                if t in units.columns and t in px.columns and t != etf:
-                    sector_value += units[t] * px[t]
-            weights[sector_name] = (sector_value / portfolio_value * 100).fillna(0)
+    etf_values = sleeve_values[[f'{name}_ETF' for name in SECTOR_NAMES]].set_axis(SECTOR_NAMES, axis=1)
+    stocks_values = sleeve_values[[f'{name}_Stocks' for name in SECTOR_NAMES]].set_axis(SECTOR_NAMES, axis=1)
+    sector_values = etf_values + stocks_values
+    weights = (sector_values.div(portfolio_value, axis=0) * 100).fillna(0)
     
     # Fixed Income
-    fi_tickers = df[df['sector'] == 'Fixed_Income']['ticker'].tolist()
-    fi_value = pd.Series(0.0, index=px.index)
-    for t in fi_tickers:
-        if t in units.columns and t in px.columns:
-            fi_value += units[t] * px[t]
+    fi_value = sleeve_values['Fixed Income']
     weights['Fixed Income'] = (fi_value / portfolio_value * 100).fillna(0)
     
     # Cash
@@ -461,6 +1323,7 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
         weights = weights.div(weights.sum(axis=1), axis=0) * 100
     
     # Calculate statistics
+    progress("Computing statistics")
     initial = portfolio_value.iloc[0]
     final = portfolio_value.iloc[-1]
     benchmark_initial = benchmark_value.iloc[0]
@@ -475,10 +1338,6 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
     cagr = ((final / initial) ** (1 / years) - 1) * 100
     benchmark_cagr = ((benchmark_final / benchmark_initial) ** (1 / years) - 1) * 100
     
-    initial_weights = pd.Series(index=weights.columns)
-    for sec in weights.columns:
-        initial_weights[sec] = weights[sec].iloc[0]
-    
     absolute_change = final - initial
     benchmark_absolute_change = benchmark_final - benchmark_initial
     
@@ -488,22 +1347,19 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
     min_date = portfolio_value.idxmin()
     max_drawdown = ((portfolio_value / portfolio_value.expanding().max()) - 1).min() * 100
     
-    # Calculate ETF vs Stocks breakdown
-    sector_etf_stocks = pd.DataFrame(index=px.index)
+    # Equity sleeve: total portfolio excluding fixed income and cash
+    equity_value = portfolio_value - fi_value - cash_val
     
-    for sector_name, v_key in sector_map.items():
-        if v_key in V:
-            etf = V[v_key]
-            etf_value = units[etf] * px[etf] if etf in units.columns and etf in px.columns else pd.Series(0.0, index=px.index)
-            tickers = df[df['sector'] == sector_name]['ticker'].tolist()
-            stocks_value = pd.Series(0.0, index=px.index)
-            for t in tickers:
-                if t in units.columns and t in px.columns and t != etf:
-                    stocks_value += units[t] * px[t]
-            etf_weight = (etf_value / portfolio_value * 100).fillna(0)
-            stocks_weight = (stocks_value / portfolio_value * 100).fillna(0)
-            sector_etf_stocks[f'{sector_name}_ETF'] = etf_weight
-            sector_etf_stocks[f'{sector_name}_Stocks'] = stocks_weight
+    # Risk statistics for the portfolio, the equity sleeve, every sector aggregate
+    # and the benchmark, evaluated together over one returns matrix
+    risk_values = pd.concat([portfolio_value.rename('Portfolio'), equity_value.rename('Equity'),
+                             sector_values, benchmark_value.rename('S&P 500')], axis=1)
+    with span('risk_metrics'):
+        risk_metrics = compute_risk_metrics(risk_values, benchmark_value, risk_free_rate=RISK_FREE_RATE)
+    portfolio_risk = risk_metrics.loc['Portfolio']
+    
+    # Calculate ETF vs Stocks breakdown
+    sector_etf_stocks = (sleeve_values.drop(columns='Fixed Income').div(portfolio_value, axis=0) * 100).fillna(0)
     
     # Create YTD summary
     ytd_summary = []
@@ -570,6 +1426,18 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
     report_lines.append(f"Peak Value:        ${max_value:>15,.2f}  ({max_date.strftime('%Y-%m-%d')})")
     report_lines.append(f"Lowest Value:      ${min_value:>15,.2f}  ({min_date.strftime('%Y-%m-%d')})")
     report_lines.append(f"Max Drawdown:      {max_drawdown:>15.2f}%")
+    report_lines.append("")
+    report_lines.append(f"{'RISK METRICS':^70}")
+    report_lines.append("-"*70)
+    report_lines.append(f"Volatility:        {portfolio_risk['Volatility (%)']:>15.2f}%")
+    report_lines.append(f"Sharpe Ratio:      {portfolio_risk['Sharpe Ratio']:>15.2f}")
+    report_lines.append(f"Sortino Ratio:     {portfolio_risk['Sortino Ratio']:>15.2f}")
+    report_lines.append(f"Beta (S&P 500):    {portfolio_risk['Beta']:>15.2f}")
+    report_lines.append(f"Alpha:             {portfolio_risk['Alpha (%)']:>15.2f}%")
+    report_lines.append(f"Tracking Error:    {portfolio_risk['Tracking Error (%)']:>15.2f}%")
+    report_lines.append(f"Information Ratio: {portfolio_risk['Information Ratio']:>15.2f}")
+    report_lines.append(f"Calmar Ratio:      {portfolio_risk['Calmar Ratio']:>15.2f}")
+    report_lines.append(f"Longest Drawdown:  {portfolio_risk['Max Drawdown Duration (days)']:>15.0f} days")
     
     report_text = "\n".join(report_lines)
     
@@ -579,117 +1447,57 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
             'Initial Portfolio Value', 'Final Portfolio Value', 'Absolute Change', 'Total Return (%)',
             'Initial Benchmark Value', 'Final Benchmark Value', 'Benchmark Absolute Change', 'Benchmark Total Return (%)',
             'Portfolio CAGR (%)', 'Benchmark CAGR (%)', 'Outperformance (%)',
-            'Max Drawdown (%)', 'Peak Value', 'Lowest Value'
+            'Max Drawdown (%)', 'Peak Value', 'Lowest Value',
+            'Volatility (%)', 'Sharpe Ratio', 'Sortino Ratio', 'Beta', 'Alpha (%)',
+            'Tracking Error (%)', 'Information Ratio', 'Calmar Ratio', 'Max Drawdown Duration (days)'
         ],
         'Value': [
             f'${initial:,.2f}', f'${final:,.2f}', f'${absolute_change:,.2f}', f'{total_return:.2f}',
             f'${benchmark_initial:,.2f}', f'${benchmark_final:,.2f}', f'${benchmark_absolute_change:,.2f}', f'{benchmark_total_return:.2f}',
             f'{cagr:.2f}', f'{benchmark_cagr:.2f}', f'{cagr - benchmark_cagr:.2f}',
-            f'{max_drawdown:.2f}', f'${max_value:,.2f}', f'${min_value:,.2f}'
+            f'{max_drawdown:.2f}', f'${max_value:,.2f}', f'${min_value:,.2f}',
+            f"{portfolio_risk['Volatility (%)']:.2f}", f"{portfolio_risk['Sharpe Ratio']:.2f}",
+            f"{portfolio_risk['Sortino Ratio']:.2f}", f"{portfolio_risk['Beta']:.2f}",
+            f"{portfolio_risk['Alpha (%)']:.2f}", f"{portfolio_risk['Tracking Error (%)']:.2f}",
+            f"{portfolio_risk['Information Ratio']:.2f}", f"{portfolio_risk['Calmar Ratio']:.2f}",
+            f"{portfolio_risk['Max Drawdown Duration (days)']:.0f}"
         ]
     }
     summary_df = pd.DataFrame(summary_data)
     
-    # Calculate sector returns: ETF benchmark (standalone) vs Sector aggregate (ETF + stocks)
-    sector_returns = {}
-    for sector_name, v_key in sector_map.items():
-        if v_key in V:
-            etf = V[v_key]
-            if etf in px.columns:
-                # ETF benchmark: standalone ETF price performance (not weighted by portfolio)
-                etf_price_initial = px[etf].iloc[0]
-                if etf_price_initial > 0:
-                    etf_benchmark_returns = (px[etf] / etf_price_initial - 1) * 100
-                else:
-                    etf_benchmark_returns = pd.Series(0.0, index=px.index)
-                
-                # Sector aggregate portfolio: ETF holdings + individual stocks combined
-                etf_value = units[etf] * px[etf] if etf in units.columns else pd.Series(0.0, index=px.index)
-                tickers = df[df['sector'] == sector_name]['ticker'].tolist()
-                stocks_value = pd.Series(0.0, index=px.index)
-                for t in tickers:
-                    if t in units.columns and t in px.columns and t != etf:
-                        stocks_value += units[t] * px[t]
-                
-                # Total sector value (ETF + stocks)
-                sector_aggregate_value = etf_value + stocks_value
-                sector_aggregate_initial = sector_aggregate_value.iloc[0]
-                
-                if sector_aggregate_initial > 0:
-                    sector_aggregate_returns = (sector_aggregate_value / sector_aggregate_initial - 1) * 100
-                else:
-                    sector_aggregate_returns = pd.Series(0.0, index=px.index)
-                
-                sector_returns[sector_name] = {
-                    'ETF_Benchmark': etf_benchmark_returns,  # Standalone ETF
-                    'Sector_Aggregate': sector_aggregate_returns,  # ETF + stocks combined
-                    'ETF_Value': etf_value,
-                    'Stocks_Value': stocks_value,
-                    'Sector_Value': sector_aggregate_value
-                }
-    
-    # Calculate Equity (total portfolio excluding fixed income and cash) vs S&P 500
-    equity_value = portfolio_value - fi_value - cash_val
-    equity_initial = equity_value.iloc[0]
-    if equity_initial > 0:
-        equity_returns = (equity_value / equity_initial - 1) * 100
-    else:
-        equity_returns = pd.Series(0.0, index=px.index)
-    
-    # Calculate YTD returns (from start of current year)
-    current_year = pd.Timestamp.now().year
-    ytd_start = pd.Timestamp(f'{current_year}-01-01')
-    ytd_start_idx = px.index.get_indexer([ytd_start], method='nearest')[0]
-    ytd_start_date = px.index[ytd_start_idx]
-    
-    # YTD sector returns: ETF benchmark vs Sector aggregate
-    sector_ytd_returns = {}
-    for sector_name, returns_data in sector_returns.items():
-        v_key = sector_map.get(sector_name, sector_name)
-        if v_key in V:
-            etf = V[v_key]
-            # ETF benchmark YTD (standalone price)
-            if etf in px.columns:
-                etf_ytd_prices = px[etf].loc[ytd_start_date:]
-                etf_ytd_initial_price = etf_ytd_prices.iloc[0] if len(etf_ytd_prices) > 0 else 0
-                
-                if etf_ytd_initial_price > 0:
-                    etf_ytd_benchmark_returns = (etf_ytd_prices / etf_ytd_initial_price - 1) * 100
-                else:
-                    etf_ytd_benchmark_returns = pd.Series(0.0, index=etf_ytd_prices.index)
-            else:
-                etf_ytd_benchmark_returns = pd.Series(0.0, index=px.index.loc[ytd_start_date:])
-            
-            # Sector aggregate YTD (ETF + stocks combined)
-            sector_ytd_value = returns_data['Sector_Value'].loc[ytd_start_date:]
-            sector_ytd_initial = sector_ytd_value.iloc[0] if len(sector_ytd_value) > 0 else 0
-            
-            if sector_ytd_initial > 0:
-                sector_ytd_aggregate_returns = (sector_ytd_value / sector_ytd_initial - 1) * 100
-            else:
-                sector_ytd_aggregate_returns = pd.Series(0.0, index=sector_ytd_value.index)
-            
-            sector_ytd_returns[sector_name] = {
-                'ETF_Benchmark': etf_ytd_benchmark_returns,
-                'Sector_Aggregate': sector_ytd_aggregate_returns
-            }
-    
-    # YTD Equity vs S&P 500
-    equity_ytd_value = equity_value.loc[ytd_start_date:]
-    benchmark_ytd_value = benchmark_value.loc[ytd_start_date:]
-    
-    equity_ytd_initial = equity_ytd_value.iloc[0] if len(equity_ytd_value) > 0 else 0
-    benchmark_ytd_initial = benchmark_ytd_value.iloc[0] if len(benchmark_ytd_value) > 0 else 0
-    
-    if equity_ytd_initial > 0:
-        equity_ytd_returns = (equity_ytd_value / equity_ytd_initial - 1) * 100
-    else:
-        equity_ytd_returns = pd.Series(0.0, index=equity_ytd_value.index)
+    # Growth indices of every compared series; returns over any window are ratio lookups
+    # ETF benchmark: standalone ETF price performance (not weighted by portfolio)
+    # Sector aggregate: ETF holdings + individual stocks combined
+    return_sectors = [name for name in SECTOR_NAMES if V[sector_map[name]] in px.columns]
+    growth = pd.concat(
+        [portfolio_value.rename('Portfolio'), equity_value.rename('Equity'), benchmark_value.rename('S&P 500')]
+        + [px[V[sector_map[name]]].rename(f'{name}_ETF_Benchmark') for name in return_sectors]
+        + [sector_values[name].rename(f'{name}_Sector_Aggregate') for name in return_sectors],
+        axis=1
+    )
+    with span('period_returns'):
+        period_returns = PeriodReturns(growth)
+        general_returns = period_returns.cumulative('General')
     
-    if benchmark_ytd_initial > 0:
-        benchmark_ytd_returns = (benchmark_ytd_value / benchmark_ytd_initial - 1) * 100
-    else:
-        benchmark_ytd_returns = pd.Series(0.0, index=benchmark_ytd_value.index)
+    sector_returns = {}
+    for sector_name in return_sectors:
+        sector_returns[sector_name] = {
+            'ETF_Benchmark': general_returns[f'{sector_name}_ETF_Benchmark'],  # Standalone ETF
+            'Sector_Aggregate': general_returns[f'{sector_name}_Sector_Aggregate'],  # ETF + stocks combined
+            'ETF_Value': etf_values[sector_name],
+            'Stocks_Value': stocks_values[sector_name],
+            'Sector_Value': sector_values[sector_name]
+        }
+    
+    # Equity (total portfolio excluding fixed income and cash) vs S&P 500
+    equity_returns = general_returns['Equity']
+    
+    # Rolling analytics: portfolio vs S&P 500 and each sector aggregate vs its ETF
+    rolling_values = pd.concat([portfolio_value.rename('Portfolio'), sector_values[return_sectors]], axis=1)
+    rolling_benchmarks = pd.concat([benchmark_value.rename('Portfolio')]
+                                   + [px[V[sector_map[name]]].rename(name) for name in return_sectors], axis=1)
+    with span('rolling'):
+        rolling = compute_rolling_analytics(rolling_values, rolling_benchmarks)
     
     # Clean up transaction dates with ticker info (structure preserved)
     # Structure: {sector: {date: [ticker1, ticker2, ...]}}
@@ -705,183 +1513,168 @@ def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv'
     # Store returns data for GUI (including transaction dates)
     returns_data = {
         'sector_returns': sector_returns,
-        'sector_ytd_returns': sector_ytd_returns,
         'equity_returns': equity_returns,
-        'equity_ytd_returns': equity_ytd_returns,
         'benchmark_returns': benchmark_cumulative_return,
-        'benchmark_ytd_returns': benchmark_ytd_returns,
+        'period_returns': period_returns,
         'equity_value': equity_value,
         'benchmark_value': benchmark_value,
+        'risk_metrics': risk_metrics,
+        'rolling': rolling,
+        'weights': weights,
+        'sector_etf_stocks': sector_etf_stocks,
         'transaction_dates': cleaned_transaction_dates
     }
     
-    # Create Plotly figures
-    figures = {}
-    
-    # 1. Sector Allocation (Stacked Area Chart)
-    fig_sector = go.Figure()
-    for col in weights.columns:
-        # Round weights to 2 decimal places
-        rounded_weights = weights[col].round(2)
-        fig_sector.add_trace(go.Scatter(
-            x=weights.index,
-            y=rounded_weights,
-            name=col,
-            stackgroup='one',
-            fillcolor=SECTOR_COLORS.get(col, '#808080'),
-            mode='lines',
-            line=dict(width=0.5, color=SECTOR_COLORS.get(col, '#808080')),
-            hovertemplate='%{y:.2f}%<extra></extra>'
-        ))
-    fig_sector.update_layout(
-        title='Sector Allocation',
-        xaxis_title='Date',
-        yaxis_title='Weight (%)',
-        hovermode='x unified',
-        height=600,
-        showlegend=True,
-        yaxis=dict(tickformat='.2f')
-    )
-    figures['sector_allocation'] = fig_sector
-    
-    # 2. Portfolio Value and Cumulative Returns
-    fig_performance = make_subplots(
-        rows=2, cols=1,
-        subplot_titles=('Portfolio Value', 'Cumulative Returns'),
-        vertical_spacing=0.1,
-        shared_xaxes=True
-    )
-    
-    # Portfolio Value - round to 2 decimal places
-    portfolio_value_rounded = portfolio_value.round(2)
-    benchmark_value_rounded = benchmark_value.round(2)
-    portfolio_cumulative_return_rounded = portfolio_cumulative_return.round(2)
-    benchmark_cumulative_return_rounded = benchmark_cumulative_return.round(2)
-    
-    fig_performance.add_trace(
-        go.Scatter(x=portfolio_value.index, y=portfolio_value_rounded.values, name='SMIC Portfolio',
-                  line=dict(color='#1f77b4', width=3),
-                  hovertemplate='$%{y:,.2f}<extra></extra>'),
-        row=1, col=1
-    )
-    fig_performance.add_trace(
-        go.Scatter(x=benchmark_value.index, y=benchmark_value_rounded.values, name='S&P 500',
-                  line=dict(color='#d62728', width=3, dash='dash'),
-                  hovertemplate='$%{y:,.2f}<extra></extra>'),
-        row=1, col=1
-    )
-    
-    # Cumulative Returns
-    fig_performance.add_trace(
-        go.Scatter(x=portfolio_cumulative_return.index, y=portfolio_cumulative_return_rounded.values,
-                  name='SMIC Portfolio', line=dict(color='#1f77b4', width=3),
-                  hovertemplate='%{y:.2f}%<extra></extra>'),
-        row=2, col=1
-    )
-    fig_performance.add_trace(
-        go.Scatter(x=benchmark_cumulative_return.index, y=benchmark_cumulative_return_rounded.values,
-                  name='S&P 500', line=dict(color='#d62728', width=3, dash='dash'),
-                  hovertemplate='%{y:.2f}%<extra></extra>'),
-        row=2, col=1
-    )
-    
-    fig_performance.update_xaxes(title_text="Date", row=2, col=1)
-    fig_performance.update_yaxes(title_text="USD", row=1, col=1, tickformat='$,.2f')
-    fig_performance.update_yaxes(title_text="Return (%)", row=2, col=1, tickformat='.2f')
-    fig_performance.update_layout(height=800, showlegend=True, hovermode='x unified')
-    figures['performance'] = fig_performance
-    
-    # 3. ETF vs Stocks (Stacked Area Subplots)
-    fig_etf_vs_stocks = make_subplots(
-        rows=2, cols=1,
-        subplot_titles=('ETF Weights by Sector', 'Individual Stocks Weights by Sector'),
-        vertical_spacing=0.1,
-        shared_xaxes=True
-    )
-    
-    # Top panel: ETF weights
-    etf_cols = [col for col in sector_etf_stocks.columns if col.endswith('_ETF')]
-    etf_df = sector_etf_stocks[etf_cols].copy()
-    etf_df.columns = [col.replace('_ETF', '') for col in etf_df.columns]
-    for col in etf_df.columns:
-        rounded_etf = etf_df[col].round(2)
-        fig_etf_vs_stocks.add_trace(go.Scatter(
-            x=etf_df.index, y=rounded_etf, name=col,
-            stackgroup='one', fillcolor=SECTOR_COLORS.get(col, '#808080'),
-            mode='lines', line=dict(width=0.5, color=SECTOR_COLORS.get(col, '#808080')),
-            hovertemplate='%{y:.2f}%<extra></extra>'
-        ), row=1, col=1)
-    
-    # Bottom panel: Individual Stocks weights
-    stocks_cols = [col for col in sector_etf_stocks.columns if col.endswith('_Stocks')]
-    stocks_df = sector_etf_stocks[stocks_cols].copy()
-    stocks_df.columns = [col.replace('_Stocks', '') for col in stocks_df.columns]
-    for col in stocks_df.columns:
-        rounded_stocks = stocks_df[col].round(2)
-        fig_etf_vs_stocks.add_trace(go.Scatter(
-            x=stocks_df.index, y=rounded_stocks, name=col,
-            stackgroup='two', fillcolor=SECTOR_COLORS.get(col, '#808080'),
-            mode='lines', line=dict(width=0.5, color=SECTOR_COLORS.get(col, '#808080')),
-            hovertemplate='%{y:.2f}%<extra></extra>'
-        ), row=2, col=1)
+    # Plotly figures are built on first access
+    figures = LazyFigures({
+        'sector_allocation': partial(build_sector_allocation_figure, weights),
+        'performance': partial(build_performance_figure, portfolio_value, benchmark_value,
+                               portfolio_cumulative_return, benchmark_cumulative_return),
+        'etf_vs_stocks': partial(build_etf_vs_stocks_figure, sector_etf_stocks),
+        'bar_comparison': partial(build_bar_comparison_figure, ytd_df),
+        'weight_drift': partial(build_weight_drift_figure, weights),
+        'rolling_portfolio': partial(build_rolling_portfolio_figure, rolling),
+        'rolling_sectors': partial(build_rolling_sector_figure, rolling)
+    })
     
-    fig_etf_vs_stocks.update_xaxes(title_text="Date", row=2, col=1)
-    fig_etf_vs_stocks.update_yaxes(title_text="Weight (%)", row=1, col=1, tickformat='.2f')
-    fig_etf_vs_stocks.update_yaxes(title_text="Weight (%)", row=2, col=1, tickformat='.2f')
-    fig_etf_vs_stocks.update_layout(height=800, showlegend=True, hovermode='x unified')
-    figures['etf_vs_stocks'] = fig_etf_vs_stocks
+    return report_text, figures, summary_df, ytd_df, returns_data
+
+
+class IncrementalAnalyzer:
+    """
+    Runs the portfolio analysis and keeps the resulting state between runs.
     
-    # 4. ETF vs Stocks (Grouped Bar Chart)
-    sectors = ytd_df['Sector'].tolist()
-    etf_ends = [round(x, 2) for x in ytd_df['ETF_Weight_End (%)'].tolist()]
-    stocks_ends = [round(x, 2) for x in ytd_df['Stocks_Weight_End (%)'].tolist()]
+    When transactions have only been appended since the last run (and the end
+    date is unchanged), run() patches the previous positions and valuations
+    for the new trades instead of reloading prices and rebuilding everything.
+    Any other change falls back to a full run.
+    """
     
-    fig_bar_comparison = go.Figure(data=[
-        go.Bar(name='ETF', x=sectors, y=etf_ends, marker_color='#2E86AB',
-               hovertemplate='%{y:.2f}%<extra></extra>'),
-        go.Bar(name='Individual Stocks', x=sectors, y=stocks_ends, marker_color='#F18F01',
-               hovertemplate='%{y:.2f}%<extra></extra>')
-    ])
-    fig_bar_comparison.update_layout(
-        title='Sector Allocation: ETF vs Individual Stocks (End of Period)',
-        xaxis_title='Sector',
-        yaxis_title='Weight (%)',
-        barmode='group',
-        height=600,
-        yaxis=dict(tickformat='.2f')
-    )
-    figures['bar_comparison'] = fig_bar_comparison
+    def __init__(self, transactions_file: str = 'data/transactions.csv',
+                 price_provider: PriceProvider = None, offline: bool = False, cache_path: str = None,
+                 result_cache_dir: str = None):
+        self.transactions_file = resolve_transactions_path(transactions_file)
+        if price_provider is None:
+            price_provider = default_price_provider(self.transactions_file, offline=offline, cache_path=cache_path)
+        self.price_provider = price_provider
+        if result_cache_dir is None:
+            result_cache_dir = os.path.join(os.path.dirname(os.path.abspath(self.transactions_file)), 'result_cache')
+        self.result_cache = ResultCache(result_cache_dir)
+        self.state = None
+        # Result cache key of the inputs the last run() used
+        self.last_result_key = None
+    
+    def result_key(self, end_date: str = None) -> str:
+        """Result cache key for the current transactions, price data and end date"""
+        end_date = pd.Timestamp(end_date).normalize() if end_date is not None else pd.Timestamp.now().normalize()
+        return ResultCache.make_key(self.transactions_file, self.price_provider.version(), end_date)
+    
+    def load_cached_results(self, end_date: str = None) -> Tuple[str, Dict, pd.DataFrame, pd.DataFrame, Dict]:
+        """
+        Return the stored results of a previous run with identical inputs, without
+        loading prices or computing anything.
+        
+        Returns:
+            The same tuple as generate_portfolio_analysis, or None on a cache miss
+        """
+        entry = self.result_cache.load(self.result_key(end_date))
+        if entry is None:
+            return None
+        return (entry['report_text'], LazyFigures.from_json(entry['figure_json']),
+                entry['summary_df'], entry['ytd_df'], entry['returns_data'])
+    
+    def save_results(self, results: Tuple[str, Dict, pd.DataFrame, pd.DataFrame, Dict]):
+        """Store the results of the last run() in the result cache (serializes every figure)"""
+        self.result_cache.save(self.last_result_key, results)
+    
+    def run(self, end_date: str = None, progress: Callable[[str], None] = None,
+            profiler: Profiler = None) -> Tuple[str, Dict, pd.DataFrame, pd.DataFrame, Dict]:
+        """
+        Analyse the current transactions journal.
+        
+        Args:
+            end_date: Last date of the analysis (exclusive, defaults to today)
+            progress: Stage callback, see generate_portfolio_analysis
+            profiler: Collects the timing spans of the run (a new Profiler
+                when None); its records are returned as returns_data['timings']
+        
+        Returns:
+            The same tuple as generate_portfolio_analysis
+        """
+        if progress is None:
+            progress = lambda stage: None
+        if profiler is None:
+            profiler = Profiler()
+        
+        with profiler.activate(), span('analysis'):
+            progress("Loading transactions")
+            with span('load_transactions'):
+                df = load_transactions(self.transactions_file)
+            
+            # Use present day as end date unless pinned by the caller
+            end_date = pd.Timestamp(end_date).normalize() if end_date is not None else pd.Timestamp.now().normalize()
+            
+            # The state is patched in place, so drop it until the update completes
+            previous, self.state = self.state, None
+            state = None
+            if previous is not None and previous.end_date == end_date:
+                progress("Updating positions")
+                with span('update_positions'):
+                    state = update_portfolio_state(previous, df, self.price_provider)
+            if state is None:
+                progress("Loading prices")
+                with span('load_prices'):
+                    px = load_price_panel(df, self.price_provider, end_date)
+                state = compute_portfolio_state(df, px, end_date, progress)
+            
+            with span('build_results'):
+                results = build_analysis_results(state, progress)
+        
+        # The list keeps growing with spans recorded later under this profiler (figure builds, rendering)
+        results[4]['timings'] = profiler.records
+        self.state = state
+        # Key taken after loading, since fetching prices bumps the price-data version
+        self.last_result_key = self.result_key(end_date)
+        return results
+
+
+def generate_portfolio_analysis(transactions_file: str = 'data/transactions.csv',
+                                price_provider: PriceProvider = None, offline: bool = False,
+                                cache_path: str = None, end_date: str = None,
+                                progress: Callable[[str], None] = None, profiler: Profiler = None,
+                                trace_path: str = None) -> Tuple[str, Dict, pd.DataFrame, pd.DataFrame, Dict]:
+    """
+    Main analysis function - generates portfolio analysis and returns results
     
-    # 5. Weight Drift Over Time (Line Chart)
-    weight_drift = weights.copy()
-    for col in weight_drift.columns:
-        if col in initial_weights:
-            weight_drift[col] = weight_drift[col] - initial_weights[col]
-        else:
-            weight_drift[col] = 0
+    Args:
+        transactions_file: Path to the transactions CSV
+        price_provider: Source of Adj Close prices (defaults to Yahoo Finance
+            behind the local price cache, see default_price_provider)
+        offline: Run from the local price cache only, without downloading
+            (ignored when price_provider is given)
+        cache_path: Path to the SQLite price cache (ignored when price_provider is given)
+        end_date: Last date of the analysis (exclusive, defaults to today); pin it
+            together with a LocalFileProvider for reproducible runs
+        progress: Called with a short description at the start of each stage.
+            Raising AnalysisCancelled from it aborts the run.
+        profiler: Profiler collecting the stage spans; pass
+            Profiler(trace_memory=True) for per-stage memory peaks
+        trace_path: Also write the spans of the run as a JSON trace to this file
     
-    fig_weight_drift = go.Figure()
-    for col in weight_drift.columns:
-        max_drift = abs(weight_drift[col]).max()
-        if max_drift > 0.5: # Only plot meaningful drift
-            rounded_drift = weight_drift[col].round(2)
-            fig_weight_drift.add_trace(go.Scatter(
-                x=weight_drift.index,
-                y=rounded_drift,
-                name=col,
-                mode='lines',
-                line=dict(width=2.5, color=SECTOR_COLORS.get(col, '#808080')),
-                hovertemplate='%{y:.2f}%<extra></extra>'
-            ))
-            
-    fig_weight_drift.update_layout(
-        title='Sector Weight Drift (Change from Initial Allocation)',
-        xaxis_title='Date',
-        yaxis_title='Weight Change (%)',
-        hovermode='x unified',
-        height=600,
-        yaxis=dict(tickformat='.2f')
-    )
-    figures['weight_drift'] = fig_weight_drift
+    Returns:
+        report_text (str): Formatted text report
+        figures (dict): Dictionary of Plotly figure objects
+        summary_df (pd.DataFrame): Statistics summary
+        ytd_df (pd.DataFrame): YTD sector breakdown
+        returns_data (dict): Return series and transaction dates for the comparison plots,
+            the sector and ETF/stock weight series, and the run's timing spans under 'timings'
     
-    return report_text, figures, summary_df, ytd_df, returns_data
+    Use IncrementalAnalyzer to keep the state between runs and only recompute
+    what newly appended transactions affect.
+    """
+    analyzer = IncrementalAnalyzer(transactions_file, price_provider=price_provider,
+                                   offline=offline, cache_path=cache_path)
+    results = analyzer.run(end_date=end_date, progress=progress, profiler=profiler)
+    if trace_path is not None:
+        write_trace(results[4]['timings'], trace_path)
+    return results
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+SMIC Batch Analysis Module
+Runs the portfolio analysis for many transaction files over one shared price panel
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+from price_providers import PriceProvider
+from profiling import Profiler, span
+from analysis_core import (
+    default_price_provider, resolve_transactions_path, load_transactions,
+    panel_tickers, download_price_panel, trim_price_panel,
+    compute_portfolio_state, build_analysis_results
+)
+
+# Price panel attached by each worker process (see _attach_panel)
+_worker_panel = None
+
+
+def _attach_panel(shm_name: str, shape: Tuple[int, int], index: pd.DatetimeIndex, columns: List[str]):
+    """Process pool initializer: map the shared price block as a read-only DataFrame"""
+    global _worker_panel
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    values.flags.writeable = False
+    # The SharedMemory handle is kept alongside the frame so the mapping stays open
+    _worker_panel = (shm, pd.DataFrame(values, index=index, columns=columns, copy=False))
+
+
+def _analyze_one(df: pd.DataFrame, px: pd.DataFrame, end_date: pd.Timestamp) -> Tuple:
+    """Analyse one portfolio against its slice of the shared panel"""
+    profiler = Profiler()
+    with profiler.activate(), span('analysis'):
+        own_px = trim_price_panel(px, df['invest_date'].min()).reindex(columns=panel_tickers(df))
+        state = compute_portfolio_state(df, own_px, end_date)
+        with span('build_results'):
+            results = build_analysis_results(state)
+    results[4]['timings'] = profiler.records
+    return results
+
+
+def _analyze_in_worker(df: pd.DataFrame, end_date: pd.Timestamp) -> Tuple:
+    return _analyze_one(df, _worker_panel[1], end_date)
+
+
+def analyze_batch(transaction_files: List[str], price_provider: PriceProvider = None,
+                  offline: bool = False, cache_path: str = None, end_date: str = None,
+                  max_workers: int = None) -> Dict[str, Tuple]:
+    """
+    Run generate_portfolio_analysis for several portfolios at once.
+
+    Prices for the union of all tickers are loaded a single time. The panel
+    is placed in shared memory and each portfolio is analysed in a worker
+    process that maps it read-only, so only transactions and results cross
+    process boundaries.
+
+    Args:
+        transaction_files: Paths of the transactions CSVs
+        price_provider: Source of Adj Close prices (defaults to Yahoo Finance
+            behind the price cache of the first transactions file)
+        offline: Run from the local price cache only (ignored when price_provider is given)
+        cache_path: Path to the SQLite price cache (ignored when price_provider is given)
+        end_date: Last date of the analysis (exclusive, defaults to today)
+        max_workers: Number of worker processes (defaults to the CPU count);
+            1 runs everything in the calling process
+
+    Returns:
+        Dictionary mapping each transactions file, in input order, to the
+        tuple generate_portfolio_analysis would have returned for it
+
+    Raises:
+        ValueError: If the same file is given more than once
+    """
+    if not transaction_files:
+        return {}
+    paths = [resolve_transactions_path(path) for path in transaction_files]
+    # Results are keyed by file, so a repeated file would silently collapse into one entry
+    seen = {}
+    for name, path in zip(transaction_files, paths):
+        real_path = os.path.realpath(path)
+        if real_path in seen:
+            raise ValueError(f"Transactions file given more than once: {seen[real_path]} and {name}")
+        seen[real_path] = name
+    if price_provider is None:
+        price_provider = default_price_provider(paths[0], offline=offline, cache_path=cache_path)
+    end_date = pd.Timestamp(end_date).normalize() if end_date is not None else pd.Timestamp.now().normalize()
+
+    frames = [load_transactions(path) for path in paths]
+    all_transactions = pd.concat(frames, ignore_index=True)
+    start_date = all_transactions['invest_date'].min()
+    px = download_price_panel(panel_tickers(all_transactions), start_date, price_provider, end_date)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(frames))
+    if max_workers <= 1:
+        return {name: _analyze_one(df, px, end_date) for name, df in zip(transaction_files, frames)}
+
+    values = np.ascontiguousarray(px.to_numpy(dtype=np.float64))
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        del values
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_panel,
+                                 initargs=(shm.name, px.shape, px.index, list(px.columns))) as pool:
+            futures = [pool.submit(_analyze_in_worker, df, end_date) for df in frames]
+            return {name: future.result() for name, future in zip(transaction_files, futures)}
+    finally:
+        shm.close()
+        shm.unlink()
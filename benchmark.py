@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+SMIC Benchmark Module
+Times every stage of the portfolio analysis on synthetic portfolios and
+writes the results as JSON for regression tracking
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from typing import Dict, List
+from analysis_core import IncrementalAnalyzer, SECTOR_NAMES
+from price_providers import DataFrameProvider, LocalFileProvider
+from synthetic_portfolio import generate_synthetic_portfolio, write_synthetic_portfolio
+
+# Benchmark stages in pipeline order
+STAGES = ['load', 'price_fetch', 'ledger', 'sector_aggregation', 'stats', 'figure_build', 'html_serialization']
+
+# Progress messages of IncrementalAnalyzer.run mapped to the stage that starts with them
+PROGRESS_STAGES = {
+    'Loading transactions': 'load',
+    'Loading prices': 'price_fetch',
+    'Building positions': 'ledger',
+    'Aggregating sectors': 'sector_aggregation',
+    'Computing statistics': 'stats'
+}
+
+# Named scales: stocks, ledger rows, years of history
+SCALES = {
+    'small': {'n_tickers': 100, 'n_transactions': 1000, 'years': 2.0},
+    'medium': {'n_tickers': 1000, 'n_transactions': 20000, 'years': 3.0},
+    'large': {'n_tickers': 5000, 'n_transactions': 100000, 'years': 5.0}
+}
+
+
+class StageTimer:
+    """
+    Splits a run into stages from progress callbacks.
+
+    Each call to mark() ends the running stage and starts the named one, so
+    the analysis is timed through its own progress reporting without any
+    instrumentation inside analysis_core.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._stage = None
+        self._started = None
+
+    def mark(self, stage: str = None):
+        now = time.perf_counter()
+        if self._stage is not None:
+            self.timings[self._stage] = self.timings.get(self._stage, 0.0) + now - self._started
+        self._stage = stage
+        self._started = now
+
+    def progress(self, message: str):
+        """Progress callback for IncrementalAnalyzer.run"""
+        self.mark(PROGRESS_STAGES.get(message, self._stage))
+
+
+def run_once(transactions_path: str, price_provider, end_date: str, workdir: str) -> Dict:
+    """
+    Run the full analysis once and time every stage.
+
+    Returns:
+        Dictionary with the seconds spent per stage, the number of figures
+        and the size of the serialized HTML
+    """
+    timer = StageTimer()
+    analyzer = IncrementalAnalyzer(transactions_path, price_provider=price_provider,
+                                   result_cache_dir=os.path.join(workdir, 'result_cache'))
+    _, figures, _, _, _ = analyzer.run(end_date=end_date, progress=timer.progress)
+
+    timer.mark('figure_build')
+    built = [figures[name] for name in figures]
+
+    timer.mark('html_serialization')
+    # plotly.js itself is left out; it is a constant-size copy, not serialization work
+    html_bytes = sum(len(fig.to_html(include_plotlyjs=False, full_html=False)) for fig in built)
+    timer.mark()
+
+    return {'stages': timer.timings, 'figures': len(built), 'html_bytes': html_bytes}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Min, median, mean and max of repeated timings (seconds)"""
+    values = np.asarray(samples, dtype=float)
+    return {
+        'min': float(values.min()),
+        'median': float(np.median(values)),
+        'mean': float(values.mean()),
+        'max': float(values.max())
+    }
+
+
+def benchmark_scale(name: str, config: Dict, repeat: int = 3, warmup: int = 1, prices: str = 'memory',
+                    end_date: str = '2025-10-31', seed: int = 0, log=None) -> Dict:
+    """
+    Generate a synthetic portfolio and time the analysis on it `repeat` times.
+
+    Args:
+        name: Label of the scale in the output
+        config: Arguments for generate_synthetic_portfolio (n_tickers, n_transactions, years, ...)
+        repeat: Number of timed runs
+        warmup: Untimed runs first (module imports, allocator and cache warm-up)
+        prices: 'memory' serves the panel from a DataFrame; 'csv' reads it
+            from a wide CSV on every run, like recorded fixtures
+        end_date: End of the synthetic history and of the analysis
+        seed: Seed of the synthetic data
+        log: Optional callable for progress messages
+
+    Returns:
+        Result record with the configuration and per-stage statistics
+    """
+    log = log or (lambda message: None)
+    started = time.perf_counter()
+    transactions, panel = generate_synthetic_portfolio(end_date=end_date, seed=seed, **config)
+    generate_seconds = time.perf_counter() - started
+
+    workdir = tempfile.mkdtemp(prefix='smic_bench_')
+    try:
+        transactions_path, prices_path = write_synthetic_portfolio(workdir, transactions, panel)
+        provider = DataFrameProvider(panel) if prices == 'memory' else LocalFileProvider(prices_path)
+
+        for _ in range(warmup):
+            run_once(transactions_path, provider, end_date, workdir)
+        runs = []
+        for i in range(repeat):
+            runs.append(run_once(transactions_path, provider, end_date, workdir))
+            log(f"{name}: run {i + 1}/{repeat} took {sum(runs[-1]['stages'].values()):.2f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    stages = {stage: summarize([run['stages'].get(stage, 0.0) for run in runs]) for stage in STAGES}
+    return {
+        'name': name,
+        'config': dict(config, end_date=end_date, seed=seed, prices=prices),
+        'data': {
+            'transactions': int(len(transactions)),
+            'tickers': int(panel.shape[1]),
+            'days': int(panel.shape[0]),
+            'generate_seconds': generate_seconds
+        },
+        'repeat': repeat,
+        'warmup': warmup,
+        'stages': stages,
+        'total': summarize([sum(run['stages'].values()) for run in runs]),
+        'figures': runs[0]['figures'],
+        'html_bytes': runs[0]['html_bytes']
+    }
+
+
+def environment() -> Dict[str, str]:
+    """Interpreter, library versions and machine the benchmark ran on"""
+    import plotly
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def format_results(results: List[Dict]) -> str:
+    """Plain text table of median stage timings per scale"""
+    header = f"{'Stage':<22}" + ''.join(f"{result['name']:>14}" for result in results)
+    lines = [header, '-' * len(header)]
+    for stage in STAGES + ['total']:
+        row = f"{stage:<22}"
+        for result in results:
+            stats = result['total'] if stage == 'total' else result['stages'][stage]
+            row += f"{stats['median']:>13.3f}s"
+        lines.append(row)
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='benchmark.py',
+        description='Time each analysis stage on synthetic portfolios and write the results as JSON.'
+    )
+    parser.add_argument('--scale', nargs='+', choices=list(SCALES) + ['custom'], default=['small', 'medium'],
+                        help='named scales to run (default: small medium); "custom" uses the options below')
+    parser.add_argument('--tickers', type=int, default=500, help='stocks for the custom scale (default: 500)')
+    parser.add_argument('--transactions', type=int, default=5000,
+                        help='ledger rows for the custom scale (default: 5000)')
+    parser.add_argument('--years', type=float, default=3.0, help='years of history for the custom scale (default: 3)')
+    parser.add_argument('--sectors', type=int, default=len(SECTOR_NAMES),
+                        help=f'sectors for the custom scale (default: {len(SECTOR_NAMES)})')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per scale (default: 3)')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs before timing (default: 1)')
+    parser.add_argument('--prices', choices=['memory', 'csv'], default='memory',
+                        help='serve prices from memory or read them from a CSV each run (default: memory)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data (default: 0)')
+    parser.add_argument('-o', '--output', default=None, help='write the JSON results to this file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    results = []
+    for name in args.scale:
+        if name == 'custom':
+            config = {'n_tickers': args.tickers, 'n_transactions': args.transactions,
+                      'years': args.years, 'n_sectors': args.sectors}
+        else:
+            config = SCALES[name]
+        results.append(benchmark_scale(name, config, repeat=args.repeat, warmup=args.warmup, prices=args.prices,
+                                       seed=args.seed, log=log))
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'stages': STAGES,
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+        log(format_results(results))
+        log(f"Wrote {args.output}")
+    else:
+        log(format_results(results))
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
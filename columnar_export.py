@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+SMIC Columnar Export Module
+Writes the full time-series results of a run to Parquet or Arrow IPC files
+that notebooks can load (or memory-map) without parsing CSV text
+"""
+
+import os
+import pandas as pd
+from typing import Dict, List
+
+# Export formats and their file extensions
+EXPORT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _time_series(frame: pd.DataFrame) -> pd.DataFrame:
+    """Dates x series table with a 'Date' index and float64 columns"""
+    frame = frame.astype('float64')
+    frame.index = pd.DatetimeIndex(frame.index, name='Date')
+    frame.columns = [str(column) for column in frame.columns]
+    return frame
+
+
+def results_tables(results, state=None) -> Dict[str, pd.DataFrame]:
+    """
+    Flatten an analysis result tuple into typed tables.
+
+    Args:
+        results: Tuple returned by IncrementalAnalyzer.run / generate_portfolio_analysis
+        state: PortfolioState of the same run (IncrementalAnalyzer.state) to
+            include the per-ticker tables; results served from the result
+            cache carry no positions
+
+    Returns:
+        Dictionary of table name -> DataFrame:
+            'values': portfolio, equity and S&P 500 value, sector ETF prices
+                and sector aggregate values (dates x series)
+            'returns': cumulative return (%) of the same series since the start
+            'weights': sector weights (%)
+            'sector_etf_stocks': ETF and individual stock weights per sector (%)
+            'rolling': rolling analytics indexed by window, metric and date
+            'risk_metrics', 'summary', 'ytd': the statistics tables
+            'units', 'position_value': units held and position value per
+                ticker, only when `state` is given
+    """
+    _, _, summary_df, ytd_df, returns_data = results
+    period_returns = returns_data['period_returns']
+
+    tables = {
+        'values': _time_series(period_returns.growth),
+        'returns': _time_series(period_returns.cumulative('General')),
+        'weights': _time_series(returns_data['weights']),
+        'sector_etf_stocks': _time_series(returns_data['sector_etf_stocks'])
+    }
+
+    rolling = {(window, metric): _time_series(frame)
+               for window, metrics in returns_data['rolling'].items()
+               for metric, frame in metrics.items()}
+    if rolling:
+        tables['rolling'] = pd.concat(rolling, names=['Window', 'Metric'])
+
+    tables['risk_metrics'] = returns_data['risk_metrics'].astype('float64').rename_axis('Series')
+    tables['summary'] = summary_df.reset_index(drop=True)
+    tables['ytd'] = ytd_df.reset_index(drop=True)
+
+    if state is not None:
+        tables['units'] = _time_series(state.units)
+        tables['position_value'] = _time_series(state.position_value)
+    return tables
+
+
+def write_results_tables(results, directory: str, fmt: str = 'parquet', state=None) -> List[str]:
+    """
+    Write every table of results_tables() to `directory`, one file per table.
+
+    Parquet files are compressed (smallest on disk); Arrow IPC files are
+    written uncompressed so readers can memory-map them and use the column
+    buffers in place.
+
+    Args:
+        results: Analysis result tuple
+        directory: Output directory (created if missing)
+        fmt: 'parquet' or 'arrow'
+        state: Optional PortfolioState for the per-ticker tables
+
+    Returns:
+        Paths of the written files
+    """
+    import pyarrow as pa
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for name, frame in results_tables(results, state).items():
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+        path = os.path.join(directory, name + EXPORT_FORMATS[fmt])
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, path)
+        else:
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        written.append(path)
+    return written
+
+
+def read_table(path: str, columns: List[str] = None, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Load one exported table.
+
+    Args:
+        path: .parquet or .arrow file written by write_results_tables
+        columns: Only load these columns (the index is always loaded)
+        memory_map: Map the file instead of reading it into memory first
+
+    Returns:
+        DataFrame with the index and dtypes it was written with
+    """
+    import pyarrow as pa
+
+    if path.endswith(EXPORT_FORMATS['arrow']):
+        source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            metadata = table.schema.pandas_metadata or {}
+            index_columns = [column for column in metadata.get('index_columns', []) if isinstance(column, str)]
+            table = table.select(index_columns + [column for column in columns if column not in index_columns])
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=columns, memory_map=memory_map)
+    # One block per column lets float columns without missing values share the Arrow buffers
+    return table.to_pandas(split_blocks=True)
+
+
+def read_results_tables(directory: str, tables: List[str] = None, memory_map: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Load the tables exported to `directory`.
+
+    Args:
+        directory: Directory written by write_results_tables
+        tables: Table names to load (default: all found)
+        memory_map: Memory-map the files (see read_table)
+
+    Returns:
+        Dictionary of table name -> DataFrame
+    """
+    loaded = {}
+    for file_name in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(file_name)
+        if extension in EXPORT_FORMATS.values() and (tables is None or name in tables):
+            loaded[name] = read_table(os.path.join(directory, file_name), memory_map=memory_map)
+    return loaded
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+SMIC Downsampling Module
+Largest-Triangle-Three-Buckets downsampling of long time-series traces, with
+re-resampling of the visible range when a chart is zoomed
+"""
+
+import json
+import base64
+import numpy as np
+import pandas as pd
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Points drawn per trace; about the pixel width of a chart, beyond which extra points add no detail
+DEFAULT_MAX_POINTS = 1000
+
+# Trace types whose points can be thinned without changing what they show
+RESAMPLED_TRACE_TYPES = ('scatter', 'scattergl')
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection.
+
+    The first and last points are kept; the points in between are split into
+    n_out - 2 buckets and from each bucket the point forming the largest
+    triangle with the previously selected point and the average of the next
+    bucket is kept. This preserves peaks, troughs and the overall shape far
+    better than taking every n-th point.
+
+    All columns of `y` are processed in the same pass over the buckets.
+
+    Args:
+        x: Increasing x values (n,)
+        y: Finite y values (n,) or (n, k)
+        n_out: Points to keep per column (at least 3)
+
+    Returns:
+        Selected row positions, (n_out,) or (n_out, k) to match `y`
+    """
+    x = np.asarray(x, dtype=float)
+    values = np.asarray(y, dtype=float).reshape(len(x), -1)
+    n, k = values.shape
+    if n_out >= n or n_out < 3:
+        selected = np.repeat(np.arange(n)[:, None], k, axis=1)
+        return selected if np.ndim(y) > 1 else selected[:, 0]
+
+    # Bucket b covers [edges[b], edges[b + 1]); the last point forms a bucket of its own
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.intp), n)
+    columns = np.arange(k)
+    selected = np.empty((n_out, k), dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = np.zeros(k, dtype=np.intp)
+    for b in range(n_out - 2):
+        lo, hi, next_hi = edges[b], edges[b + 1], edges[b + 2]
+        next_x = x[hi:next_hi].mean()
+        next_y = values[hi:next_hi].mean(axis=0)
+        prev_x = x[previous]
+        prev_y = values[previous, columns]
+        # Twice the triangle area for every candidate of the bucket, per column
+        area = np.abs((prev_x - next_x) * (values[lo:hi] - prev_y)
+                      - (prev_x - x[lo:hi, None]) * (next_y - prev_y))
+        previous = lo + area.argmax(axis=0)
+        selected[b + 1] = previous
+    return selected if np.ndim(y) > 1 else selected[:, 0]
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int = DEFAULT_MAX_POINTS,
+                       stacked: bool = False) -> List[np.ndarray]:
+    """
+    Row positions to draw for each column of `y`.
+
+    Missing values are kept at the edges of every gap, so lines still break
+    where the data does. Stacked traces must share their x values, so they
+    get the union of their selections and split the budget between them.
+
+    Args:
+        x: Increasing x values (n,)
+        y: y values (n, k), may contain NaN
+        max_points: Point budget per trace
+        stacked: Whether the columns are stacked on each other
+
+    Returns:
+        One sorted index array per column (the same array for all when stacked)
+    """
+    y = np.asarray(y, dtype=float).reshape(len(x), -1)
+    n, k = y.shape
+    per_column = max(max_points // k, 3) if stacked else max_points
+    if n <= per_column:
+        return [np.arange(n)] * k
+
+    missing = np.isnan(y)
+    filled = pd.DataFrame(y).ffill().bfill().fillna(0.0).to_numpy() if missing.any() else y
+    selected = lttb_indices(x, filled, per_column)
+    # Both sides of every transition between data and gap
+    gap_edges = []
+    for j in range(k):
+        changes = np.flatnonzero(missing[1:, j] != missing[:-1, j])
+        gap_edges.append(np.union1d(changes, changes + 1))
+
+    if stacked:
+        union = np.unique(np.concatenate([selected.ravel()] + gap_edges))
+        return [union] * k
+    return [np.union1d(selected[:, j], gap_edges[j]) for j in range(k)]
+
+
+def _as_array(values) -> np.ndarray:
+    """Trace data as an array; figures parsed from JSON hold base64 typed arrays"""
+    if isinstance(values, dict) and 'bdata' in values:
+        array = np.frombuffer(base64.b64decode(values['bdata']), dtype=values['dtype'])
+        return array.reshape(values['shape']) if 'shape' in values else array
+    return np.asarray(values)
+
+
+def _as_x(values: np.ndarray) -> Tuple[np.ndarray, bool]:
+    """x values as floats for the triangle areas, and whether they are dates"""
+    if values.dtype.kind in 'iuf':
+        return values.astype(float), False
+    dates = pd.to_datetime(values).to_numpy(dtype='datetime64[ns]')
+    return dates.astype(np.int64).astype(float), True
+
+
+def _is_resampled(trace, max_points: int) -> bool:
+    """Line traces with more than max_points numeric points"""
+    if trace.type not in RESAMPLED_TRACE_TYPES or trace.x is None or trace.y is None:
+        return False
+    if trace.mode not in (None, 'lines'):
+        return False
+    return len(trace.x) > max_points
+
+
+class FigureResampler:
+    """
+    Downsampled view of a Plotly figure that can be re-resampled for any x range.
+
+    Long line traces keep their full data here; the figure drawn shows at
+    most `max_points` points per trace, chosen by LTTB. When the chart is
+    zoomed, update() resamples just the visible range, so full resolution
+    comes back as soon as the range holds fewer points than the budget.
+    Traces sharing x values are resampled together; stacked traces (same
+    stackgroup) share one set of points so their areas stay aligned.
+    """
+
+    def __init__(self, figure: 'go.Figure', max_points: int = DEFAULT_MAX_POINTS):
+        """
+        Args:
+            figure: Full resolution figure (left unchanged)
+            max_points: Point budget per trace
+        """
+        self.source = figure
+        self.max_points = max_points
+        # Each group: trace positions, raw x, float x, y (n x k), stacked flag
+        self.groups: List[Dict] = []
+        for position, trace in enumerate(figure.data):
+            if not _is_resampled(trace, max_points):
+                continue
+            x_raw = _as_array(trace.x)
+            y = _as_array(trace.y).astype(float)
+            stackgroup = getattr(trace, 'stackgroup', None)
+            for group in self.groups:
+                if group['stackgroup'] == stackgroup and np.array_equal(group['x_raw'], x_raw):
+                    group['traces'].append(position)
+                    group['y'].append(y)
+                    break
+            else:
+                x, is_date = _as_x(x_raw)
+                self.groups.append({'traces': [position], 'stackgroup': stackgroup, 'x_raw': x_raw,
+                                    'x': x, 'is_date': is_date, 'y': [y]})
+        for group in self.groups:
+            group['y'] = np.column_stack(group['y'])
+        self._figure = None
+
+    @property
+    def resampled(self) -> bool:
+        """Whether any trace is longer than the budget"""
+        return bool(self.groups)
+
+    def _select(self, group: Dict, lo: int, hi: int) -> List[np.ndarray]:
+        rows = downsample_indices(group['x'][lo:hi], group['y'][lo:hi], self.max_points,
+                                  stacked=group['stackgroup'] is not None)
+        return [lo + r for r in rows]
+
+    def figure(self) -> 'go.Figure':
+        """Copy of the figure with every long trace downsampled over its full range (memoized)"""
+        import plotly.graph_objects as go
+        if not self.groups:
+            return self.source
+        if self._figure is None:
+            figure = go.Figure(self.source)
+            for group in self.groups:
+                rows_per_trace = self._select(group, 0, len(group['x']))
+                for column, (position, rows) in enumerate(zip(group['traces'], rows_per_trace)):
+                    figure.data[position].update(x=group['x_raw'][rows], y=group['y'][rows, column])
+            self._figure = figure
+        return self._figure
+
+    def update(self, x0=None, x1=None) -> Tuple[List[int], Dict[str, list]]:
+        """
+        Points to draw for the x range [x0, x1] (None for the full range).
+
+        One point beyond each end is included so lines run to the plot edges.
+
+        Returns:
+            Trace positions and the matching {'x': [...], 'y': [...]} arrays,
+            in the form Plotly.restyle takes
+        """
+        positions, xs, ys = [], [], []
+        for group in self.groups:
+            x = group['x']
+            lo, hi = 0, len(x)
+            if x0 is not None and x1 is not None:
+                start, end = (pd.Timestamp(x0).value, pd.Timestamp(x1).value) if group['is_date'] else (x0, x1)
+                lo = max(int(np.searchsorted(x, float(start), side='left')) - 1, 0)
+                hi = min(int(np.searchsorted(x, float(end), side='right')) + 1, len(x))
+            for column, (position, rows) in enumerate(zip(group['traces'], self._select(group, lo, hi))):
+                x_values = group['x_raw'][rows]
+                if group['is_date']:
+                    x_values = np.datetime_as_string(pd.to_datetime(x_values).to_numpy(dtype='datetime64[s]'))
+                y_values = group['y'][rows, column]
+                positions.append(position)
+                xs.append(x_values.tolist())
+                ys.append([None if np.isnan(v) else v for v in y_values.tolist()])
+        return positions, {'x': xs, 'y': ys}
+
+    def update_json(self, x0=None, x1=None) -> str:
+        """update() as a JSON object {"traces": [...], "update": {...}} for the chart page"""
+        positions, update = self.update(x0, x1)
+        return json.dumps({'traces': positions, 'update': update})
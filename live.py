@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+SMIC Live Valuation Module
+Tick-driven portfolio valuation with current holdings held fixed
+"""
+
+import time
+import threading
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterator, List, NamedTuple
+
+# Default minimum time between two published snapshots (seconds)
+DEFAULT_THROTTLE = 0.25
+
+
+class Tick(NamedTuple):
+    """A single price update"""
+    timestamp: pd.Timestamp
+    ticker: str
+    price: float
+
+
+class TickFeed:
+    """
+    Base class for sources of price ticks.
+
+    Subclasses yield Tick tuples from __iter__ until the feed is exhausted
+    or stop() is called.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+
+    def __iter__(self) -> Iterator[Tick]:
+        raise NotImplementedError
+
+    def stop(self):
+        """Ask the feed to end iteration; safe to call from any thread"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+
+class ReplayFeed(TickFeed):
+    """
+    Replays recorded prices as ticks, standing in for a live source.
+
+    Every row of the price frame becomes one tick per ticker whose price
+    changed since the previous row, in column order.
+    """
+
+    def __init__(self, prices: pd.DataFrame, tick_interval: float = 0.0):
+        """
+        Args:
+            prices: Wide DataFrame of recorded prices (dates x tickers)
+            tick_interval: Seconds to wait between ticks (0 replays as fast as possible)
+        """
+        super().__init__()
+        self.prices = prices
+        self.tick_interval = tick_interval
+
+    @classmethod
+    def from_provider(cls, price_provider, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp,
+                      tick_interval: float = 0.0) -> 'ReplayFeed':
+        """Replay prices loaded from any price_providers.PriceProvider (e.g. LocalFileProvider)"""
+        return cls(price_provider.get_prices(tickers, start, end), tick_interval)
+
+    def __iter__(self) -> Iterator[Tick]:
+        values = self.prices.to_numpy(dtype=float)
+        tickers = list(self.prices.columns)
+        previous = np.full(len(tickers), np.nan)
+        for row, timestamp in enumerate(self.prices.index):
+            current = values[row]
+            changed = np.flatnonzero(~np.isnan(current) & (current != previous))
+            for col in changed:
+                if self.stopped:
+                    return
+                yield Tick(timestamp, tickers[col], float(current[col]))
+                if self.tick_interval > 0:
+                    self._stop.wait(self.tick_interval)
+            previous = np.where(np.isnan(current), previous, current)
+
+
+class LiveValuation:
+    """
+    Running portfolio valuation updated one tick at a time.
+
+    Units are held at the current holdings. A tick changes the value of one
+    position by units * (new price - old price), and that delta is added to
+    the sleeves the ticker belongs to and to the invested total, so a tick
+    costs the same however many positions the portfolio holds. Weights and
+    excess returns are derived from the running totals when a snapshot is
+    taken.
+    """
+
+    def __init__(self, tickers: List[str], units: np.ndarray, prices: np.ndarray,
+                 membership: pd.DataFrame, cash: float, benchmark_ticker: str,
+                 sector_etfs: Dict[str, str], reference: Dict[str, float] = None):
+        """
+        Args:
+            tickers: Tickers of the priced universe
+            units: Units held per ticker
+            prices: Last known price per ticker (the reference close)
+            membership: 0/1 ticker x sleeve matrix (see build_sector_membership)
+            cash: Cash balance, constant during the session
+            benchmark_ticker: Ticker of the benchmark (^GSPC)
+            sector_etfs: Sector name -> benchmark ETF ticker
+            reference: Optional inception values {'portfolio': value, 'benchmark': price}
+                for since-inception returns
+        """
+        self.tickers = list(tickers)
+        self.positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.units = np.nan_to_num(np.asarray(units, dtype=float))
+        self.prices = np.asarray(prices, dtype=float).copy()
+        self.position_value = np.nan_to_num(self.units * self.prices)
+
+        membership = membership.reindex(index=self.tickers, fill_value=0.0)
+        self.sleeves = list(membership.columns)
+        self.sleeve_index = {name: i for i, name in enumerate(self.sleeves)}
+        # Sleeves of each ticker as index arrays, so a tick touches only those
+        self.ticker_sleeves = [np.flatnonzero(row) for row in membership.to_numpy()]
+        self.sleeve_values = self.position_value @ membership.to_numpy()
+        self.invested_value = float(self.position_value.sum())
+        self.cash = float(cash)
+
+        self.benchmark_ticker = benchmark_ticker
+        self.sector_etfs = dict(sector_etfs)
+        self.open_prices = self.prices.copy()
+        self.open_sleeve_values = self.sleeve_values.copy()
+        self.open_value = self.portfolio_value
+        self.reference = reference or {}
+        self.tick_count = 0
+        self.last_timestamp = None
+
+    @classmethod
+    def from_state(cls, state, as_of: pd.Timestamp = None,
+                   benchmark_ticker: str = '^GSPC') -> 'LiveValuation':
+        """
+        Start a session from an analysis run.
+
+        Args:
+            state: analysis_core.PortfolioState of the last run
+            as_of: Date whose prices open the session (defaults to the last
+                date); units are always the latest holdings
+            benchmark_ticker: Benchmark ticker
+
+        Returns:
+            LiveValuation over the run's price universe, sleeves and cash
+        """
+        from analysis_core import V, sector_map, SECTOR_NAMES
+
+        px = state.px
+        cash = state.df[state.df['sector'] == 'Cash']['amount_invested'].sum()
+        sector_etfs = {name: V[sector_map[name]] for name in SECTOR_NAMES if V[sector_map[name]] in px.columns}
+        row = len(px.index) - 1 if as_of is None else px.index.searchsorted(pd.Timestamp(as_of), side='right') - 1
+        row = max(row, 0)
+        reference = {
+            'portfolio': float(state.invested_value.iloc[0]) + cash,
+            'benchmark': float(px[benchmark_ticker].iloc[0])
+        }
+        return cls(list(px.columns), state.units.iloc[-1].to_numpy(), px.iloc[row].to_numpy(),
+                   state.membership, cash, benchmark_ticker, sector_etfs, reference)
+
+    @property
+    def portfolio_value(self) -> float:
+        return self.invested_value + self.cash
+
+    def on_tick(self, ticker: str, price: float, timestamp: pd.Timestamp = None) -> bool:
+        """
+        Apply one price tick in O(1).
+
+        Returns:
+            False if the ticker is not part of the portfolio universe
+        """
+        i = self.positions.get(ticker)
+        if i is None or not np.isfinite(price):
+            return False
+        new_value = self.units[i] * price
+        delta = new_value - self.position_value[i]
+        self.prices[i] = price
+        self.position_value[i] = new_value
+        self.sleeve_values[self.ticker_sleeves[i]] += delta
+        self.invested_value += delta
+        self.tick_count += 1
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        return True
+
+    def _sleeve(self, values: np.ndarray, name: str) -> float:
+        i = self.sleeve_index.get(name)
+        return float(values[i]) if i is not None else 0.0
+
+    @staticmethod
+    def _change(current: float, reference: float) -> float:
+        return (current / reference - 1) * 100 if reference and reference > 0 and np.isfinite(reference) else 0.0
+
+    def snapshot(self) -> Dict:
+        """
+        Current valuation.
+
+        Returns:
+            Dictionary with the portfolio value, session and since-inception
+            returns against the benchmark, sector weights (%) and each sector
+            aggregate's session return in excess of its ETF
+        """
+        value = self.portfolio_value
+        bench = self.positions.get(self.benchmark_ticker)
+        benchmark_price = self.prices[bench] if bench is not None else np.nan
+        benchmark_open = self.open_prices[bench] if bench is not None else np.nan
+
+        session_return = self._change(value, self.open_value)
+        benchmark_session_return = self._change(benchmark_price, benchmark_open)
+        total_return = self._change(value, self.reference.get('portfolio'))
+        benchmark_total_return = self._change(benchmark_price, self.reference.get('benchmark'))
+
+        sector_weights = {}
+        sector_excess = {}
+        for sector, etf in self.sector_etfs.items():
+            sector_value = (self._sleeve(self.sleeve_values, f'{sector}_ETF')
+                            + self._sleeve(self.sleeve_values, f'{sector}_Stocks'))
+            sector_open = (self._sleeve(self.open_sleeve_values, f'{sector}_ETF')
+                           + self._sleeve(self.open_sleeve_values, f'{sector}_Stocks'))
+            sector_weights[sector] = sector_value / value * 100 if value > 0 else 0.0
+            etf_pos = self.positions.get(etf)
+            etf_return = (self._change(self.prices[etf_pos], self.open_prices[etf_pos])
+                          if etf_pos is not None else 0.0)
+            sector_excess[sector] = self._change(sector_value, sector_open) - etf_return
+        fixed_income = self._sleeve(self.sleeve_values, 'Fixed Income')
+        sector_weights['Fixed Income'] = fixed_income / value * 100 if value > 0 else 0.0
+        sector_weights['Cash'] = self.cash / value * 100 if value > 0 else 0.0
+
+        return {
+            'timestamp': self.last_timestamp,
+            'ticks': self.tick_count,
+            'portfolio_value': value,
+            'session_return': session_return,
+            'benchmark_session_return': benchmark_session_return,
+            'session_excess': session_return - benchmark_session_return,
+            'total_return': total_return,
+            'benchmark_total_return': benchmark_total_return,
+            'total_excess': total_return - benchmark_total_return,
+            'sector_weights': sector_weights,
+            'sector_excess': sector_excess
+        }
+
+
+class LiveSession:
+    """
+    Pumps a TickFeed into a LiveValuation and publishes throttled snapshots.
+
+    Every tick is applied as it arrives; on_update() is called at most once
+    per `throttle` seconds (plus once when the feed ends), so a fast feed
+    does not flood the GUI.
+    """
+
+    def __init__(self, valuation: LiveValuation, feed: TickFeed,
+                 on_update: Callable[[Dict], None], throttle: float = DEFAULT_THROTTLE):
+        self.valuation = valuation
+        self.feed = feed
+        self.on_update = on_update
+        self.throttle = throttle
+
+    def stop(self):
+        """Stop the feed; run() returns after publishing a final snapshot"""
+        self.feed.stop()
+
+    def run(self):
+        """Consume the feed until it ends or stop() is called (blocking)"""
+        last_publish = 0.0
+        pending = False
+        for tick in self.feed:
+            self.valuation.on_tick(tick.ticker, tick.price, tick.timestamp)
+            pending = True
+            now = time.monotonic()
+            if now - last_publish >= self.throttle:
+                self.on_update(self.valuation.snapshot())
+                last_publish = now
+                pending = False
+        if pending or self.valuation.tick_count == 0:
+            self.on_update(self.valuation.snapshot())
+
+
+def format_snapshot(snapshot: Dict) -> str:
+    """Plain text rendering of a LiveValuation snapshot for the GUI and logs"""
+    timestamp = snapshot['timestamp']
+    as_of = pd.Timestamp(timestamp).strftime('%Y-%m-%d') if timestamp is not None else 'session open'
+    lines = [
+        f"As of: {as_of}   Ticks: {snapshot['ticks']}",
+        "",
+        f"Portfolio value:          ${snapshot['portfolio_value']:,.2f}",
+        f"Session return:           {snapshot['session_return']:+.2f}%",
+        f"S&P 500 session return:   {snapshot['benchmark_session_return']:+.2f}%",
+        f"Session excess return:    {snapshot['session_excess']:+.2f}%",
+        f"Total return:             {snapshot['total_return']:+.2f}%",
+        f"S&P 500 total return:     {snapshot['benchmark_total_return']:+.2f}%",
+        f"Total excess return:      {snapshot['total_excess']:+.2f}%",
+        "",
+        f"{'Sector':<26}{'Weight':>10}{'Excess vs ETF':>16}"
+    ]
+    for sector, weight in snapshot['sector_weights'].items():
+        excess = snapshot['sector_excess'].get(sector)
+        excess_text = f"{excess:+.2f}%" if excess is not None else ''
+        lines.append(f"{sector:<26}{weight:>9.2f}%{excess_text:>16}")
+    return "\n".join(lines)
@@ -6,25 +6,222 @@ Professional desktop application with PySide6 and Plotly
 
 import sys
 import os
+import pickle
+import tempfile
+import threading
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit, QTextEdit, QDateEdit, QTabWidget,
-    QMessageBox, QFileDialog, QComboBox
+    QMessageBox, QFileDialog, QComboBox, QProgressBar, QSpinBox, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView
 )
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import Qt, QDate, QUrl, QCoreApplication
+from PySide6.QtWebChannel import QWebChannel
+from PySide6.QtCore import Qt, QDate, QUrl, QCoreApplication, QObject, QThread, Signal, Slot
 from PySide6.QtGui import QFont
-import pandas as pd
 from datetime import datetime
 
 # Import our analysis core
 try:
-    from analysis_core import generate_portfolio_analysis, generate_comparison_plot
+    from analysis_core import (IncrementalAnalyzer, ComparisonPlotCache, AnalysisCancelled, build_monte_carlo_figure,
+                               figure_to_json)
+    from montecarlo import run_monte_carlo, monte_carlo_summary, SIMULATION_METHODS
+    from transaction_store import TransactionStore
+    from live import LiveValuation, LiveSession, ReplayFeed, format_snapshot
+    from profiling import Profiler, span, timings_frame
+    from downsample import DEFAULT_MAX_POINTS
+    from columnar_export import write_results_tables
 except ImportError:
     print("Error: analysis_core.py not found. Make sure it's in the same directory.")
     sys.exit(1)
 
 
+# Comparison periods offered in the dropdown: (label, period passed to generate_comparison_plot)
+PERIOD_OPTIONS = [
+    ("General (Since Beginning)", "General"),
+    ("YTD (Year to Date)", "YTD"),
+    ("QTD (Quarter to Date)", "QTD"),
+    ("MTD (Month to Date)", "MTD"),
+    ("Trailing 1 Year", "1Y"),
+    ("Trailing 6 Months", "6M"),
+    ("Trailing 3 Months", "3M"),
+    ("Trailing 1 Month", "1M")
+]
+CUSTOM_PERIOD = "Custom"
+
+# Live valuation: seconds between GUI updates and between replayed ticks
+LIVE_THROTTLE = 0.25
+LIVE_TICK_INTERVAL = 0.002
+
+# Points drawn per chart trace; longer series are downsampled and resampled on zoom
+CHART_MAX_POINTS = DEFAULT_MAX_POINTS
+
+# Chart rendering options: (label, analysis_core render mode)
+RENDER_MODE_OPTIONS = [
+    ("Auto", "auto"),
+    ("SVG", "svg"),
+    ("WebGL", "webgl")
+]
+
+
+def gpu_disabled():
+    """Whether QtWebEngine runs without the GPU (main() always passes --disable-gpu)"""
+    return '--disable-gpu' in sys.argv
+
+
+def chart_render_mode(mode):
+    """
+    Render mode used for the charts when `mode` is selected.
+    
+    Without the GPU, WebGL traces depend on QtWebEngine's software GL
+    fallback, which may draw them blank, so 'auto' stays on SVG then; an
+    explicit 'webgl' is still honoured.
+    """
+    return 'svg' if mode == 'auto' and gpu_disabled() else mode
+
+# Local page every chart view loads once; figures are then drawn into it with Plotly.react.
+# Zooming reports the new x range over the web channel so downsampled traces can be refilled.
+CHART_HOST_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="plotly.min.js"></script>
+<script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+<style>html, body { margin: 0; } #chart { width: 100%; }</style>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+var bridge = null;
+var revision = 0;
+var listening = false;
+if (typeof QWebChannel !== 'undefined' && typeof qt !== 'undefined') {
+    new QWebChannel(qt.webChannelTransport, function(channel) { bridge = channel.objects.bridge; });
+}
+function onRelayout(event) {
+    if (!bridge) return;
+    for (var key in event) {
+        var match = key.match(/^xaxis[0-9]*[.](range\\[0\\]|range|autorange)$/);
+        if (!match) continue;
+        if (match[1] === 'autorange') {
+            bridge.relayout(revision, '', '');
+        } else {
+            var range = match[1] === 'range' ? event[key] : [event[key], event[key.replace('[0]', '[1]')]];
+            bridge.relayout(revision, String(range[0]), String(range[1]));
+        }
+        return;
+    }
+}
+function renderFigure(fig, figureRevision) {
+    revision = figureRevision;
+    Plotly.react('chart', fig.data, fig.layout, {responsive: true}).then(function(gd) {
+        if (!listening) {
+            gd.on('plotly_relayout', onRelayout);
+            listening = true;
+        }
+    });
+}
+function applyResample(payload, figureRevision) {
+    if (figureRevision === revision && payload.traces.length) {
+        Plotly.restyle('chart', payload.update, payload.traces);
+    }
+}
+</script>
+</body>
+</html>
+"""
+
+
+def chart_host_page():
+    """Write the chart host page and bundled plotly.js to a local directory once and return the page path"""
+    import plotly
+    from plotly.offline import get_plotlyjs
+    
+    host_dir = os.path.join(tempfile.gettempdir(), f'smic_chart_host_{plotly.__version__}')
+    page_path = os.path.join(host_dir, 'chart_host.html')
+    if not os.path.exists(page_path):
+        os.makedirs(host_dir, exist_ok=True)
+        with open(os.path.join(host_dir, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+        with open(page_path, 'w', encoding='utf-8') as f:
+            f.write(CHART_HOST_HTML)
+    return page_path
+
+
+class ChartBridge(QObject):
+    """Object the chart page calls over the web channel when the x axis is zoomed"""
+    
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+    
+    @Slot(int, str, str)
+    def relayout(self, revision, x0, x1):
+        self.view.resample(revision, x0 or None, x1 or None)
+
+
+class ChartView(QWebEngineView):
+    """
+    Web view that loads the local chart page (with bundled plotly.js) once and
+    then updates the chart in place by pushing figure JSON into the page.
+    
+    Figures shown with a FigureResampler are redrawn from their full data
+    whenever the x range changes, so zooming in restores full resolution.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._page_ready = False
+        self._pending_json = None
+        self._resampler = None
+        # Identifies the figure on display, so zoom events of a replaced figure are ignored
+        self._revision = 0
+        self._bridge = ChartBridge(self)
+        self._channel = QWebChannel(self.page())
+        self._channel.registerObject('bridge', self._bridge)
+        self.page().setWebChannel(self._channel)
+        self.loadFinished.connect(self._on_load_finished)
+        self.load(QUrl.fromLocalFile(chart_host_page()))
+    
+    def _on_load_finished(self, ok):
+        self._page_ready = ok
+        if ok and self._pending_json is not None:
+            self._push(self._pending_json)
+            self._pending_json = None
+    
+    def _push(self, fig_json):
+        self.page().runJavaScript(f"renderFigure({fig_json}, {self._revision});")
+    
+    def show_figure(self, fig, resampler=None):
+        """
+        Draw a Plotly figure (or its JSON string) without reloading the page.
+        
+        Args:
+            fig: Figure or JSON to draw
+            resampler: FigureResampler the figure was downsampled with, to
+                resample from when the chart is zoomed
+        """
+        fig_json = fig if isinstance(fig, str) else figure_to_json(fig)
+        self._revision += 1
+        self._resampler = resampler if resampler is not None and resampler.resampled else None
+        if self._page_ready:
+            self._push(fig_json)
+        else:
+            # Page still loading - draw once it is ready
+            self._pending_json = fig_json
+    
+    def resample(self, revision, x0=None, x1=None):
+        """Refill downsampled traces for the x range [x0, x1] (None for the full range)"""
+        if self._resampler is None or revision != self._revision:
+            return
+        try:
+            payload = self._resampler.update_json(x0, x1)
+        except (ValueError, TypeError):
+            # Range not understood (e.g. a category axis); keep the points drawn
+            return
+        self.page().runJavaScript(f"applyResample({payload}, {revision});")
+
+
 class TransactionForm(QWidget):
     """Widget for adding new transactions"""
     
@@ -142,21 +339,9 @@ class TransactionForm(QWidget):
             'amount_invested': float(amount)
         }
         
-        # Check if CSV exists
-        csv_file = 'data/transactions.csv'
-        if os.path.exists(csv_file):
-            df = pd.read_csv(csv_file)
-        else:
-            # Create new DataFrame with headers
-            df = pd.DataFrame(columns=['sector', 'ticker', 'invest_date', 'shares', 
-                                      'purchase_price', 'amount_invested'])
-        
-        # Append new row
-        df = pd.concat([df, pd.DataFrame([row_data])], ignore_index=True)
-        
-        # Save to CSV
+        # Append to the transactions journal (creates the file with headers if needed)
         try:
-            df.to_csv(csv_file, index=False)
+            TransactionStore('data/transactions.csv').append(row_data)
             QMessageBox.information(self, "Success", 
                                   f"Transaction saved successfully!\n\n"
                                   f"Sector: {sector}\n"
@@ -177,6 +362,104 @@ class TransactionForm(QWidget):
         self.amount_input.clear()
 
 
+class AnalysisWorker(QObject):
+    """Runs an IncrementalAnalyzer on a background thread"""
+    
+    progress = Signal(str)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+    # Results are shown but could not be stored for the next launch
+    warning = Signal(str)
+    
+    def __init__(self, analyzer, trace_memory=False, render_mode='auto'):
+        super().__init__()
+        self.analyzer = analyzer
+        self.profiler = Profiler(trace_memory=trace_memory)
+        self.render_mode = render_mode
+        self._cancel_requested = False
+    
+    def cancel(self):
+        """Request cancellation; takes effect at the next analysis stage"""
+        # Called directly from the GUI thread - the worker thread is busy and
+        # would never get to a queued slot call
+        self._cancel_requested = True
+    
+    def _report_stage(self, stage):
+        if self._cancel_requested:
+            raise AnalysisCancelled()
+        self.progress.emit(stage)
+    
+    @Slot()
+    def run(self):
+        try:
+            results = self.analyzer.run(progress=self._report_stage, profiler=self.profiler)
+        except AnalysisCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(results)
+            # Serialize every chart as drawn and persist for the next launch, off the GUI
+            # thread; the chart tabs then only push ready JSON into their pages
+            try:
+                results[1].serialize(max_points=CHART_MAX_POINTS, render_mode=self.render_mode)
+                self.analyzer.save_results(results)
+            except (OSError, pickle.PicklingError, TypeError, ValueError) as e:
+                # Figure encoding, pickling or disk errors only cost the cached copy
+                self.warning.emit(f"{type(e).__name__}: {e}")
+        finally:
+            self.profiler.stop()
+
+
+class MonteCarloWorker(QObject):
+    """Runs a Monte Carlo projection and builds its fan chart on a background thread"""
+    
+    finished = Signal(object)
+    failed = Signal(str)
+    
+    def __init__(self, state, n_paths, horizon, method):
+        super().__init__()
+        self.state = state
+        self.n_paths = n_paths
+        self.horizon = horizon
+        self.method = method
+    
+    @Slot()
+    def run(self):
+        try:
+            projection = run_monte_carlo(self.state, n_paths=self.n_paths, horizon=self.horizon,
+                                         method=self.method)
+            fig_json = figure_to_json(build_monte_carlo_figure(projection))
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit((projection, fig_json))
+
+
+class LiveWorker(QObject):
+    """Runs a LiveSession on a background thread and forwards its throttled snapshots"""
+    
+    updated = Signal(object)
+    finished = Signal()
+    
+    def __init__(self, valuation, feed):
+        super().__init__()
+        # Snapshots are emitted at most every LIVE_THROTTLE seconds, however fast ticks arrive
+        self.session = LiveSession(valuation, feed, self.updated.emit, throttle=LIVE_THROTTLE)
+    
+    def stop(self):
+        """Stop the feed; called directly from the GUI thread like AnalysisWorker.cancel"""
+        self.session.stop()
+    
+    @Slot()
+    def run(self):
+        try:
+            self.session.run()
+        finally:
+            self.finished.emit()
+
+
 class MainWindow(QMainWindow):
     """Main application window"""
     
@@ -186,7 +469,29 @@ class MainWindow(QMainWindow):
         self.summary_df = None
         self.ytd_df = None
         self.returns_data = None
+        # Lazily built figures from the last run and the chart tabs already rendered
+        self.figures = None
+        self.rendered_charts = set()
+        # Spans of chart rendering for the results on display
+        self.render_profiler = Profiler()
+        # SVG or WebGL line traces, see analysis_core.apply_render_mode
+        self.render_mode = chart_render_mode('auto')
+        # Memoized comparison plots for the last run, warmed on a background thread
+        self.comparison_cache = None
+        self.comparison_warm_stop = None
+        # Analyzer kept across runs so appended transactions are applied incrementally
+        self.analyzer = IncrementalAnalyzer('data/transactions.csv')
+        # Background analysis thread and worker while a run is in progress
+        self.analysis_thread = None
+        self.analysis_worker = None
+        # Monte Carlo thread and worker while a projection is running
+        self.projection_thread = None
+        self.projection_worker = None
+        # Live valuation thread and worker while a session is running
+        self.live_thread = None
+        self.live_worker = None
         self.init_ui()
+        self.load_cached_results()
         
     def init_ui(self):
         self.setWindowTitle("SMIC Portfolio Analysis")
@@ -207,6 +512,14 @@ class MainWindow(QMainWindow):
         comparison_tab = self.create_comparison_tab()
         tabs.addTab(comparison_tab, "Returns Comparison")
         
+        # Tab 4: Monte Carlo Projection
+        projection_tab = self.create_projection_tab()
+        tabs.addTab(projection_tab, "Projection")
+        
+        # Tab 5: Live Valuation
+        live_tab = self.create_live_tab()
+        tabs.addTab(live_tab, "Live Valuation")
+        
         self.setCentralWidget(tabs)
         
         # Menu bar
@@ -216,6 +529,9 @@ class MainWindow(QMainWindow):
         open_action = file_menu.addAction('Open Transaction File...')
         open_action.triggered.connect(self.open_transaction_file)
         
+        import_action = file_menu.addAction('Import Transactions...')
+        import_action.triggered.connect(self.import_transactions)
+        
         exit_action = file_menu.addAction('Exit')
         exit_action.triggered.connect(self.close)
         
@@ -236,6 +552,27 @@ class MainWindow(QMainWindow):
         self.run_button.clicked.connect(self.run_analysis)
         controls_layout.addWidget(self.run_button)
         
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_analysis)
+        self.cancel_button.setEnabled(False)  # Enabled while analysis is running
+        controls_layout.addWidget(self.cancel_button)
+        
+        self.profile_memory_check = QCheckBox("Profile memory")
+        self.profile_memory_check.setToolTip("Record peak memory per stage (slower)")
+        controls_layout.addWidget(self.profile_memory_check)
+        
+        controls_layout.addWidget(QLabel("Rendering:"))
+        self.render_mode_combo = QComboBox()
+        for label, mode in RENDER_MODE_OPTIONS:
+            self.render_mode_combo.addItem(label, mode)
+        if gpu_disabled():
+            self.render_mode_combo.setToolTip("Auto draws SVG while the GPU is disabled; "
+                                              "WebGL then relies on software rendering")
+        else:
+            self.render_mode_combo.setToolTip("Auto switches line charts to WebGL when they draw many points")
+        self.render_mode_combo.currentIndexChanged.connect(self.on_render_mode_changed)
+        controls_layout.addWidget(self.render_mode_combo)
+        
         # Export buttons
         self.export_summary_button = QPushButton("Export Summary CSV")
         self.export_summary_button.clicked.connect(self.export_summary)
@@ -247,8 +584,21 @@ class MainWindow(QMainWindow):
         self.export_ytd_button.setEnabled(False)  # Disable until analysis is run
         controls_layout.addWidget(self.export_ytd_button)
         
+        self.export_tables_button = QPushButton("Export Time Series")
+        self.export_tables_button.clicked.connect(self.export_tables)
+        self.export_tables_button.setEnabled(False)  # Disable until analysis is run
+        self.export_tables_button.setToolTip("Write the full time series as Parquet tables for notebooks")
+        controls_layout.addWidget(self.export_tables_button)
+        
         controls_layout.addStretch()
         
+        # Busy indicator shown while analysis runs in the background
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumWidth(150)
+        self.progress_bar.setVisible(False)
+        controls_layout.addWidget(self.progress_bar)
+        
         status_label = QLabel("Status: Ready")
         status_label.setStyleSheet("color: green; font-weight: bold;")
         controls_layout.addWidget(status_label)
@@ -266,6 +616,15 @@ class MainWindow(QMainWindow):
         self.report_text.setReadOnly(True)
         self.report_text.setFont(QFont("Courier", 10))
         left_panel.addWidget(self.report_text)
+        
+        # Per-stage timings of the last run and of chart rendering
+        left_panel.addWidget(QLabel("Last Run Timings:"))
+        self.timings_table = QTableWidget()
+        self.timings_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.timings_table.verticalHeader().setVisible(False)
+        self.timings_table.setMaximumHeight(220)
+        self.timings_table.setFont(QFont("Courier", 9))
+        left_panel.addWidget(self.timings_table)
         results_split.addLayout(left_panel, 1)
         
         # Right side: Charts (tabs for different charts)
@@ -275,30 +634,52 @@ class MainWindow(QMainWindow):
         chart_tabs = QTabWidget()
         
         # Sector Allocation Chart
-        self.sector_chart_view = QWebEngineView()
+        self.sector_chart_view = ChartView()
         self.sector_chart_view.setMinimumSize(600, 500)
         chart_tabs.addTab(self.sector_chart_view, "Sector Allocation")
         
         # Performance Chart
-        self.performance_chart_view = QWebEngineView()
+        self.performance_chart_view = ChartView()
         self.performance_chart_view.setMinimumSize(600, 500)
         chart_tabs.addTab(self.performance_chart_view, "Performance")
         
         # ETF vs Stocks (Area)
-        self.etf_chart_view = QWebEngineView()
+        self.etf_chart_view = ChartView()
         self.etf_chart_view.setMinimumSize(600, 500)
         chart_tabs.addTab(self.etf_chart_view, "ETF vs Stocks (Time)")
         
         # ETF vs Stocks (Bar)
-        self.bar_chart_view = QWebEngineView()
+        self.bar_chart_view = ChartView()
         self.bar_chart_view.setMinimumSize(600, 500)
         chart_tabs.addTab(self.bar_chart_view, "ETF vs Stocks (Final)")
         
         # Weight Drift
-        self.drift_chart_view = QWebEngineView()
+        self.drift_chart_view = ChartView()
         self.drift_chart_view.setMinimumSize(600, 500)
         chart_tabs.addTab(self.drift_chart_view, "Weight Drift")
         
+        # Rolling analytics
+        self.rolling_portfolio_chart_view = ChartView()
+        self.rolling_portfolio_chart_view.setMinimumSize(600, 500)
+        chart_tabs.addTab(self.rolling_portfolio_chart_view, "Rolling (Portfolio)")
+        
+        self.rolling_sectors_chart_view = ChartView()
+        self.rolling_sectors_chart_view.setMinimumSize(600, 500)
+        chart_tabs.addTab(self.rolling_sectors_chart_view, "Rolling (Sectors)")
+        
+        # Figure shown by each chart tab, in tab order
+        self.chart_views = {
+            'sector_allocation': self.sector_chart_view,
+            'performance': self.performance_chart_view,
+            'etf_vs_stocks': self.etf_chart_view,
+            'bar_comparison': self.bar_chart_view,
+            'weight_drift': self.drift_chart_view,
+            'rolling_portfolio': self.rolling_portfolio_chart_view,
+            'rolling_sectors': self.rolling_sectors_chart_view
+        }
+        chart_tabs.currentChanged.connect(self.render_chart_tab)
+        self.chart_tabs = chart_tabs
+        
         right_panel.addWidget(chart_tabs)
         results_split.addLayout(right_panel, 1)
         
@@ -331,19 +712,32 @@ class MainWindow(QMainWindow):
         self.sector_combo.currentTextChanged.connect(self.update_comparison_plot)
         controls_layout.addWidget(self.sector_combo)
         
-        # Period Dropdown
+        # Period Dropdown (semesters are added once the data range is known)
         controls_layout.addWidget(QLabel("Period:"))
         self.period_combo = QComboBox()
-        self.period_combo.addItems(["General (Since Beginning)", "YTD (Year to Date)"])
-        self.period_combo.currentTextChanged.connect(self.update_comparison_plot)
+        self.populate_period_combo([])
+        self.period_combo.currentIndexChanged.connect(self.on_period_changed)
         controls_layout.addWidget(self.period_combo)
         
+        # Custom date range (only visible for Custom Range)
+        self.custom_start_edit = QDateEdit()
+        self.custom_end_edit = QDateEdit()
+        for date_edit, default in ((self.custom_start_edit, QDate.currentDate().addMonths(-3)),
+                                   (self.custom_end_edit, QDate.currentDate())):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("yyyy-MM-dd")
+            date_edit.setDate(default)
+            date_edit.dateChanged.connect(self.update_comparison_plot)
+            date_edit.setVisible(False)
+        controls_layout.addWidget(self.custom_start_edit)
+        controls_layout.addWidget(self.custom_end_edit)
+        
         controls_layout.addStretch()
         
         layout.addLayout(controls_layout)
         
         # Chart view
-        self.comparison_chart_view = QWebEngineView()
+        self.comparison_chart_view = ChartView()
         self.comparison_chart_view.setMinimumSize(1200, 700)
         layout.addWidget(self.comparison_chart_view)
         
@@ -355,6 +749,124 @@ class MainWindow(QMainWindow):
         widget.setLayout(layout)
         return widget
     
+    def create_projection_tab(self):
+        """Create the Monte Carlo projection tab with simulation controls and the fan chart"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+        
+        # Controls section
+        controls_layout = QHBoxLayout()
+        
+        controls_layout.addWidget(QLabel("Paths:"))
+        self.projection_paths_spin = QSpinBox()
+        self.projection_paths_spin.setRange(100, 100000)
+        self.projection_paths_spin.setSingleStep(1000)
+        self.projection_paths_spin.setValue(10000)
+        controls_layout.addWidget(self.projection_paths_spin)
+        
+        controls_layout.addWidget(QLabel("Horizon:"))
+        self.projection_horizon_spin = QSpinBox()
+        self.projection_horizon_spin.setRange(5, 1260)
+        self.projection_horizon_spin.setValue(252)
+        self.projection_horizon_spin.setSuffix(" trading days")
+        controls_layout.addWidget(self.projection_horizon_spin)
+        
+        controls_layout.addWidget(QLabel("Method:"))
+        self.projection_method_combo = QComboBox()
+        self.projection_method_combo.addItems(SIMULATION_METHODS)
+        controls_layout.addWidget(self.projection_method_combo)
+        
+        self.projection_button = QPushButton("Run Projection")
+        self.projection_button.clicked.connect(self.run_projection)
+        controls_layout.addWidget(self.projection_button)
+        
+        controls_layout.addStretch()
+        
+        self.projection_status_label = QLabel("")
+        controls_layout.addWidget(self.projection_status_label)
+        
+        layout.addLayout(controls_layout)
+        
+        # Fan chart and terminal statistics side by side
+        results_layout = QHBoxLayout()
+        self.projection_chart_view = ChartView()
+        self.projection_chart_view.setMinimumSize(900, 600)
+        results_layout.addWidget(self.projection_chart_view, 3)
+        self.projection_text = QTextEdit()
+        self.projection_text.setReadOnly(True)
+        self.projection_text.setFont(QFont("Courier", 10))
+        results_layout.addWidget(self.projection_text, 1)
+        layout.addLayout(results_layout)
+        
+        # Info label
+        info_label = QLabel("Note: Simulates the current holdings from the daily returns of the last analysis")
+        info_label.setStyleSheet("color: gray; font-style: italic;")
+        layout.addWidget(info_label)
+        
+        widget.setLayout(layout)
+        return widget
+    
+    def create_live_tab(self):
+        """Create the live valuation tab with replay controls and the running valuation"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+        
+        # Controls section
+        controls_layout = QHBoxLayout()
+        
+        controls_layout.addWidget(QLabel("Replay last"))
+        self.live_days_spin = QSpinBox()
+        self.live_days_spin.setRange(1, 252)
+        self.live_days_spin.setValue(21)
+        self.live_days_spin.setSuffix(" days")
+        controls_layout.addWidget(self.live_days_spin)
+        
+        self.live_start_button = QPushButton("Start Replay")
+        self.live_start_button.clicked.connect(self.start_live)
+        controls_layout.addWidget(self.live_start_button)
+        
+        self.live_stop_button = QPushButton("Stop")
+        self.live_stop_button.clicked.connect(self.stop_live)
+        self.live_stop_button.setEnabled(False)  # Enabled while a session is running
+        controls_layout.addWidget(self.live_stop_button)
+        
+        controls_layout.addStretch()
+        layout.addLayout(controls_layout)
+        
+        self.live_text = QTextEdit()
+        self.live_text.setReadOnly(True)
+        self.live_text.setFont(QFont("Courier", 10))
+        layout.addWidget(self.live_text)
+        
+        # Info label
+        info_label = QLabel("Note: Replays recorded prices of the last analysis with the current holdings held fixed")
+        info_label.setStyleSheet("color: gray; font-style: italic;")
+        layout.addWidget(info_label)
+        
+        widget.setLayout(layout)
+        return widget
+    
+    def populate_period_combo(self, semesters):
+        """Fill the period dropdown, keeping the current selection if it is still offered"""
+        current = self.period_combo.currentData()
+        self.period_combo.blockSignals(True)
+        self.period_combo.clear()
+        for label, period in PERIOD_OPTIONS:
+            self.period_combo.addItem(label, period)
+        for semester in semesters:
+            self.period_combo.addItem(f"Semester: {semester}", semester)
+        self.period_combo.addItem("Custom Range", CUSTOM_PERIOD)
+        index = self.period_combo.findData(current)
+        self.period_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.period_combo.blockSignals(False)
+    
+    def on_period_changed(self):
+        """Show the date pickers for a custom range and redraw the comparison plot"""
+        custom = self.period_combo.currentData() == CUSTOM_PERIOD
+        self.custom_start_edit.setVisible(custom)
+        self.custom_end_edit.setVisible(custom)
+        self.update_comparison_plot()
+    
     def update_comparison_plot(self):
         """Update the comparison plot based on dropdown selections"""
         if self.returns_data is None:
@@ -363,7 +875,6 @@ class MainWindow(QMainWindow):
         try:
             # Get selections
             comparison_type_text = self.comparison_type_combo.currentText()
-            period_text = self.period_combo.currentText()
             sector_text = self.sector_combo.currentText()
             
             # Map UI text to function parameters
@@ -374,104 +885,340 @@ class MainWindow(QMainWindow):
                 comparison_type = "Equity_vs_SP500"
                 sector = None
             
-            if period_text == "General (Since Beginning)":
-                period = "General"
-            else:  # "YTD (Year to Date)"
-                period = "YTD"
+            period = self.period_combo.currentData()
+            if period == CUSTOM_PERIOD:
+                if self.custom_start_edit.date() >= self.custom_end_edit.date():
+                    return
+                period = (self.custom_start_edit.date().toString("yyyy-MM-dd"),
+                          self.custom_end_edit.date().toString("yyyy-MM-dd"))
             
-            # Generate plot with transaction dates
-            transaction_dates = self.returns_data.get('transaction_dates', {})
-            fig = generate_comparison_plot(
-                self.returns_data,
-                sector=sector,
-                comparison_type=comparison_type,
-                period=period,
-                transaction_dates=transaction_dates
-            )
-            
-            # Display plot
-            html = fig.to_html(include_plotlyjs='cdn')
-            self.comparison_chart_view.setHtml(html, QUrl())
-            QApplication.processEvents()
+            with self.render_profiler.activate(), span('render:comparison'):
+                # Fetch the memoized plot (built now if warming has not reached it yet)
+                fig_json = self.comparison_cache.get_json(comparison_type, sector, period)
+                
+                # Display plot (updates the loaded chart page in place)
+                self.comparison_chart_view.show_figure(fig_json)
+            self.show_timings()
             
         except Exception as e:
             QMessageBox.warning(self, "Plot Update Error", 
                               f"Could not update comparison plot: {str(e)}")
     
     def run_analysis(self):
-        """Run the portfolio analysis"""
+        """Start the portfolio analysis on a background thread"""
+        # Projections and live sessions read the analyzer's state, which a run updates in place
+        if self.analysis_thread is not None or self.projection_thread is not None or self.live_thread is not None:
+            return
+        
+        # Check if transaction file exists
+        if not os.path.exists('data/transactions.csv'):
+            QMessageBox.warning(self, "File Not Found", 
+                              "Transaction file not found: data/transactions.csv\n\n"
+                              "Please add transactions first.")
+            self.status_label.setText("Status: Error - No transaction file")
+            self.status_label.setStyleSheet("color: red; font-weight: bold;")
+            return
+        
         self.status_label.setText("Status: Running analysis...")
         self.status_label.setStyleSheet("color: orange; font-weight: bold;")
-        self.run_button.setEnabled(False)
-        QApplication.processEvents()
+        self.status_label.setToolTip("")
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setVisible(True)
         
+        self.analysis_thread = QThread(self)
+        self.analysis_worker = AnalysisWorker(self.analyzer, self.profile_memory_check.isChecked(), self.render_mode)
+        self.analysis_worker.moveToThread(self.analysis_thread)
+        self.analysis_thread.started.connect(self.analysis_worker.run)
+        self.analysis_worker.progress.connect(self.on_analysis_progress)
+        self.analysis_worker.finished.connect(self.on_analysis_finished)
+        self.analysis_worker.failed.connect(self.on_analysis_failed)
+        self.analysis_worker.cancelled.connect(self.on_analysis_cancelled)
+        self.analysis_worker.warning.connect(self.on_analysis_warning)
+        for signal in (self.analysis_worker.finished, self.analysis_worker.failed,
+                       self.analysis_worker.cancelled):
+            signal.connect(self.analysis_thread.quit)
+        self.analysis_thread.finished.connect(self.analysis_worker.deleteLater)
+        self.analysis_thread.finished.connect(self.analysis_thread.deleteLater)
+        self.analysis_thread.finished.connect(self.on_analysis_thread_finished)
+        self.analysis_thread.start()
+        self.update_run_controls()
+    
+    def cancel_analysis(self):
+        """Ask the running analysis to stop"""
+        if self.analysis_worker is not None:
+            self.analysis_worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.status_label.setText("Status: Cancelling...")
+    
+    def on_analysis_progress(self, stage):
+        """Show the stage the background analysis is working on"""
+        self.status_label.setText(f"Status: {stage}...")
+    
+    def on_analysis_finished(self, results):
+        """Display results delivered by the background analysis"""
+        report_text, figures, summary_df, ytd_df, returns_data = results
+        
+        # Store dataframes and returns data for export
+        self.summary_df = summary_df
+        self.ytd_df = ytd_df
+        self.returns_data = returns_data
+        self.start_comparison_cache(returns_data)
+        self.export_summary_button.setEnabled(True)
+        self.export_ytd_button.setEnabled(True)
+        self.export_tables_button.setEnabled(True)
+        
+        # Update sector dropdown with available sectors
+        if returns_data and 'sector_returns' in returns_data:
+            available_sectors = list(returns_data['sector_returns'].keys())
+            self.sector_combo.blockSignals(True)
+            self.sector_combo.clear()
+            self.sector_combo.addItems(available_sectors)
+            self.sector_combo.blockSignals(False)
+        
+        # Offer the semesters covered by the data and bound the custom range to it
+        if returns_data and 'period_returns' in returns_data:
+            period_returns = returns_data['period_returns']
+            self.populate_period_combo(period_returns.semesters())
+            first, last = period_returns.growth.index[0], period_returns.growth.index[-1]
+            for date_edit in (self.custom_start_edit, self.custom_end_edit):
+                date_edit.blockSignals(True)
+                date_edit.setDateRange(QDate(first.year, first.month, first.day),
+                                       QDate(last.year, last.month, last.day))
+                date_edit.blockSignals(False)
+        
+        # Display report
+        self.report_text.setPlainText(report_text)
+        
+        # Display charts - only the open tab is rendered now, the rest on first view
+        self.figures = figures
+        self.rendered_charts = set()
+        self.render_profiler = Profiler()
+        self.render_chart_tab(self.chart_tabs.currentIndex())
+        self.show_timings()
+        
+        self.status_label.setText("Status: Analysis complete!")
+        self.status_label.setStyleSheet("color: green; font-weight: bold;")
+        
+        # Update comparison plot if returns data is available
+        if self.returns_data is not None:
+            self.update_comparison_plot()
+    
+    def render_chart_tab(self, index):
+        """Build and display the figure for a chart tab the first time it is opened"""
+        if self.figures is None:
+            return
+        chart_view = self.chart_tabs.widget(index)
+        fig_name = next((name for name, view in self.chart_views.items() if view is chart_view), None)
+        if fig_name is None or fig_name in self.rendered_charts or fig_name not in self.figures:
+            return
         try:
-            # Check if transaction file exists
-            if not os.path.exists('data/transactions.csv'):
-                QMessageBox.warning(self, "File Not Found", 
-                                  "Transaction file not found: data/transactions.csv\n\n"
-                                  "Please add transactions first.")
-                self.status_label.setText("Status: Error - No transaction file")
-                self.status_label.setStyleSheet("color: red; font-weight: bold;")
-                self.run_button.setEnabled(True)
-                return
-            
-            # Run analysis
-            report_text, figures, summary_df, ytd_df, returns_data = generate_portfolio_analysis('data/transactions.csv')
-            
-            # Store dataframes and returns data for export
-            self.summary_df = summary_df
-            self.ytd_df = ytd_df
-            self.returns_data = returns_data
-            self.export_summary_button.setEnabled(True)
-            self.export_ytd_button.setEnabled(True)
-            
-            # Update sector dropdown with available sectors
-            if returns_data and 'sector_returns' in returns_data:
-                available_sectors = list(returns_data['sector_returns'].keys())
-                self.sector_combo.clear()
-                self.sector_combo.addItems(available_sectors)
-            
-            # Display report
-            self.report_text.setPlainText(report_text)
-            
-            # Display charts - ensure they load properly
-            chart_views = {
-                'sector_allocation': self.sector_chart_view,
-                'performance': self.performance_chart_view,
-                'etf_vs_stocks': self.etf_chart_view,
-                'bar_comparison': self.bar_chart_view,
-                'weight_drift': self.drift_chart_view
-            }
-            
-            for fig_name, chart_view in chart_views.items():
-                if fig_name in figures:
-                    try:
-                        html = figures[fig_name].to_html(include_plotlyjs='cdn')
-                        # Use setHtml with empty QUrl for CDN resources (CDN loads via HTTP)
-                        chart_view.setHtml(html, QUrl())
-                        QApplication.processEvents()  # Allow GUI to update
-                    except Exception as e:
-                        # Silently continue if one chart fails, but log it
-                        QMessageBox.warning(self, "Chart Load Warning", 
-                                          f"Could not load {fig_name} chart: {str(e)}")
-            
-            self.status_label.setText("Status: Analysis complete!")
-            self.status_label.setStyleSheet("color: green; font-weight: bold;")
-            
-            # Update comparison plot if returns data is available
-            if self.returns_data is not None:
-                self.update_comparison_plot()
-            
+            with self.render_profiler.activate(), span(f'render:{fig_name}'):
+                chart_view.show_figure(self.figures.display_json(fig_name, CHART_MAX_POINTS, self.render_mode),
+                                       self.figures.resampled(fig_name, CHART_MAX_POINTS))
+            self.rendered_charts.add(fig_name)
+            self.show_timings()
         except Exception as e:
-            error_msg = f"Error running analysis:\n\n{str(e)}"
-            QMessageBox.critical(self, "Analysis Error", error_msg)
-            self.status_label.setText("Status: Error occurred")
-            self.status_label.setStyleSheet("color: red; font-weight: bold;")
-            self.report_text.setPlainText(error_msg)
+            QMessageBox.warning(self, "Chart Load Warning", 
+                              f"Could not load {fig_name} chart: {str(e)}")
+    
+    def show_timings(self):
+        """Fill the timings panel with the spans of the last run followed by chart rendering"""
+        run = timings_frame(self.returns_data.get('timings', []) if self.returns_data else [])
+        rendering = timings_frame(self.render_profiler.records)
+        # Memory columns appear when the run was profiled with memory tracing
+        columns = list(run.columns) if len(run.columns) >= len(rendering.columns) else list(rendering.columns)
+        rows = [row for frame in (run, rendering) for row in frame.to_dict('records')]
         
-        finally:
-            self.run_button.setEnabled(True)
+        self.timings_table.clear()
+        self.timings_table.setRowCount(len(rows))
+        self.timings_table.setColumnCount(len(columns))
+        self.timings_table.setHorizontalHeaderLabels(columns)
+        for row, record in enumerate(rows):
+            for col, column in enumerate(columns):
+                value = record.get(column)
+                text = value if isinstance(value, str) else ('' if value is None else f"{value:,.1f}")
+                item = QTableWidgetItem(text)
+                if not isinstance(value, str):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.timings_table.setItem(row, col, item)
+        self.timings_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    
+    def on_render_mode_changed(self, index):
+        """Redraw the charts on display with the chosen rendering"""
+        self.render_mode = chart_render_mode(self.render_mode_combo.itemData(index))
+        if self.returns_data is None:
+            return
+        self.rendered_charts = set()
+        self.render_chart_tab(self.chart_tabs.currentIndex())
+        self.start_comparison_cache(self.returns_data)
+        self.update_comparison_plot()
+    
+    def start_comparison_cache(self, returns_data):
+        """Replace the comparison plot cache and warm every combination in the background"""
+        if self.comparison_warm_stop is not None:
+            self.comparison_warm_stop.set()
+        self.comparison_cache = ComparisonPlotCache(returns_data, self.render_mode)
+        self.comparison_warm_stop = threading.Event()
+        threading.Thread(target=self.comparison_cache.warm,
+                         args=(self.comparison_warm_stop.is_set,), daemon=True).start()
+    
+    def load_cached_results(self):
+        """Show the stored results of the last run if transactions and prices are unchanged"""
+        try:
+            cached = self.analyzer.load_cached_results()
+        except Exception:
+            cached = None
+        if cached is not None:
+            self.on_analysis_finished(cached)
+            self.status_label.setText("Status: Loaded results of the last run")
+    
+    def on_analysis_failed(self, message):
+        """Report an error raised by the background analysis"""
+        error_msg = f"Error running analysis:\n\n{message}"
+        QMessageBox.critical(self, "Analysis Error", error_msg)
+        self.status_label.setText("Status: Error occurred")
+        self.status_label.setStyleSheet("color: red; font-weight: bold;")
+        self.report_text.setPlainText(error_msg)
+    
+    def on_analysis_warning(self, message):
+        """Report that the finished run could not be stored in the result cache"""
+        print(f"Warning: results not stored for the next launch: {message}", file=sys.stderr)
+        self.status_label.setText("Status: Analysis complete (results not stored for the next launch)")
+        self.status_label.setStyleSheet("color: orange; font-weight: bold;")
+        self.status_label.setToolTip(message)
+    
+    def on_analysis_cancelled(self):
+        """Restore the idle state after a cancelled run"""
+        self.status_label.setText("Status: Analysis cancelled")
+        self.status_label.setStyleSheet("color: gray; font-weight: bold;")
+    
+    def on_analysis_thread_finished(self):
+        """Release the finished worker thread and re-enable controls"""
+        self.analysis_thread = None
+        self.analysis_worker = None
+        self.update_run_controls()
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setVisible(False)
+    
+    def run_projection(self):
+        """Start a Monte Carlo projection of the analysed holdings on a background thread"""
+        if self.projection_thread is not None or self.analysis_thread is not None:
+            return
+        state = self.analyzer.state
+        if state is None:
+            QMessageBox.information(self, "Projection", "Run the analysis first to load holdings and prices.")
+            return
+        
+        self.projection_status_label.setText("Simulating...")
+        self.projection_thread = QThread(self)
+        self.projection_worker = MonteCarloWorker(state, self.projection_paths_spin.value(),
+                                                  self.projection_horizon_spin.value(),
+                                                  self.projection_method_combo.currentText())
+        self.projection_worker.moveToThread(self.projection_thread)
+        self.projection_thread.started.connect(self.projection_worker.run)
+        self.projection_worker.finished.connect(self.on_projection_finished)
+        self.projection_worker.failed.connect(self.on_projection_failed)
+        for signal in (self.projection_worker.finished, self.projection_worker.failed):
+            signal.connect(self.projection_thread.quit)
+        self.projection_thread.finished.connect(self.projection_worker.deleteLater)
+        self.projection_thread.finished.connect(self.projection_thread.deleteLater)
+        self.projection_thread.finished.connect(self.on_projection_thread_finished)
+        self.projection_thread.start()
+        self.update_run_controls()
+    
+    def on_projection_finished(self, result):
+        """Show the fan chart and terminal statistics of a finished projection"""
+        projection, fig_json = result
+        self.projection_chart_view.show_figure(fig_json)
+        self.projection_text.setPlainText(monte_carlo_summary(projection).to_string(index=False))
+        self.projection_status_label.setText(
+            f"P(beat S&P 500) = {projection['prob_beat_benchmark'] * 100:.1f}%")
+    
+    def on_projection_failed(self, message):
+        """Report an error raised by the projection"""
+        self.projection_status_label.setText("Projection failed")
+        QMessageBox.warning(self, "Projection Error", f"Error running projection:\n\n{message}")
+    
+    def on_projection_thread_finished(self):
+        """Release the finished projection thread and re-enable controls"""
+        self.projection_thread = None
+        self.projection_worker = None
+        self.update_run_controls()
+    
+    def start_live(self):
+        """Replay the last days of recorded prices through a live valuation session"""
+        if self.live_thread is not None or self.analysis_thread is not None:
+            return
+        state = self.analyzer.state
+        if state is None:
+            QMessageBox.information(self, "Live Valuation", "Run the analysis first to load holdings and prices.")
+            return
+        
+        px = state.px
+        days = min(self.live_days_spin.value(), len(px.index) - 1)
+        if days < 1:
+            return
+        valuation = LiveValuation.from_state(state, as_of=px.index[-days - 1])
+        feed = ReplayFeed(px.iloc[-days:], tick_interval=LIVE_TICK_INTERVAL)
+        self.live_text.setPlainText(format_snapshot(valuation.snapshot()))
+        
+        self.live_thread = QThread(self)
+        self.live_worker = LiveWorker(valuation, feed)
+        self.live_worker.moveToThread(self.live_thread)
+        self.live_thread.started.connect(self.live_worker.run)
+        self.live_worker.updated.connect(self.on_live_update)
+        self.live_worker.finished.connect(self.live_thread.quit)
+        self.live_thread.finished.connect(self.live_worker.deleteLater)
+        self.live_thread.finished.connect(self.live_thread.deleteLater)
+        self.live_thread.finished.connect(self.on_live_thread_finished)
+        self.live_stop_button.setEnabled(True)
+        self.live_thread.start()
+        self.update_run_controls()
+    
+    def stop_live(self):
+        """Stop the running live session"""
+        if self.live_worker is not None:
+            self.live_worker.stop()
+            self.live_stop_button.setEnabled(False)
+    
+    def on_live_update(self, snapshot):
+        """Show a throttled snapshot from the live session"""
+        self.live_text.setPlainText(format_snapshot(snapshot))
+    
+    def on_live_thread_finished(self):
+        """Release the finished live thread and re-enable controls"""
+        self.live_thread = None
+        self.live_worker = None
+        self.update_run_controls()
+        self.live_stop_button.setEnabled(False)
+    
+    def update_run_controls(self):
+        """
+        Enable the buttons that start background work.
+        
+        A run updates the analyzer's PortfolioState in place, while
+        projections and live sessions read it from their own threads, so an
+        analysis never runs at the same time as either of them.
+        """
+        analysing = self.analysis_thread is not None
+        self.run_button.setEnabled(not analysing and self.projection_thread is None and self.live_thread is None)
+        self.projection_button.setEnabled(not analysing and self.projection_thread is None)
+        self.live_start_button.setEnabled(not analysing and self.live_thread is None)
+    
+    def closeEvent(self, event):
+        """Stop running background work before the window closes"""
+        if self.analysis_thread is not None:
+            self.analysis_worker.cancel()
+            self.analysis_thread.quit()
+            self.analysis_thread.wait()
+        if self.live_thread is not None:
+            self.live_worker.stop()
+            self.live_thread.quit()
+            self.live_thread.wait()
+        if self.projection_thread is not None:
+            self.projection_thread.quit()
+            self.projection_thread.wait()
+        super().closeEvent(event)
     
     def open_transaction_file(self):
         """Open a different transaction file"""
@@ -483,6 +1230,18 @@ class MainWindow(QMainWindow):
                                   f"Selected file: {file_path}\n\n"
                                   "Note: The analysis will use this file when you click 'Run Analysis'.")
     
+    def import_transactions(self):
+        """Append every transaction from another CSV file to the journal"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Import Transactions", "", "CSV Files (*.csv)")
+        if file_path:
+            try:
+                count = TransactionStore('data/transactions.csv').import_csv(file_path)
+                QMessageBox.information(self, "Import Complete", 
+                                      f"Imported {count} transactions from {file_path}")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to import transactions:\n{str(e)}")
+    
     def show_about(self):
         """Show about dialog"""
         QMessageBox.about(self, "About SMIC Portfolio Analysis",
@@ -517,6 +1276,19 @@ class MainWindow(QMainWindow):
                     QMessageBox.information(self, "Success", f"YTD report exported to {file_path}")
                 except Exception as e:
                     QMessageBox.critical(self, "Error", f"Failed to export file: {e}")
+    
+    def export_tables(self):
+        """Saves the full time series of the last run as Parquet tables in a directory"""
+        if self.returns_data is not None:
+            directory = QFileDialog.getExistingDirectory(self, "Export Time Series To", "data")
+            if directory:
+                results = (None, self.figures, self.summary_df, self.ytd_df, self.returns_data)
+                try:
+                    # Results loaded from the cache carry no positions, so the per-ticker tables are left out
+                    written = write_results_tables(results, directory, 'parquet', state=self.analyzer.state)
+                    QMessageBox.information(self, "Success", f"Exported {len(written)} tables to {directory}")
+                except Exception as e:
+                    QMessageBox.critical(self, "Error", f"Failed to export tables: {e}")
 
 
 def main():
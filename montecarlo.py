@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+SMIC Monte Carlo Module
+Forward simulation of portfolio value from the historical daily returns of the holdings
+"""
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+# Defaults: 10k paths over one trading year
+DEFAULT_PATHS = 10000
+DEFAULT_HORIZON = 252
+
+# Percentiles of the fan chart bands, outermost first
+FAN_PERCENTILES = [5, 25, 50, 75, 95]
+
+# Memory budget of one chunk's (paths x days x assets) float64 array; the
+# paths per chunk follow from it, so the working set stays the same size
+# however many assets are held
+DEFAULT_CHUNK_BYTES = 64 * 2 ** 20
+
+SIMULATION_METHODS = ['bootstrap', 'normal']
+
+
+def historical_log_returns(px: pd.DataFrame, lookback: int = None) -> pd.DataFrame:
+    """
+    Daily log returns of a price panel.
+
+    Days on which an asset has no price (not listed yet, gaps) count as no
+    move for that asset, so every row remains a joint observation of all
+    assets that can be resampled as a whole.
+
+    Args:
+        px: Wide price panel (dates x tickers)
+        lookback: Only use the last `lookback` returns (None uses all history)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.log(px / px.shift(1)).iloc[1:]
+    log_returns = log_returns.replace([np.inf, -np.inf], np.nan).fillna(0.0)
+    if lookback is not None:
+        log_returns = log_returns.iloc[-lookback:]
+    return log_returns
+
+
+def chunk_size(horizon: int, n_assets: int, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """Paths per chunk whose (paths x horizon x assets) float64 array fits in `chunk_bytes`"""
+    return max(int(chunk_bytes // (horizon * n_assets * 8)), 1)
+
+
+def normal_moments(log_returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and covariance square root of the 'normal' method.
+
+    Returns:
+        mean (assets,) and root (assets x assets) with root @ root.T equal to
+        the covariance; the symmetric root also works for singular matrices
+    """
+    mean = log_returns.mean(axis=0)
+    eigenvalues, eigenvectors = np.linalg.eigh(np.atleast_2d(np.cov(log_returns, rowvar=False)))
+    root = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+    return mean, root
+
+
+def _simulate_chunk(source, weights: np.ndarray, n_paths: int, horizon: int,
+                    method: str, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Simulate one chunk of paths.
+
+    Args:
+        source: Historical log returns (days x assets) for 'bootstrap', or
+            the (mean, root) from normal_moments() for 'normal'
+        weights: Value of each asset at the start (assets x series); one
+            column per simulated value series (portfolio, benchmark)
+        n_paths: Paths in this chunk
+        horizon: Trading days to simulate
+        method: 'bootstrap' resamples whole historical days, 'normal' draws
+            from a multivariate normal with the historical mean and covariance
+        seed: Independent seed of this chunk
+
+    Returns:
+        Simulated values (series x paths x days)
+    """
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        days = rng.integers(0, source.shape[0], size=(n_paths, horizon))
+        steps = source[days]
+    else:
+        mean, root = source
+        steps = mean + rng.standard_normal((n_paths, horizon, len(mean))) @ root.T
+    growth = np.exp(np.cumsum(steps, axis=1, out=steps), out=steps)
+    return np.moveaxis(growth @ weights, -1, 0)
+
+
+def _simulate_chunk_args(args: Tuple) -> np.ndarray:
+    return _simulate_chunk(*args)
+
+
+def simulate_paths(log_returns: np.ndarray, weights: np.ndarray, n_paths: int = DEFAULT_PATHS,
+                   horizon: int = DEFAULT_HORIZON, method: str = 'bootstrap', seed: int = None,
+                   chunk_paths: int = None, max_workers: int = 1) -> np.ndarray:
+    """
+    Simulate value paths in chunks, optionally across processes.
+
+    Each chunk draws (chunk x horizon x assets) daily log returns, compounds
+    them along the day axis and values every path with one matrix product,
+    so only one chunk's working set is held at a time. Chunks get
+    independent seeds spawned from `seed`, which makes the result
+    identical for any number of workers. The normal model's moments are
+    computed once and shared by all chunks.
+
+    Args:
+        log_returns: Historical log returns (days x assets)
+        weights: Starting value of each asset per series (assets x series)
+        n_paths: Number of paths
+        horizon: Trading days to simulate
+        method: One of SIMULATION_METHODS
+        seed: Seed for reproducible paths (None draws fresh entropy)
+        chunk_paths: Paths simulated together (None sizes chunks to
+            DEFAULT_CHUNK_BYTES, see chunk_size)
+        max_workers: 1 simulates in-process; more (or None for every CPU)
+            spreads chunks over a process pool
+
+    Returns:
+        Simulated values (series x paths x horizon)
+    """
+    if method not in SIMULATION_METHODS:
+        raise ValueError(f"Unknown simulation method: {method}")
+    log_returns = np.ascontiguousarray(log_returns, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if log_returns.shape[0] < 2:
+        raise ValueError("Not enough price history to simulate from")
+
+    if chunk_paths is None:
+        chunk_paths = chunk_size(horizon, log_returns.shape[1])
+    source = log_returns if method == 'bootstrap' else normal_moments(log_returns)
+    sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(source, weights, size, horizon, method, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    if max_workers == 1 or len(tasks) == 1:
+        chunks = [_simulate_chunk_args(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunks = list(executor.map(_simulate_chunk_args, tasks))
+    return np.concatenate(chunks, axis=1)
+
+
+def run_monte_carlo(state, n_paths: int = DEFAULT_PATHS, horizon: int = DEFAULT_HORIZON,
+                    method: str = 'bootstrap', lookback: int = None, seed: int = None,
+                    benchmark_ticker: str = '^GSPC', chunk_paths: int = None,
+                    max_workers: int = 1) -> Dict:
+    """
+    Project the current holdings forward.
+
+    The latest units are held fixed and cash stays constant; the benchmark
+    is simulated from the same draws, so both see the same market days.
+
+    Args:
+        state: analysis_core.PortfolioState of the last run
+        n_paths: Number of simulated paths
+        horizon: Trading days to project
+        method: 'bootstrap' (resample historical days) or 'normal'
+        lookback: Trailing days of history to sample from (None uses all)
+        seed: Seed for reproducible results
+        benchmark_ticker: Benchmark ticker
+        chunk_paths: Paths simulated together (None sizes chunks to DEFAULT_CHUNK_BYTES)
+        max_workers: Worker processes (1 runs in-process)
+
+    Returns:
+        Dictionary with:
+            'dates': Projected business dates
+            'history': Past portfolio value (dates of the run)
+            'initial_value': Portfolio value at the last date
+            'percentiles': Portfolio value percentiles (dates x FAN_PERCENTILES)
+            'benchmark_percentiles': Benchmark value percentiles, scaled to
+                the same starting value
+            'terminal_values': Final portfolio value of every path
+            'terminal_returns': Final return (%) of the portfolio for every path
+            'benchmark_terminal_returns': Final benchmark return (%) per path
+            'prob_beat_benchmark': Share of paths where the portfolio
+                outperforms the benchmark over the horizon
+            'prob_loss': Share of paths ending below the initial value
+    """
+    px = state.px
+    if benchmark_ticker not in px.columns:
+        raise ValueError(f"No prices for benchmark {benchmark_ticker}")
+    cash = state.df[state.df['sector'] == 'Cash']['amount_invested'].sum()
+    units = state.units.iloc[-1].reindex(px.columns).fillna(0.0)
+    last_prices = px.ffill().iloc[-1]
+
+    # Simulate only the held assets plus the benchmark
+    position_value = (units * last_prices).fillna(0.0)
+    held = [ticker for ticker in px.columns if position_value[ticker] != 0.0]
+    assets: List[str] = held + ([benchmark_ticker] if benchmark_ticker not in held else [])
+    invested = float(position_value[held].sum())
+    initial_value = invested + cash
+
+    weights = np.zeros((len(assets), 2))
+    weights[:len(held), 0] = position_value[held].to_numpy()
+    weights[assets.index(benchmark_ticker), 1] = initial_value
+
+    log_returns = historical_log_returns(px[assets], lookback)
+    paths = simulate_paths(log_returns.to_numpy(), weights, n_paths, horizon, method, seed,
+                           chunk_paths, max_workers)
+    portfolio = paths[0] + cash
+    benchmark = paths[1]
+
+    dates = pd.bdate_range(px.index[-1] + pd.offsets.BDay(1), periods=horizon)
+    columns = [f'P{p}' for p in FAN_PERCENTILES]
+    terminal_returns = (portfolio[:, -1] / initial_value - 1) * 100
+    benchmark_terminal_returns = (benchmark[:, -1] / initial_value - 1) * 100
+    return {
+        'dates': dates,
+        'history': state.invested_value + cash,
+        'initial_value': initial_value,
+        'percentiles': pd.DataFrame(np.percentile(portfolio, FAN_PERCENTILES, axis=0).T,
+                                    index=dates, columns=columns),
+        'benchmark_percentiles': pd.DataFrame(np.percentile(benchmark, FAN_PERCENTILES, axis=0).T,
+                                              index=dates, columns=columns),
+        'terminal_values': portfolio[:, -1],
+        'terminal_returns': terminal_returns,
+        'benchmark_terminal_returns': benchmark_terminal_returns,
+        'prob_beat_benchmark': float(np.mean(terminal_returns > benchmark_terminal_returns)),
+        'prob_loss': float(np.mean(portfolio[:, -1] < initial_value)),
+        'n_paths': n_paths,
+        'horizon': horizon,
+        'method': method
+    }
+
+
+def monte_carlo_summary(projection: Dict) -> pd.DataFrame:
+    """Terminal statistics of a projection as a Metric/Value table (like the summary CSV)"""
+    terminal = projection['percentiles'].iloc[-1]
+    rows = [
+        ('Paths', f"{projection['n_paths']:,}"),
+        ('Horizon (trading days)', f"{projection['horizon']}"),
+        ('Method', projection['method']),
+        ('Initial Value', f"${projection['initial_value']:,.2f}")
+    ]
+    rows += [(f'Terminal Value {column}', f"${terminal[column]:,.2f}") for column in terminal.index]
+    rows += [
+        ('Median Return', f"{np.median(projection['terminal_returns']):.2f}%"),
+        ('Median S&P 500 Return', f"{np.median(projection['benchmark_terminal_returns']):.2f}%"),
+        ('Probability of Beating S&P 500', f"{projection['prob_beat_benchmark'] * 100:.1f}%"),
+        ('Probability of Loss', f"{projection['prob_loss'] * 100:.1f}%")
+    ]
+    return pd.DataFrame(rows, columns=['Metric', 'Value'])
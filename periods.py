@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+SMIC Period Returns Module
+Returns over arbitrary windows from stored cumulative growth indices
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Tuple, Union
+
+# Named periods, in the order the GUI offers them
+NAMED_PERIODS = ['General', 'YTD', 'QTD', 'MTD', '1Y', '6M', '3M', '1M']
+
+# Trailing periods as calendar offsets back from the last date
+TRAILING_OFFSETS = {
+    '1Y': pd.DateOffset(years=1),
+    '6M': pd.DateOffset(months=6),
+    '3M': pd.DateOffset(months=3),
+    '1M': pd.DateOffset(months=1)
+}
+
+# Semesters as halves of the calendar year: name -> (first month, last month)
+SEMESTERS = {'Spring': (1, 6), 'Fall': (7, 12)}
+
+# A period is a name from NAMED_PERIODS, a semester such as 'Fall 2024',
+# or a (start, end) pair of dates (either may be None for an open end)
+Period = Union[str, Tuple]
+
+
+def semester_bounds(name: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Start and end date of a semester label such as 'Spring 2025'.
+
+    Raises:
+        ValueError: If the label is not '<Spring|Fall> <year>'
+    """
+    parts = name.split()
+    if len(parts) != 2 or parts[0] not in SEMESTERS or not parts[1].isdigit():
+        raise ValueError(f"Unknown period: {name}")
+    first_month, last_month = SEMESTERS[parts[0]]
+    year = int(parts[1])
+    start = pd.Timestamp(year=year, month=first_month, day=1)
+    end = pd.Timestamp(year=year, month=last_month, day=1) + pd.offsets.MonthEnd(0)
+    return start, end
+
+
+def period_bounds(period: Period, first: pd.Timestamp, last: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Resolve a period to calendar (start, end) dates for data spanning first..last.
+
+    'YTD', 'QTD' and 'MTD' start on the first day of the year, quarter or
+    month of `last`; trailing periods ('1Y', '6M', ...) count back from `last`.
+
+    Raises:
+        ValueError: If the period is not recognized
+    """
+    if isinstance(period, tuple):
+        start, end = period
+        return (pd.Timestamp(start) if start is not None else first,
+                pd.Timestamp(end) if end is not None else last)
+    if period == 'General':
+        return first, last
+    if period == 'YTD':
+        return pd.Timestamp(year=last.year, month=1, day=1), last
+    if period == 'QTD':
+        return pd.Timestamp(year=last.year, month=3 * ((last.month - 1) // 3) + 1, day=1), last
+    if period == 'MTD':
+        return pd.Timestamp(year=last.year, month=last.month, day=1), last
+    if period in TRAILING_OFFSETS:
+        return last - TRAILING_OFFSETS[period], last
+    return semester_bounds(period)
+
+
+def period_label(period: Period) -> str:
+    """Human readable description of a period for chart titles"""
+    if isinstance(period, tuple):
+        start, end = period
+        start_text = pd.Timestamp(start).strftime('%Y-%m-%d') if start is not None else 'Beginning'
+        end_text = pd.Timestamp(end).strftime('%Y-%m-%d') if end is not None else 'Today'
+        return f'{start_text} to {end_text}'
+    labels = {
+        'General': 'Since Beginning', 'YTD': 'YTD', 'QTD': 'QTD', 'MTD': 'MTD',
+        '1Y': 'Trailing 1 Year', '6M': 'Trailing 6 Months', '3M': 'Trailing 3 Months',
+        '1M': 'Trailing 1 Month'
+    }
+    return labels.get(period, period)
+
+
+class PeriodReturns:
+    """
+    Cumulative growth indices of many series, queried for any window.
+
+    The indices are stored once (a value or price level per series). The
+    return of a series over [s, e] is G[e] / G[s] - 1, so a period return
+    for every series costs two row lookups and a cumulative return path
+    costs one division per row of the window. No values are recomputed.
+
+    The base of a window is the last date before its start, i.e. the close
+    the period is measured from (for YTD, the last close of the previous
+    year). A window starting before the data is measured from the first
+    date. A series whose base level is not positive (not funded yet) has
+    zero return over that window.
+    """
+
+    def __init__(self, growth: pd.DataFrame):
+        self.growth = growth
+        self._values = growth.to_numpy(dtype=float)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.growth.columns)
+
+    def window(self, period: Period) -> Tuple[int, int]:
+        """Row positions (base, last) of a period, clamped to the available dates"""
+        index = self.growth.index
+        if len(index) == 0:
+            raise ValueError("No data")
+        start, end = period_bounds(period, index[0], index[-1])
+        base = max(index.searchsorted(start, side='left') - 1, 0)
+        last = index.searchsorted(end, side='right') - 1
+        if last < base:
+            raise ValueError(f"No data in period {period_label(period)}")
+        return base, last
+
+    def _ratio(self, base: int, rows: slice, columns: List[str] = None) -> Tuple[np.ndarray, List[str]]:
+        if columns is None:
+            columns = self.columns
+            values = self._values
+        else:
+            values = self._values[:, self.growth.columns.get_indexer(columns)]
+        base_level = values[base]
+        funded = base_level > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = (values[rows] / np.where(funded, base_level, 1.0) - 1) * 100
+        ratio[:, ~funded] = 0.0
+        return ratio, columns
+
+    def cumulative(self, period: Period, columns: List[str] = None) -> pd.DataFrame:
+        """
+        Cumulative return path (%) of each series from the base of `period`.
+
+        Returns:
+            DataFrame (dates x series) starting at the base date with 0%
+        """
+        base, last = self.window(period)
+        ratio, columns = self._ratio(base, slice(base, last + 1), columns)
+        return pd.DataFrame(ratio, index=self.growth.index[base:last + 1], columns=columns)
+
+    def series(self, column: str, period: Period) -> pd.Series:
+        """Cumulative return path (%) of one series over `period`"""
+        return self.cumulative(period, [column])[column]
+
+    def total(self, period: Period, columns: List[str] = None) -> pd.Series:
+        """Return (%) of every series over `period` from two row lookups"""
+        base, last = self.window(period)
+        ratio, columns = self._ratio(base, slice(last, last + 1), columns)
+        return pd.Series(ratio[0], index=columns)
+
+    def semesters(self) -> List[str]:
+        """Semester labels covered by the data, oldest first"""
+        index = self.growth.index
+        if len(index) == 0:
+            return []
+        labels = []
+        for year in range(index[0].year, index[-1].year + 1):
+            for name in SEMESTERS:
+                start, end = semester_bounds(f'{name} {year}')
+                if start <= index[-1] and end >= index[0]:
+                    labels.append(f'{name} {year}')
+        return labels
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+SMIC Price Cache Module
+Persistent on-disk store of daily Adj Close prices keyed by ticker/date
+"""
+
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+# Days before the end of a cached span that a tail download asks for again:
+# the last bar may have been partial and is replaced, the bars before it are
+# compared with the cache to detect a rewritten Adj Close history
+TAIL_OVERLAP = pd.Timedelta(days=7)
+
+# Relative difference between a cached and a re-downloaded price that counts
+# as a rewritten history rather than rounding
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+class PriceCache:
+    """
+    SQLite-backed price store.
+
+    Prices are kept in a long (ticker, date, adj_close) table. A separate
+    coverage table records the date span that has already been downloaded
+    for each ticker, up to the last price received, so that tickers with
+    gaps (holidays, late listings) are not re-downloaded on every run while
+    failed downloads are retried.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "ticker TEXT NOT NULL, date TEXT NOT NULL, adj_close REAL, "
+                "PRIMARY KEY (ticker, date))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "ticker TEXT PRIMARY KEY, start TEXT NOT NULL, end TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def version(self) -> str:
+        """Counter that changes every time prices are written to the cache"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else '0'
+
+    def coverage(self, tickers: List[str]) -> Dict[str, Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Return the cached span for each ticker.
+
+        Returns:
+            Dictionary mapping ticker to (start, end) where end is exclusive.
+            Tickers that were never fetched are omitted.
+        """
+        result = {}
+        with self._connect() as conn:
+            for i in range(0, len(tickers), _QUERY_CHUNK):
+                chunk = tickers[i:i + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT ticker, start, end FROM coverage WHERE ticker IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for ticker, start, end in rows:
+                    result[ticker] = (pd.Timestamp(start), pd.Timestamp(end))
+        return result
+
+    def missing_ranges(self, tickers: List[str], start: pd.Timestamp,
+                       end: pd.Timestamp) -> Dict[pd.Timestamp, List[str]]:
+        """
+        Work out which tickers need fetching and from which date.
+
+        A ticker with no cached history, or whose history starts after `start`,
+        is fetched in full. Otherwise only the tail since the last covered date
+        is fetched, starting TAIL_OVERLAP earlier so it overlaps the cache
+        (see adjusted_tickers). Tickers are grouped by fetch start so each group can be
+        downloaded in a single batched request.
+
+        Returns:
+            Dictionary mapping fetch start date to the list of tickers to fetch
+            from that date up to `end`.
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        covered = self.coverage(tickers)
+        groups = {}
+        for ticker in tickers:
+            span = covered.get(ticker)
+            if span is None or start < span[0]:
+                fetch_from = start
+            elif span[1] < end:
+                fetch_from = span[1] - TAIL_OVERLAP
+            else:
+                continue
+            groups.setdefault(fetch_from, []).append(ticker)
+        return groups
+
+    def load(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        Load cached prices as a wide DataFrame (dates x tickers).
+
+        Args:
+            tickers: Tickers to load
+            start: First date (inclusive)
+            end: Last date (exclusive)
+        """
+        start_str = pd.Timestamp(start).strftime('%Y-%m-%d')
+        end_str = pd.Timestamp(end).strftime('%Y-%m-%d')
+        frames = []
+        with self._connect() as conn:
+            for i in range(0, len(tickers), _QUERY_CHUNK):
+                chunk = tickers[i:i + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                frames.append(pd.read_sql_query(
+                    f"SELECT ticker, date, adj_close FROM prices "
+                    f"WHERE ticker IN ({placeholders}) AND date >= ? AND date < ?",
+                    conn, params=chunk + [start_str, end_str]
+                ))
+        long_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=['ticker', 'date', 'adj_close'])
+        long_df['date'] = pd.to_datetime(long_df['date'])
+        wide = long_df.pivot(index='date', columns='ticker', values='adj_close')
+        wide = wide.reindex(columns=tickers).sort_index()
+        wide.index.name = 'Date'
+        wide.columns.name = None
+        return wide.astype(float)
+
+    def adjusted_tickers(self, prices: pd.DataFrame) -> List[str]:
+        """
+        Tickers whose downloaded prices disagree with the cached ones.
+
+        Adj Close is back-adjusted: after every dividend or split the source
+        rewrites the whole history, so cached bars no longer line up with
+        newly downloaded ones. Prices are compared on the dates both hold,
+        except each ticker's last cached bar, which may have been partial.
+
+        Args:
+            prices: Wide DataFrame (dates x tickers) just downloaded
+
+        Returns:
+            Tickers whose cached history has to be downloaded again
+        """
+        if prices.empty:
+            return []
+        cached = self.load(list(prices.columns), prices.index.min(),
+                           prices.index.max() + pd.Timedelta(days=1))
+        cached = cached.reindex(prices.index)
+        last_cached = cached.apply(lambda column: column.last_valid_index())
+        adjusted = []
+        for ticker in prices.columns:
+            if pd.isna(last_cached[ticker]):
+                continue
+            both = cached[ticker].notna() & prices[ticker].notna() & (prices.index < last_cached[ticker])
+            if not np.allclose(prices[ticker][both], cached[ticker][both], rtol=ADJUSTMENT_TOLERANCE, atol=0.0):
+                adjusted.append(ticker)
+        return adjusted
+
+    def store(self, prices: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp, replace: bool = False):
+        """
+        Write a wide price frame to the cache and extend coverage.
+
+        Args:
+            prices: Wide DataFrame (dates x tickers) of Adj Close prices
+            start: First date the download was requested for
+            end: End date (exclusive) the download was requested for
+            replace: The download is a ticker's full history; its cached
+                prices and coverage are dropped first (tickers that returned
+                no prices are left untouched)
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        long_df = prices.stack().dropna().reset_index()
+        long_df.columns = ['date', 'ticker', 'adj_close']
+        rows = list(zip(
+            long_df['ticker'].astype(str),
+            pd.to_datetime(long_df['date']).dt.strftime('%Y-%m-%d'),
+            long_df['adj_close'].astype(float)
+        ))
+        # Last date each ticker actually returned a price for (NaT when none did)
+        last_priced = prices.apply(lambda column: column.last_valid_index())
+        replaced = [ticker for ticker in prices.columns if replace and pd.notna(last_priced[ticker])]
+        covered = {} if replace else self.coverage(list(prices.columns))
+        coverage_rows = []
+        for ticker in prices.columns:
+            span = covered.get(ticker)
+            # A failed download (rate limit, network error, unknown symbol)
+            # comes back all NaN; coverage is left as it was so the next
+            # online run asks for the same range again
+            if pd.isna(last_priced[ticker]):
+                continue
+            # Coverage only reaches the day after the last price received, so
+            # a download that stops short is resumed from there next time
+            new_end = min(pd.Timestamp(last_priced[ticker]).normalize() + pd.Timedelta(days=1), end)
+            if span is None:
+                new_start = start
+            else:
+                new_start = min(start, span[0])
+                new_end = max(new_end, span[1])
+            coverage_rows.append((ticker, new_start.strftime('%Y-%m-%d'), new_end.strftime('%Y-%m-%d')))
+        with self._connect() as conn:
+            changes = conn.total_changes
+            conn.executemany("DELETE FROM prices WHERE ticker = ?", [(ticker,) for ticker in replaced])
+            # Rows and spans that are already stored unchanged are not rewritten, so
+            # re-requesting a tail that has not moved leaves the version as it was
+            conn.executemany(
+                "INSERT INTO prices (ticker, date, adj_close) VALUES (?, ?, ?) "
+                "ON CONFLICT(ticker, date) DO UPDATE SET adj_close = excluded.adj_close "
+                "WHERE adj_close IS NOT excluded.adj_close", rows)
+            conn.executemany(
+                "INSERT INTO coverage (ticker, start, end) VALUES (?, ?, ?) "
+                "ON CONFLICT(ticker) DO UPDATE SET start = excluded.start, end = excluded.end "
+                "WHERE start != excluded.start OR end != excluded.end", coverage_rows)
+            if conn.total_changes != changes:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('version', '1') "
+                    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    def clear(self):
+        """Remove all cached prices (forces a full re-download next run)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM prices")
+            conn.execute("DELETE FROM coverage")
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('version', '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+SMIC Price Provider Module
+Swappable sources of daily Adj Close prices for the analysis core
+"""
+
+import os
+import pandas as pd
+from typing import List
+from price_cache import PriceCache
+
+
+class PriceProvider:
+    """
+    Base class for price sources.
+
+    Subclasses implement get_prices() and return a wide DataFrame of Adj Close
+    prices indexed by date with one column per requested ticker. Tickers the
+    source knows nothing about come back as all-NaN columns.
+    """
+
+    def get_prices(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        Args:
+            tickers: Tickers to load
+            start: First date (inclusive)
+            end: Last date (exclusive)
+
+        Returns:
+            Wide DataFrame of Adj Close prices (dates x tickers)
+        """
+        raise NotImplementedError
+
+    def version(self) -> str:
+        """
+        Identifier of the price data this provider currently serves, used to
+        key cached analysis results. None means the data can change at any
+        time (e.g. a live download) and results must not be reused.
+        """
+        return None
+
+
+class YFinanceProvider(PriceProvider):
+    """Downloads prices from Yahoo Finance"""
+
+    def get_prices(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        import yfinance as yf
+        prices = yf.download(tickers, start=start, end=end,
+                             progress=False, auto_adjust=False)['Adj Close']
+        # yfinance returns a Series when a single ticker is requested
+        if isinstance(prices, pd.Series):
+            prices = prices.to_frame(tickers[0])
+        return prices.reindex(columns=tickers)
+
+
+class LocalFileProvider(PriceProvider):
+    """
+    Reads recorded price fixtures from disk.
+
+    `path` is either a directory holding one `<TICKER>.csv` per ticker with
+    `Date` and `Adj Close` columns (as written by record_prices), or a single
+    wide CSV with a `Date` column followed by one column per ticker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def get_prices(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        if os.path.isdir(self.path):
+            columns = {}
+            for ticker in tickers:
+                fixture = os.path.join(self.path, f'{ticker}.csv')
+                if os.path.exists(fixture):
+                    columns[ticker] = pd.read_csv(fixture, index_col='Date', parse_dates=['Date'])['Adj Close']
+            prices = pd.DataFrame(columns)
+        else:
+            prices = pd.read_csv(self.path, index_col='Date', parse_dates=['Date'])
+        prices = prices.reindex(columns=tickers).sort_index()
+        return prices.loc[(prices.index >= pd.Timestamp(start)) & (prices.index < pd.Timestamp(end))]
+
+    def version(self) -> str:
+        if os.path.isdir(self.path):
+            stats = [os.stat(entry.path) for entry in os.scandir(self.path) if entry.is_file()]
+        else:
+            stats = [os.stat(self.path)]
+        latest = max((st.st_mtime_ns for st in stats), default=0)
+        return f'files:{len(stats)}:{sum(st.st_size for st in stats)}:{latest}'
+
+
+class DataFrameProvider(PriceProvider):
+    """
+    Serves prices from a wide DataFrame already in memory (synthetic panels,
+    benchmarks, tests).
+    """
+
+    def __init__(self, prices: pd.DataFrame, version: str = None):
+        """
+        Args:
+            prices: Wide DataFrame of Adj Close prices (dates x tickers)
+            version: Identifier of the data for result caching (None disables reuse)
+        """
+        self.prices = prices.sort_index()
+        self._version = version
+
+    def get_prices(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        index = self.prices.index
+        rows = (index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))
+        return self.prices.loc[rows].reindex(columns=tickers)
+
+    def version(self) -> str:
+        return self._version
+
+
+class CachedPriceProvider(PriceProvider):
+    """
+    Serves prices from a local PriceCache, asking the wrapped provider only for
+    tickers and date ranges the cache does not hold yet.
+
+    A ticker whose Adj Close history was rewritten by the source since it
+    was cached (dividend, split) is downloaded again in full, so old and new
+    bars stay on the same adjustment basis.
+
+    With offline=True the wrapped provider is never called.
+    """
+
+    def __init__(self, source: PriceProvider, cache_path: str, offline: bool = False):
+        self.source = source
+        self.cache = PriceCache(cache_path)
+        self.offline = offline
+
+    def get_prices(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        if not self.offline:
+            for fetch_start, fetch_tickers in self.cache.missing_ranges(tickers, start, end).items():
+                fresh = self.source.get_prices(fetch_tickers, fetch_start, end)
+                adjusted = self.cache.adjusted_tickers(fresh)
+                self.cache.store(fresh.drop(columns=adjusted), fetch_start, end)
+                if adjusted:
+                    coverage = self.cache.coverage(adjusted)
+                    history_start = min([pd.Timestamp(start).normalize()] + [span[0] for span in coverage.values()])
+                    if fetch_start <= history_start:
+                        # This download already was the full history
+                        history_start, history = fetch_start, fresh[adjusted]
+                    else:
+                        history = self.source.get_prices(adjusted, history_start, end)
+                    self.cache.store(history, history_start, end, replace=True)
+
+        prices = self.cache.load(tickers, start, end)
+        if self.offline and prices.dropna(how='all').empty:
+            raise ValueError(f"No cached prices available offline in {self.cache.path}")
+        return prices
+
+    def version(self) -> str:
+        return f'cache:{self.cache.version()}'
+
+
+def record_prices(prices: pd.DataFrame, directory: str):
+    """
+    Write a wide price frame as per-ticker fixtures readable by LocalFileProvider.
+
+    Args:
+        prices: Wide DataFrame of Adj Close prices (dates x tickers)
+        directory: Output directory (created if missing)
+    """
+    os.makedirs(directory, exist_ok=True)
+    for ticker in prices.columns:
+        series = prices[ticker].dropna()
+        if series.empty:
+            continue
+        fixture = series.rename('Adj Close').to_frame()
+        fixture.index.name = 'Date'
+        fixture.to_csv(os.path.join(directory, f'{ticker}.csv'))
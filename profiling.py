@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+SMIC Profiling Module
+Lightweight timing and memory spans for the analysis and rendering stages
+"""
+
+import json
+import time
+import tracemalloc
+import contextvars
+import pandas as pd
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List
+
+# Profiler that span() reports to in the current thread / context
+_active = contextvars.ContextVar('smic_profiler', default=None)
+
+
+class Profiler:
+    """
+    Collects nested spans with wall time, CPU time and memory.
+
+    Each span records its wall-clock duration, the CPU time of the calling
+    thread, and, when memory tracing is on, the peak traced allocation
+    while it was open (via tracemalloc) and the net memory it left
+    allocated. Records are plain dicts, so they pickle with the results and
+    serialize to JSON directly.
+
+    tracemalloc is process wide; memory figures are only meaningful when
+    spans of one profiler are not interleaved with allocations from other
+    threads.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Args:
+            trace_memory: Record memory per span with tracemalloc (slows the
+                traced code down noticeably; started on first use if needed)
+        """
+        self.trace_memory = trace_memory
+        self.records: List[Dict] = []
+        self._origin = time.perf_counter()
+        # Peak memory seen so far by each open span, innermost last
+        self._open_peaks: List[int] = []
+        self._depth = 0
+        self._started_tracing = False
+
+    def _start_tracing(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        """Stop tracemalloc if this profiler started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def activate(self) -> Iterator['Profiler']:
+        """Make this the profiler that span() reports to within the block"""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as one span (spans nest)"""
+        self._start_tracing()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # The enclosing span keeps the peak reached so far; the counter restarts for this span
+            if self._open_peaks:
+                self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+            tracemalloc.reset_peak()
+            start_memory = current
+            self._open_peaks.append(current)
+        depth = self._depth
+        self._depth += 1
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.thread_time() - start_cpu
+            self._depth -= 1
+            record = {
+                'name': name,
+                'depth': depth,
+                'start': start_wall - self._origin,
+                'wall': wall,
+                'cpu': cpu
+            }
+            if tracing and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                span_peak = max(self._open_peaks.pop(), peak)
+                record['peak_memory'] = span_peak
+                record['allocated'] = current - start_memory
+                if self._open_peaks:
+                    self._open_peaks[-1] = max(self._open_peaks[-1], span_peak)
+                tracemalloc.reset_peak()
+            self.records.append(record)
+
+    def summary(self) -> pd.DataFrame:
+        """Spans in start order with nested names indented, times in milliseconds"""
+        return timings_frame(self.records)
+
+    def write_trace(self, path: str):
+        """Write the spans as a JSON trace (see write_trace)"""
+        write_trace(self.records, path)
+
+
+def active_profiler() -> Profiler:
+    """Profiler activated in the current context, or None"""
+    return _active.get()
+
+
+def span(name: str):
+    """
+    Span on the active profiler, or a no-op when none is active.
+
+    Library code calls this unconditionally; only callers that activate a
+    Profiler pay for the measurements.
+    """
+    profiler = _active.get()
+    return profiler.span(name) if profiler is not None else nullcontext()
+
+
+def timings_frame(records: List[Dict]) -> pd.DataFrame:
+    """
+    Tabulate span records.
+
+    Returns:
+        DataFrame with Stage, Wall (ms), CPU (ms) and, when traced,
+        Peak Memory (MB) and Allocated (MB), in start order
+    """
+    rows = []
+    for record in sorted(records, key=lambda r: r['start']):
+        row = {
+            'Stage': '  ' * record['depth'] + record['name'],
+            'Wall (ms)': record['wall'] * 1000,
+            'CPU (ms)': record['cpu'] * 1000
+        }
+        if 'peak_memory' in record:
+            row['Peak Memory (MB)'] = record['peak_memory'] / 2 ** 20
+            row['Allocated (MB)'] = record['allocated'] / 2 ** 20
+        rows.append(row)
+    return pd.DataFrame(rows, columns=None if rows else ['Stage', 'Wall (ms)', 'CPU (ms)'])
+
+
+def write_trace(records: List[Dict], path: str):
+    """
+    Write span records as a JSON trace.
+
+    The file uses the Trace Event Format ("traceEvents" with complete 'X'
+    events, times in microseconds), so it opens in chrome://tracing and
+    Perfetto; the raw records are included under "spans".
+    """
+    events = []
+    for record in records:
+        args = {'cpu_ms': round(record['cpu'] * 1000, 3)}
+        if 'peak_memory' in record:
+            args['peak_memory_bytes'] = record['peak_memory']
+            args['allocated_bytes'] = record['allocated']
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': round(record['start'] * 1e6, 1),
+            'dur': round(record['wall'] * 1e6, 1),
+            'pid': 1,
+            'tid': 1,
+            'args': args
+        })
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'spans': records}, f, indent=1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+SMIC Result Cache Module
+Persists whole analysis runs keyed by the content of their inputs
+"""
+
+import os
+import hashlib
+import pickle
+import pandas as pd
+from typing import Dict, Tuple
+
+# Number of past runs kept on disk
+MAX_ENTRIES = 5
+
+# Bump when the content of analysis results changes so older entries are not reused
+FORMAT_VERSION = 6
+
+
+class ResultCache:
+    """
+    Directory of pickled analysis results.
+
+    Each entry is named by a hash of the transactions file contents, the
+    price-data version and the analysis end date, so a run is only reused
+    when none of its inputs changed. Figures are stored as Plotly JSON and
+    can be pushed straight into a chart view without rebuilding them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def make_key(transactions_file: str, price_version: str, end_date: pd.Timestamp) -> str:
+        """
+        Hash the inputs of a run.
+
+        Returns:
+            Hex digest, or None when the price source has no stable version
+            (results computed from it must not be reused)
+        """
+        if price_version is None:
+            return None
+        digest = hashlib.sha256(f'v{FORMAT_VERSION}'.encode('utf-8'))
+        with open(transactions_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(b'\0' + price_version.encode('utf-8'))
+        digest.update(b'\0' + pd.Timestamp(end_date).strftime('%Y-%m-%d').encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def load(self, key: str) -> Dict:
+        """
+        Load a stored run.
+
+        Returns:
+            Dictionary with report_text, summary_df, ytd_df, returns_data and
+            figure_json, or None if there is no entry for `key`
+        """
+        if key is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # A truncated or incompatible entry is just a cache miss
+            return None
+
+    def save(self, key: str, results: Tuple):
+        """
+        Store the tuple returned by generate_portfolio_analysis under `key`.
+
+        All figures are serialized to JSON here, so this is best called off
+        the GUI thread.
+        """
+        if key is None:
+            return
+        report_text, figures, summary_df, ytd_df, returns_data = results
+        entry = {
+            'report_text': report_text,
+            'summary_df': summary_df,
+            'ytd_df': ytd_df,
+            'returns_data': returns_data,
+            'figure_json': figures.serialize()
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a half-written entry
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._prune()
+
+    def _prune(self):
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                   if name.endswith('.pkl')]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for stale in entries[MAX_ENTRIES:]:
+            os.remove(stale)
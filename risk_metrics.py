@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+SMIC Risk Metrics Module
+Vectorized risk and risk-adjusted return statistics for many value series at once
+"""
+
+import numpy as np
+import pandas as pd
+
+# Column order of the table returned by compute_risk_metrics
+RISK_METRIC_COLUMNS = [
+    'Annualized Return (%)', 'Volatility (%)', 'Sharpe Ratio', 'Sortino Ratio',
+    'Beta', 'Alpha (%)', 'Tracking Error (%)', 'Information Ratio',
+    'Max Drawdown (%)', 'Calmar Ratio', 'Max Drawdown Duration (days)'
+]
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Elementwise division that yields NaN where the denominator is zero or NaN"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    ok = np.isfinite(denominator) & (denominator != 0)
+    np.divide(numerator, denominator, out=out, where=ok)
+    return out
+
+
+def infer_periods_per_year(index: pd.DatetimeIndex) -> float:
+    """Observed number of return periods per year (about 261 for a business-day index)"""
+    years = (index[-1] - index[0]).days / 365.25 if len(index) > 1 else 0
+    return (len(index) - 1) / years if years > 0 else 252.0
+
+
+def periodic_returns(values: np.ndarray) -> np.ndarray:
+    """
+    Simple returns of a (dates x series) value matrix.
+
+    Returns are NaN where the previous value is not positive (a sleeve that
+    is empty or not funded yet) or the value turns negative (an oversold
+    position), so those periods are ignored downstream.
+    """
+    prev = values[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = values[1:] / prev - 1
+    returns[~(prev > 0) | (values[1:] < 0) | ~np.isfinite(returns)] = np.nan
+    return returns
+
+
+def compute_risk_metrics(values: pd.DataFrame, benchmark: pd.Series, risk_free_rate: float = 0.0,
+                         periods_per_year: float = None) -> pd.DataFrame:
+    """
+    Compute risk statistics for every column of `values` in one pass.
+
+    All series share the date index, so the metrics are evaluated as column
+    reductions over a single returns matrix instead of one series at a time.
+
+    Args:
+        values: Value series (dates x series), e.g. portfolio, equity and sector values
+        benchmark: Benchmark value series on the same index (^GSPC)
+        risk_free_rate: Annual risk-free rate as a fraction (0.04 = 4%)
+        periods_per_year: Return periods per year used for annualization;
+            inferred from the index when None (about 261 for business days)
+
+    Returns:
+        DataFrame indexed by series name with the columns in RISK_METRIC_COLUMNS.
+        Ratios whose denominator is zero are NaN.
+    """
+    index = values.index
+    if len(index) < 3:
+        return pd.DataFrame(np.nan, index=values.columns, columns=RISK_METRIC_COLUMNS)
+
+    if periods_per_year is None:
+        periods_per_year = infer_periods_per_year(index)
+    rf = (1 + risk_free_rate) ** (1 / periods_per_year) - 1
+
+    r = periodic_returns(values.to_numpy(dtype=float))
+    b = periodic_returns(benchmark.reindex(index).to_numpy(dtype=float)[:, None])
+    valid = ~np.isnan(r)
+    n = valid.sum(axis=0)
+    r0 = np.where(valid, r, 0.0)
+
+    # Return and volatility
+    growth = np.prod(1 + r0, axis=0)
+    annualized_return = growth ** _safe_divide(periods_per_year, n) - 1
+    mean = _safe_divide(r0.sum(axis=0), n)
+    dev = np.where(valid, r - mean, 0.0)
+    std = np.sqrt(_safe_divide((dev ** 2).sum(axis=0), n - 1))
+    volatility = std * np.sqrt(periods_per_year)
+
+    # Sharpe and Sortino on excess returns over the risk-free rate
+    excess_mean = mean - rf
+    downside = np.where(valid, np.minimum(r - rf, 0.0), 0.0)
+    downside_dev = np.sqrt(_safe_divide((downside ** 2).sum(axis=0), n))
+    sharpe = _safe_divide(excess_mean, std) * np.sqrt(periods_per_year)
+    sortino = _safe_divide(excess_mean, downside_dev) * np.sqrt(periods_per_year)
+
+    # Beta, alpha, tracking error and information ratio over periods where both series exist
+    paired = valid & ~np.isnan(b)
+    n_paired = paired.sum(axis=0)
+    rp = np.where(paired, r, 0.0)
+    bp = np.where(paired, b, 0.0)
+    mean_rp = _safe_divide(rp.sum(axis=0), n_paired)
+    mean_bp = _safe_divide(bp.sum(axis=0), n_paired)
+    dev_r = np.where(paired, r - mean_rp, 0.0)
+    dev_b = np.where(paired, b - mean_bp, 0.0)
+    covariance = (dev_r * dev_b).sum(axis=0)
+    beta = _safe_divide(covariance, (dev_b ** 2).sum(axis=0))
+    alpha = (mean_rp - rf - beta * (mean_bp - rf)) * periods_per_year
+    active = np.where(paired, r - b, 0.0)
+    active_mean = _safe_divide(active.sum(axis=0), n_paired)
+    active_dev = np.where(paired, active - active_mean, 0.0)
+    tracking_std = np.sqrt(_safe_divide((active_dev ** 2).sum(axis=0), n_paired - 1))
+    tracking_error = tracking_std * np.sqrt(periods_per_year)
+    information_ratio = _safe_divide(active_mean * periods_per_year, tracking_error)
+
+    # Drawdowns on the compounded growth index
+    wealth = np.vstack([np.ones((1, r0.shape[1])), np.cumprod(1 + r0, axis=0)])
+    peak = np.maximum.accumulate(wealth, axis=0)
+    drawdown = wealth / peak - 1
+    max_drawdown = drawdown.min(axis=0)
+    calmar = _safe_divide(annualized_return, np.abs(max_drawdown))
+
+    # Longest time under water: calendar days since the last peak, maximized per series
+    rows = np.arange(wealth.shape[0])[:, None]
+    last_peak = np.maximum.accumulate(np.where(wealth >= peak, rows, 0), axis=0)
+    day_numbers = (index.to_numpy().astype('datetime64[D]').astype(np.int64))
+    max_duration = (day_numbers[:, None] - day_numbers[last_peak]).max(axis=0)
+
+    table = pd.DataFrame({
+        'Annualized Return (%)': annualized_return * 100,
+        'Volatility (%)': volatility * 100,
+        'Sharpe Ratio': sharpe,
+        'Sortino Ratio': sortino,
+        'Beta': beta,
+        'Alpha (%)': alpha * 100,
+        'Tracking Error (%)': tracking_error * 100,
+        'Information Ratio': information_ratio,
+        'Max Drawdown (%)': max_drawdown * 100,
+        'Calmar Ratio': calmar,
+        'Max Drawdown Duration (days)': max_duration
+    }, index=values.columns)
+    # Series with no usable returns carry no statistics at all
+    table.loc[n == 0] = np.nan
+    return table[RISK_METRIC_COLUMNS]
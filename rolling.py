@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+SMIC Rolling Analytics Module
+Rolling volatility, beta, correlation and excess return in linear time
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Tuple
+from risk_metrics import periodic_returns, infer_periods_per_year
+
+# Rolling windows in trading days (about one month, one quarter and one year)
+ROLLING_WINDOWS = (21, 63, 252)
+
+# Statistics returned for every window
+ROLLING_METRICS = ['volatility', 'beta', 'correlation', 'excess_return']
+
+
+def _window_sums(a: np.ndarray, window: int) -> np.ndarray:
+    """Trailing `window`-row sums of every column from one running sum (O(n) per column)"""
+    running = np.cumsum(a, axis=0)
+    sums = running.copy()
+    sums[window:] -= running[:-window]
+    return sums
+
+
+def rolling_pair_statistics(returns: np.ndarray, benchmark_returns: np.ndarray, window: int,
+                            periods_per_year: float) -> Dict[str, np.ndarray]:
+    """
+    Rolling statistics of each return column against the matching benchmark column.
+
+    Every statistic is derived from running sums of x, y, x^2, y^2, xy and
+    log(1 + r), so each window costs two lookups regardless of its length
+    and all columns are processed together. Returns are centered on their
+    column means first (the shifted-data form of the running variance),
+    which keeps the sums of squares well conditioned over long histories.
+
+    Args:
+        returns: Periodic returns (periods x series); NaN marks missing periods
+        benchmark_returns: Benchmark returns with the same shape
+        window: Window length in periods; windows with any missing period are NaN
+        periods_per_year: Used to annualize volatility
+
+    Returns:
+        Dictionary of (periods x series) arrays keyed by ROLLING_METRICS.
+        Volatility and excess return are in percent; excess return is the
+        compounded return over the window minus the benchmark's.
+    """
+    paired = ~np.isnan(returns) & ~np.isnan(benchmark_returns)
+    x = np.where(paired, returns, 0.0)
+    y = np.where(paired, benchmark_returns, 0.0)
+    count = _window_sums(paired.astype(float), window)
+    full = count >= window
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Shift by the column means; variance and covariance are shift invariant
+        xc = np.where(paired, x - x.sum(axis=0) / paired.sum(axis=0), 0.0)
+        yc = np.where(paired, y - y.sum(axis=0) / paired.sum(axis=0), 0.0)
+        xc = np.nan_to_num(xc)
+        yc = np.nan_to_num(yc)
+
+        sx = _window_sums(xc, window)
+        sy = _window_sums(yc, window)
+        var_x = np.maximum(_window_sums(xc * xc, window) - sx * sx / count, 0.0) / (count - 1)
+        var_y = np.maximum(_window_sums(yc * yc, window) - sy * sy / count, 0.0) / (count - 1)
+        cov = (_window_sums(xc * yc, window) - sx * sy / count) / (count - 1)
+
+        volatility = np.sqrt(var_x * periods_per_year) * 100
+        beta = np.where(var_y > 0, cov / var_y, np.nan)
+        denominator = np.sqrt(var_x * var_y)
+        correlation = np.where(denominator > 0, cov / denominator, np.nan)
+
+        growth_x = np.expm1(_window_sums(np.log1p(x), window))
+        growth_y = np.expm1(_window_sums(np.log1p(y), window))
+        excess_return = (growth_x - growth_y) * 100
+
+    stats = {
+        'volatility': volatility,
+        'beta': beta,
+        'correlation': correlation,
+        'excess_return': excess_return
+    }
+    for values in stats.values():
+        values[~full] = np.nan
+    return stats
+
+
+def compute_rolling_analytics(values: pd.DataFrame, benchmarks: pd.DataFrame,
+                              windows: Tuple[int, ...] = ROLLING_WINDOWS) -> Dict[int, Dict[str, pd.DataFrame]]:
+    """
+    Rolling analytics of value series against their own benchmarks.
+
+    Args:
+        values: Value series (dates x series), e.g. portfolio and sector aggregates
+        benchmarks: Benchmark value series with the same columns (the S&P 500
+            for the portfolio, the sector ETF price for a sector)
+        windows: Window lengths in trading days
+
+    Returns:
+        {window: {metric: DataFrame (dates x series)}} for every window and
+        every metric in ROLLING_METRICS. The first date has no return and is NaN.
+    """
+    benchmarks = benchmarks.reindex(index=values.index, columns=values.columns)
+    if len(values.index) < 2:
+        empty = pd.DataFrame(np.nan, index=values.index, columns=values.columns)
+        return {window: {metric: empty.copy() for metric in ROLLING_METRICS} for window in windows}
+
+    returns = periodic_returns(values.to_numpy(dtype=float))
+    benchmark_returns = periodic_returns(benchmarks.to_numpy(dtype=float))
+    periods_per_year = infer_periods_per_year(values.index)
+    leading_nan = np.full((1, values.shape[1]), np.nan)
+
+    rolling = {}
+    for window in windows:
+        stats = rolling_pair_statistics(returns, benchmark_returns, window, periods_per_year)
+        rolling[window] = {
+            metric: pd.DataFrame(np.vstack([leading_nan, stats[metric]]),
+                                 index=values.index, columns=values.columns)
+            for metric in ROLLING_METRICS
+        }
+    return rolling
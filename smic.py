@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+SMIC Command Line Module
+Headless entry point: runs the portfolio analysis and writes the report,
+CSV tables and figures to an output directory without loading Qt
+"""
+
+import os
+import sys
+import argparse
+from collections import Counter
+from typing import Dict, List
+
+# Only analysis_core is imported at module level; Plotly is loaded when a
+# figure is actually written and Qt is never imported from here.
+from analysis_core import IncrementalAnalyzer, AnalysisCancelled, RENDER_MODES, WEBGL_AUTO_POINTS, figure_html
+from profiling import Profiler, span, timings_frame
+from columnar_export import EXPORT_FORMATS
+
+FIGURE_FORMATS = ['html', 'json', 'none']
+PLOTLYJS_MODES = ['directory', 'cdn', 'inline']
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='smic.py',
+        description='Run the SMIC portfolio analysis without the GUI and write the results to a directory.'
+    )
+    parser.add_argument('-t', '--transactions', nargs='+', default=['data/transactions.csv'],
+                        help='transactions CSV (default: data/transactions.csv); with several files each '
+                             'portfolio is written to its own subdirectory named after the file')
+    parser.add_argument('-o', '--output', default='output',
+                        help='output directory (default: output)')
+    parser.add_argument('--end-date', default=None,
+                        help='last date of the analysis, exclusive (YYYY-MM-DD, default: today)')
+    parser.add_argument('--prices', default=None,
+                        help='read prices from recorded fixtures (directory of <TICKER>.csv or one wide CSV) '
+                             'instead of downloading them')
+    parser.add_argument('--offline', action='store_true',
+                        help='use the local price cache only, never download')
+    parser.add_argument('--cache', default=None,
+                        help='path of the SQLite price cache (default: price_cache.db next to the transactions file)')
+    parser.add_argument('--figures', choices=FIGURE_FORMATS, default='html',
+                        help='figure output format (default: html); "none" skips Plotly entirely')
+    parser.add_argument('--plotlyjs', choices=PLOTLYJS_MODES, default='directory',
+                        help='how HTML figures get plotly.js: one shared plotly.min.js file in the '
+                             'figure directory, the CDN, or inlined in every file (default: directory)')
+    parser.add_argument('--max-points', type=int, default=0, metavar='N',
+                        help='downsample line traces in the written figures to N points each (LTTB); '
+                             'smaller files, but zooming no longer reveals the full data (default: 0, full resolution)')
+    parser.add_argument('--render-mode', choices=RENDER_MODES, default='auto',
+                        help='draw line traces with SVG or WebGL; auto uses WebGL for figures with '
+                             f'{WEBGL_AUTO_POINTS:,}+ line points (default: auto)')
+    parser.add_argument('--export', choices=list(EXPORT_FORMATS), default=None,
+                        help='also write the full time series (values, returns, weights, rolling analytics, '
+                             'per-ticker units) as typed Parquet or Arrow IPC tables to <output>/tables')
+    parser.add_argument('--no-result-cache', action='store_true',
+                        help='always recompute, even if the inputs match a stored run')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes when analysing several files (default: CPU count) '
+                             'or running the Monte Carlo projection (default: 1)')
+    parser.add_argument('--monte-carlo', type=int, default=0, metavar='PATHS',
+                        help='also project the current holdings forward with this many simulated paths')
+    parser.add_argument('--horizon', type=int, default=252,
+                        help='Monte Carlo horizon in trading days (default: 252)')
+    parser.add_argument('--mc-method', choices=['bootstrap', 'normal'], default='bootstrap',
+                        help='resample historical days or draw from a multivariate normal (default: bootstrap)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for a reproducible Monte Carlo projection')
+    parser.add_argument('--trace', default=None, metavar='FILE',
+                        help='write per-stage timings of the run as a JSON trace (chrome://tracing format)')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='record peak memory per stage with tracemalloc (slower)')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not print progress or the report')
+    return parser.parse_args(argv)
+
+
+def write_figures(figures, directory: str, fmt: str, plotlyjs: str = 'directory',
+                  max_points: int = 0, render_mode: str = 'auto') -> List[str]:
+    """
+    Write every figure to `directory`.
+
+    Args:
+        figures: LazyFigures returned by the analysis
+        directory: Output directory (created if missing)
+        fmt: 'html' (standalone page) or 'json' (Plotly JSON)
+        plotlyjs: include_plotlyjs mode for HTML output
+        max_points: Downsample line traces to this many points (0 keeps every point)
+        render_mode: SVG or WebGL line traces, see analysis_core.apply_render_mode
+
+    Returns:
+        Paths of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Full resolution SVG is the memoized JSON (stored with cached runs, which then never import Plotly)
+    if max_points or render_mode != 'svg':
+        figure_json = figures.serialize(max_points=max_points, render_mode=render_mode)
+    else:
+        figure_json = figures.serialize()
+    written = []
+    for name, fig_json in figure_json.items():
+        path = os.path.join(directory, f'smic_{name}.{fmt}')
+        with span(f'write_{fmt}:{name}'):
+            write_figure_file(fig_json, path, fmt, plotlyjs)
+        written.append(path)
+    return written
+
+
+def write_figure_file(fig_json: str, path: str, fmt: str, plotlyjs: str = 'directory'):
+    """Write serialized figure JSON as a .json file or a standalone HTML page"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(fig_json if fmt == 'json' else figure_html(fig_json, plotlyjs))
+    plotlyjs_path = os.path.join(os.path.dirname(path), 'plotly.min.js')
+    if fmt == 'html' and plotlyjs == 'directory' and not os.path.exists(plotlyjs_path):
+        from plotly.offline import get_plotlyjs
+        with open(plotlyjs_path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+
+
+def write_results(results, output_dir: str, figure_format: str = 'html',
+                  plotlyjs: str = 'directory', max_points: int = 0, render_mode: str = 'auto') -> List[str]:
+    """
+    Write an analysis result tuple to `output_dir`.
+
+    Layout:
+        report.txt
+        smic_statistics_summary.csv
+        smic_sector_etf_vs_stocks_ytd.csv
+        smic_risk_metrics.csv
+        figs/smic_<figure>.html|json
+
+    Returns:
+        Paths of the written files
+    """
+    report_text, figures, summary_df, ytd_df, returns_data = results
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+
+    report_path = os.path.join(output_dir, 'report.txt')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(report_text)
+    written.append(report_path)
+
+    summary_path = os.path.join(output_dir, 'smic_statistics_summary.csv')
+    summary_df.to_csv(summary_path, index=False)
+    written.append(summary_path)
+
+    ytd_path = os.path.join(output_dir, 'smic_sector_etf_vs_stocks_ytd.csv')
+    ytd_df.to_csv(ytd_path, index=False)
+    written.append(ytd_path)
+
+    risk_path = os.path.join(output_dir, 'smic_risk_metrics.csv')
+    returns_data['risk_metrics'].to_csv(risk_path, index_label='Series')
+    written.append(risk_path)
+
+    if figure_format != 'none':
+        written.extend(write_figures(figures, os.path.join(output_dir, 'figs'), figure_format, plotlyjs,
+                                     max_points, render_mode))
+    return written
+
+
+def write_tables(results, output_dir: str, fmt: str, state=None) -> List[str]:
+    """Write the columnar time-series tables of a run to <output_dir>/tables (see columnar_export)"""
+    from columnar_export import write_results_tables
+
+    return write_results_tables(results, os.path.join(output_dir, 'tables'), fmt, state=state)
+
+
+def write_monte_carlo(state, args: argparse.Namespace, output_dir: str) -> List[str]:
+    """Run the Monte Carlo projection for an analysed portfolio and write its summary and fan chart"""
+    from montecarlo import run_monte_carlo, monte_carlo_summary
+
+    projection = run_monte_carlo(state, n_paths=args.monte_carlo, horizon=args.horizon,
+                                 method=args.mc_method, seed=args.seed, max_workers=args.jobs or 1)
+    written = []
+    summary_path = os.path.join(output_dir, 'smic_monte_carlo_summary.csv')
+    monte_carlo_summary(projection).to_csv(summary_path, index=False)
+    written.append(summary_path)
+
+    if args.figures != 'none':
+        from analysis_core import build_monte_carlo_figure, figure_to_json
+
+        fig_dir = os.path.join(output_dir, 'figs')
+        os.makedirs(fig_dir, exist_ok=True)
+        path = os.path.join(fig_dir, f'smic_monte_carlo.{args.figures}')
+        write_figure_file(figure_to_json(build_monte_carlo_figure(projection)), path, args.figures, args.plotlyjs)
+        written.append(path)
+    return written
+
+
+def batch_output_names(transaction_files: List[str]) -> Dict[str, str]:
+    """
+    Output directory name for each transactions file of a batch.
+
+    Names are the file stems; files sharing a stem (a/transactions.csv,
+    b/transactions.csv) are prefixed with their parent directory, and an
+    index is appended if that still collides.
+    """
+    stems = {path: os.path.splitext(os.path.basename(path))[0] for path in transaction_files}
+    stem_counts = Counter(stems.values())
+    names, used = {}, set()
+    for path, stem in stems.items():
+        name = stem
+        if stem_counts[stem] > 1:
+            parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+            name = f"{parent}_{stem}" if parent else stem
+        candidate, index = name, 2
+        while candidate in used:
+            candidate = f"{name}_{index}"
+            index += 1
+        used.add(candidate)
+        names[path] = candidate
+    return names
+
+
+def run_batch(args: argparse.Namespace, price_provider, log) -> int:
+    """Analyse several transaction files over one shared price panel (see batch.analyze_batch)"""
+    from batch import analyze_batch
+
+    if args.monte_carlo:
+        log("--monte-carlo needs a single transactions file, skipping the projection")
+    transaction_files = []
+    real_paths = set()
+    for path in args.transactions:
+        real_path = os.path.realpath(path)
+        if real_path in real_paths:
+            log(f"{path} is listed more than once, analysing it once")
+            continue
+        real_paths.add(real_path)
+        transaction_files.append(path)
+    output_names = batch_output_names(transaction_files)
+    log(f"Analysing {len(transaction_files)} portfolios...")
+    try:
+        batch_results = analyze_batch(transaction_files, price_provider=price_provider,
+                                      offline=args.offline, cache_path=args.cache,
+                                      end_date=args.end_date, max_workers=args.jobs)
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for transactions_file, results in batch_results.items():
+        output_dir = os.path.join(args.output, output_names[transactions_file])
+        written = write_results(results, output_dir, args.figures, args.plotlyjs, args.max_points,
+                                args.render_mode)
+        if args.export:
+            written.extend(write_tables(results, output_dir, args.export))
+        log(f"{transactions_file}: wrote {len(written)} files to {os.path.abspath(output_dir)}")
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    price_provider = None
+    if args.prices:
+        from price_providers import LocalFileProvider
+        price_provider = LocalFileProvider(args.prices)
+
+    if len(args.transactions) > 1:
+        return run_batch(args, price_provider, log)
+
+    profiler = Profiler(trace_memory=args.profile_memory)
+    try:
+        analyzer = IncrementalAnalyzer(args.transactions[0], price_provider=price_provider,
+                                       offline=args.offline, cache_path=args.cache)
+        # Stored results carry no positions, which the Monte Carlo projection needs
+        use_result_cache = not args.no_result_cache and not args.monte_carlo
+        with profiler.activate(), span('load_cached_results'):
+            results = analyzer.load_cached_results(args.end_date) if use_result_cache else None
+        cached = results is not None
+        if cached:
+            log("Inputs unchanged since the last stored run, reusing its results")
+        else:
+            results = analyzer.run(end_date=args.end_date, progress=lambda stage: log(f"{stage}..."),
+                                   profiler=profiler)
+            # Storing serializes every figure, which a numbers-only run avoids
+            if args.figures != 'none' and not args.no_result_cache:
+                with profiler.activate(), span('save_results'):
+                    analyzer.save_results(results)
+        with profiler.activate(), span('write_results'):
+            written = write_results(results, args.output, args.figures, args.plotlyjs, args.max_points,
+                                    args.render_mode)
+            if args.export:
+                if cached:
+                    log("Stored results carry no positions; use --no-result-cache to export the per-ticker tables")
+                with span('export_tables'):
+                    written.extend(write_tables(results, args.output, args.export,
+                                                state=None if cached else analyzer.state))
+            if args.monte_carlo:
+                log(f"Simulating {args.monte_carlo:,} paths over {args.horizon} trading days...")
+                with span('monte_carlo'):
+                    written.extend(write_monte_carlo(analyzer.state, args, args.output))
+    except (FileNotFoundError, ValueError, RuntimeError, AnalysisCancelled) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        profiler.stop()
+
+    if args.trace:
+        profiler.write_trace(args.trace)
+        log(f"Wrote timings to {os.path.abspath(args.trace)}")
+        timings = timings_frame(profiler.records)
+        # Pad the stage names so the nesting indentation survives right alignment
+        timings['Stage'] = timings['Stage'].str.ljust(timings['Stage'].str.len().max())
+        log(timings.to_string(index=False, float_format='%.1f'))
+
+    if not args.quiet:
+        print(results[0])
+    log(f"Wrote {len(written)} files to {os.path.abspath(args.output)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+SMIC Synthetic Portfolio Module
+Generates large synthetic transaction ledgers and matching price panels
+for benchmarking and testing the analysis core
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+from analysis_core import V, sector_map, SECTOR_NAMES
+from transaction_store import TRANSACTION_COLUMNS
+
+# Trading days per year used for the price model
+TRADING_DAYS = 252
+
+
+def synthetic_tickers(n_tickers: int, sectors: List[str]) -> pd.DataFrame:
+    """
+    Stock universe of `n_tickers` synthetic names spread evenly over `sectors`.
+
+    Returns:
+        DataFrame with 'ticker' (SYN00000, SYN00001, ...) and 'sector' columns
+    """
+    return pd.DataFrame({
+        'ticker': [f'SYN{i:05d}' for i in range(n_tickers)],
+        'sector': [sectors[i % len(sectors)] for i in range(n_tickers)]
+    })
+
+
+def synthetic_price_panel(universe: pd.DataFrame, sectors: List[str], fixed_income: List[str],
+                          index: pd.DatetimeIndex, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Daily prices from a one-factor market model with sector factors.
+
+    ^GSPC follows the market factor; each sector ETF adds its sector factor;
+    every stock loads on its sector ETF with a random beta plus idiosyncratic
+    noise; fixed income is low-volatility noise around a small drift.
+
+    Args:
+        universe: Stocks from synthetic_tickers
+        sectors: Sectors whose ETFs are priced
+        fixed_income: Fixed income tickers
+        index: Business-day index of the panel
+        rng: Random generator
+
+    Returns:
+        Wide price frame (dates x tickers) with ^GSPC, sector ETFs, fixed income and stocks
+    """
+    n_days = len(index)
+    market = rng.normal(0.07 / TRADING_DAYS, 0.16 / np.sqrt(TRADING_DAYS), n_days)
+    sector_factor = rng.normal(0.0, 0.10 / np.sqrt(TRADING_DAYS), (n_days, len(sectors)))
+    etf_returns = market[:, None] + sector_factor
+
+    sector_pos = pd.Index(sectors).get_indexer(universe['sector'])
+    beta = rng.uniform(0.6, 1.4, len(universe))
+    idiosyncratic = rng.normal(0.0, 0.25 / np.sqrt(TRADING_DAYS), (n_days, len(universe)))
+    stock_returns = etf_returns[:, sector_pos] * beta + idiosyncratic
+    bond_returns = rng.normal(0.03 / TRADING_DAYS, 0.05 / np.sqrt(TRADING_DAYS), (n_days, len(fixed_income)))
+
+    returns = np.hstack([market[:, None], etf_returns, bond_returns, stock_returns])
+    returns[0] = 0.0
+    start_prices = np.concatenate([[4500.0], rng.uniform(80, 400, len(sectors)),
+                                   rng.uniform(20, 100, len(fixed_income)),
+                                   rng.uniform(10, 500, len(universe))])
+    prices = start_prices * np.exp(np.cumsum(np.log1p(returns), axis=0))
+    columns = ['^GSPC'] + [V[sector_map[name]] for name in sectors] + fixed_income + universe['ticker'].tolist()
+    return pd.DataFrame(prices, index=index, columns=columns)
+
+
+def generate_synthetic_portfolio(n_tickers: int = 500, n_transactions: int = 5000, years: float = 3.0,
+                                 n_sectors: int = len(SECTOR_NAMES), n_fixed_income: int = 8,
+                                 end_date: str = '2025-10-31',
+                                 seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Generate a transaction ledger and the prices it was traded at.
+
+    The ledger opens like the real fund: every sector ETF, the fixed income
+    funds and cash are bought on the first day. All further transactions
+    are stock purchases funded from the sector ETF, on random dates, for
+    random amounts, at the synthetic price of the day.
+
+    Args:
+        n_tickers: Number of individual stocks
+        n_transactions: Total number of ledger rows (at least the opening rows)
+        years: Length of the history
+        n_sectors: Number of sectors used (taken from SECTOR_NAMES in order)
+        n_fixed_income: Number of fixed income funds
+        end_date: Last date of the history (exclusive end date of the analysis)
+        seed: Seed; the same arguments always produce the same data
+
+    Returns:
+        transactions (pd.DataFrame): Ledger with TRANSACTION_COLUMNS
+        prices (pd.DataFrame): Wide price panel covering the ledger
+    """
+    if not 1 <= n_sectors <= len(SECTOR_NAMES):
+        raise ValueError(f"n_sectors must be between 1 and {len(SECTOR_NAMES)}")
+    rng = np.random.default_rng(seed)
+    sectors = SECTOR_NAMES[:n_sectors]
+    end = pd.Timestamp(end_date)
+    start = (end - pd.DateOffset(days=int(years * 365.25))).normalize()
+    # A few extra days before the first trade, like the real price download
+    index = pd.bdate_range(start - pd.Timedelta(days=10), end - pd.Timedelta(days=1))
+
+    universe = synthetic_tickers(n_tickers, sectors)
+    fixed_income = [f'FI{i:03d}' for i in range(n_fixed_income)]
+    prices = synthetic_price_panel(universe, sectors, fixed_income, index, rng)
+    trade_days = index[index >= start]
+    price_values = prices.to_numpy()
+    columns = pd.Index(prices.columns)
+
+    # Stock purchases: random ticker, day and amount
+    n_stock_trades = max(n_transactions - n_sectors - n_fixed_income - 1, 0) if n_tickers else 0
+    tickers = universe['ticker'].to_numpy()[rng.integers(0, max(n_tickers, 1), n_stock_trades)]
+    sectors_of = universe.set_index('ticker')['sector']
+    days = np.sort(rng.integers(0, len(trade_days), n_stock_trades))
+    amounts = np.round(rng.lognormal(np.log(1000), 0.6, n_stock_trades), 2)
+
+    # Opening ETF positions sized to fund every later swap out of them
+    swap_totals = pd.Series(amounts).groupby(sectors_of.reindex(tickers).to_numpy()).sum()
+    etf_amounts = np.round([swap_totals.get(name, 0.0) * 1.25 + 10000.0 for name in sectors], 2)
+    fi_amounts = np.round(rng.uniform(1000, 10000, n_fixed_income), 2)
+
+    frames = [
+        pd.DataFrame({'sector': sectors, 'ticker': [V[sector_map[name]] for name in sectors],
+                      'day': 0, 'amount_invested': etf_amounts}),
+        pd.DataFrame({'sector': 'Fixed_Income', 'ticker': fixed_income, 'day': 0, 'amount_invested': fi_amounts}),
+        pd.DataFrame({'sector': ['Cash'], 'ticker': ['CASH'], 'day': [0], 'amount_invested': [round(rng.uniform(100, 5000), 2)]}),
+        pd.DataFrame({'sector': sectors_of.reindex(tickers).to_numpy(), 'ticker': tickers,
+                      'day': days, 'amount_invested': amounts})
+    ]
+    ledger = pd.concat(frames, ignore_index=True)
+
+    dates = trade_days[ledger['day'].to_numpy()]
+    row_pos = index.get_indexer(dates)
+    col_pos = columns.get_indexer(ledger['ticker'])
+    purchase_price = np.where(col_pos >= 0, price_values[row_pos, np.maximum(col_pos, 0)], 1.0)
+    ledger['invest_date'] = dates.strftime('%Y-%m-%d')
+    ledger['purchase_price'] = np.round(purchase_price, 2)
+    ledger['shares'] = np.round(ledger['amount_invested'] / ledger['purchase_price'], 4)
+    return ledger[TRANSACTION_COLUMNS], prices
+
+
+def write_synthetic_portfolio(directory: str, transactions: pd.DataFrame, prices: pd.DataFrame) -> Tuple[str, str]:
+    """
+    Write a synthetic ledger and its prices for smic.py / LocalFileProvider.
+
+    Returns:
+        Paths of transactions.csv and prices.csv (wide, readable with --prices)
+    """
+    os.makedirs(directory, exist_ok=True)
+    transactions_path = os.path.join(directory, 'transactions.csv')
+    prices_path = os.path.join(directory, 'prices.csv')
+    transactions.to_csv(transactions_path, index=False)
+    prices.to_csv(prices_path, index_label='Date')
+    return transactions_path, prices_path
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='synthetic_portfolio.py',
+        description='Write a synthetic transactions.csv and prices.csv (use with smic.py -t ... --prices ...).'
+    )
+    parser.add_argument('-o', '--output', default='synthetic', help='output directory (default: synthetic)')
+    parser.add_argument('--tickers', type=int, default=500, help='number of stocks (default: 500)')
+    parser.add_argument('--transactions', type=int, default=5000, help='number of ledger rows (default: 5000)')
+    parser.add_argument('--years', type=float, default=3.0, help='years of history (default: 3)')
+    parser.add_argument('--sectors', type=int, default=len(SECTOR_NAMES),
+                        help=f'number of sectors (default: {len(SECTOR_NAMES)})')
+    parser.add_argument('--end-date', default='2025-10-31', help='end of the history (default: 2025-10-31)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    args = parser.parse_args(argv)
+
+    transactions, prices = generate_synthetic_portfolio(args.tickers, args.transactions, args.years,
+                                                        args.sectors, end_date=args.end_date, seed=args.seed)
+    transactions_path, prices_path = write_synthetic_portfolio(args.output, transactions, prices)
+    print(f"Wrote {len(transactions):,} transactions to {transactions_path}", file=sys.stderr)
+    print(f"Wrote {prices.shape[0]:,} days x {prices.shape[1]:,} tickers to {prices_path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+SMIC Transaction Store Module
+Append-only CSV journal of portfolio transactions
+"""
+
+import os
+import csv
+import io
+import math
+import pandas as pd
+from typing import Dict, List
+
+# Column layout of transactions.csv
+TRANSACTION_COLUMNS = ['sector', 'ticker', 'invest_date', 'shares', 'purchase_price', 'amount_invested']
+REQUIRED_COLUMNS = ['sector', 'ticker', 'invest_date', 'amount_invested']
+
+# Sectors accepted besides the equity sectors of analysis_core.SECTOR_NAMES
+OTHER_SECTORS = ['Fixed_Income', 'Cash']
+
+# Date format of invest_date in the journal
+DATE_FORMAT = '%Y-%m-%d'
+
+# Invalid rows listed in one validation error
+_MAX_REPORTED_ERRORS = 10
+
+
+def _is_blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or (
+        not isinstance(value, str) and pd.isna(value))
+
+
+def _number(value, column: str) -> float:
+    """Parse a numeric field, rejecting text such as '$1,000' and non-finite values"""
+    try:
+        number = float(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{column} {value!r} is not a number")
+    if not math.isfinite(number):
+        raise ValueError(f"{column} {value!r} is not a finite number")
+    return number
+
+
+def validate_transaction(row: Dict) -> Dict:
+    """
+    Check one transaction and return it normalised for the journal.
+
+    Args:
+        row: Transaction keyed by column name
+
+    Returns:
+        Copy of the row with invest_date as YYYY-MM-DD, numbers as floats,
+        text fields stripped and blank optional fields as ''
+
+    Raises:
+        ValueError: Describing the first invalid field
+    """
+    # Imported here: analysis_core imports this module
+    from analysis_core import SECTOR_NAMES
+
+    for column in REQUIRED_COLUMNS:
+        if _is_blank(row.get(column)):
+            raise ValueError(f"{column} is missing")
+    clean = dict(row)
+
+    sector = str(row['sector']).strip()
+    if sector not in SECTOR_NAMES and sector not in OTHER_SECTORS:
+        raise ValueError(f"unknown sector {sector!r} (expected one of {', '.join(SECTOR_NAMES + OTHER_SECTORS)})")
+    clean['sector'] = sector
+    clean['ticker'] = str(row['ticker']).strip()
+
+    invest_date = row['invest_date']
+    if isinstance(invest_date, str):
+        try:
+            invest_date = pd.to_datetime(invest_date.strip(), format=DATE_FORMAT)
+        except (TypeError, ValueError):
+            raise ValueError(f"invest_date {row['invest_date']!r} is not a YYYY-MM-DD date")
+    try:
+        clean['invest_date'] = pd.Timestamp(invest_date).strftime(DATE_FORMAT)
+    except (TypeError, ValueError):
+        raise ValueError(f"invest_date {row['invest_date']!r} is not a date")
+
+    amount = _number(row['amount_invested'], 'amount_invested')
+    if amount <= 0:
+        raise ValueError(f"amount_invested must be positive, got {row['amount_invested']!r}")
+    clean['amount_invested'] = amount
+    for column in ('shares', 'purchase_price'):
+        clean[column] = '' if _is_blank(row.get(column)) else _number(row[column], column)
+    return clean
+
+
+def validate_transactions(rows: List[Dict], first_row: int = 1) -> List[Dict]:
+    """
+    Validate every row; nothing is returned unless all of them are valid.
+
+    Args:
+        rows: Transactions keyed by column name
+        first_row: Number reported for the first row (e.g. 2 for the first
+            data line of a CSV file under its header)
+
+    Returns:
+        The normalised rows (see validate_transaction)
+
+    Raises:
+        ValueError: Listing the invalid rows by number
+    """
+    clean, errors = [], []
+    for number, row in enumerate(rows, start=first_row):
+        try:
+            clean.append(validate_transaction(row))
+        except ValueError as e:
+            errors.append(f"row {number}: {e}")
+    if errors:
+        shown = errors[:_MAX_REPORTED_ERRORS]
+        if len(errors) > len(shown):
+            shown.append(f"... and {len(errors) - len(shown)} more")
+        raise ValueError(f"{len(errors)} invalid transaction(s), nothing was written:\n" + "\n".join(shown))
+    return clean
+
+
+class TransactionStore:
+    """
+    Transactions journal backed by a CSV file.
+
+    New transactions are appended to the end of the file and fsync'd, so an
+    insert costs the same however long the history is and a saved trade
+    survives a crash. The file stays a plain CSV that pandas (and
+    generate_portfolio_analysis) can read directly.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _header(self) -> List[str]:
+        """Column order of the existing file, or the default layout for a new file"""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+            if header:
+                return header
+        return list(TRANSACTION_COLUMNS)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) in (b'\n', b'\r')
+
+    def append(self, row: Dict):
+        """Append a single transaction (see append_many)"""
+        self.append_many([row])
+
+    def append_many(self, rows: List[Dict], first_row: int = 1):
+        """
+        Append transactions in one write.
+
+        The journal is append-only, so every row is validated first and
+        nothing is written if any of them is invalid.
+
+        Args:
+            rows: Transactions as dictionaries keyed by column name; missing
+                optional fields are written empty
+            first_row: Number of the first row in validation errors
+
+        Raises:
+            ValueError: If any row is invalid (see validate_transactions)
+        """
+        if not rows:
+            return
+        rows = validate_transactions(rows, first_row)
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        header = self._header()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if new_file:
+            writer.writerow(header)
+        elif not self._ends_with_newline():
+            buffer.write('\n')
+        for row in rows:
+            writer.writerow(['' if pd.isna(row.get(col, '')) else row.get(col, '') for col in header])
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            f.write(buffer.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def import_csv(self, path: str) -> int:
+        """
+        Batch-import transactions from another CSV file.
+
+        The whole file is rejected if any row is invalid; errors are
+        numbered by line of the file.
+
+        Returns:
+            Number of transactions imported
+        """
+        incoming = pd.read_csv(path, dtype=str, keep_default_na=False)
+        missing_cols = [col for col in REQUIRED_COLUMNS if col not in incoming.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+        rows = incoming.to_dict('records')
+        # Line 1 is the header
+        self.append_many(rows, first_row=2)
+        return len(rows)
+
+    def read(self) -> pd.DataFrame:
+        """Load all transactions with invest_date parsed as dates"""
+        return pd.read_csv(self.path, parse_dates=['invest_date'])